@@ -0,0 +1,110 @@
+"""Microbenchmark of response serialization cost per report type.
+
+Compares FastAPI's default path (serialize_response -> jsonable_encoder ->
+JSONResponse) against the direct ORJSONModelResponse path used by the routes.
+
+Usage:
+    poetry run python benchmarks/bench_serialization.py [--iterations N] [--json]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import date
+from typing import Any, Dict, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from crm_svc.schemas.report import (
+    CustomerInteractionResponse,
+    PipelineAnalyticsResponse,
+    ReportExportResponse,
+    SalesPerformanceResponse,
+    TeamProductivityResponse,
+)
+from crm_svc.utils.responses import ORJSONModelResponse
+
+START = date(2025, 1, 1)
+END = date(2025, 12, 31)
+
+
+def _sample_payloads() -> Dict[str, Any]:
+    return {
+        "sales": SalesPerformanceResponse(
+            start_date=START, end_date=END, revenue=365000.0, conversion_rate=0.9, pipeline_velocity=0.5
+        ),
+        "team": TeamProductivityResponse(
+            start_date=START, end_date=END, tasks_completed=1825, deals_closed=547, activity_level=1.0
+        ),
+        "customer": CustomerInteractionResponse(
+            start_date=START, end_date=END, total_interactions=7300, avg_engagement_score=1.0
+        ),
+        "pipeline": PipelineAnalyticsResponse(
+            start_date=START,
+            end_date=END,
+            stage_conversion_rates={f"stage_{i}": round(0.95 - i * 0.001, 4) for i in range(200)},
+        ),
+        "export": ReportExportResponse(filename="report_sales.csv", content_type="text/csv", data_b64="A" * 4096),
+    }
+
+
+async def _time_default_path(model: Any, iterations: int) -> float:
+    field = create_model_field(name="response", type_=type(model), mode="serialization")
+    started = time.perf_counter()
+    for _ in range(iterations):
+        content = await serialize_response(field=field, response_content=model)
+        JSONResponse(content).body
+    return time.perf_counter() - started
+
+
+def _time_fast_path(model: Any, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        ORJSONModelResponse(model).body
+    return time.perf_counter() - started
+
+
+def run(iterations: int) -> List[Dict[str, Any]]:
+    results = []
+    for name, model in _sample_payloads().items():
+        # sanity check: both paths must produce the same document
+        default_body = JSONResponse(model.model_dump(mode="json")).body
+        fast_body = ORJSONModelResponse(model).body
+        assert json.loads(default_body) == json.loads(fast_body), name
+
+        before = asyncio.run(_time_default_path(model, iterations))
+        after = _time_fast_path(model, iterations)
+        results.append(
+            {
+                "report": name,
+                "iterations": iterations,
+                "before_us": before / iterations * 1e6,
+                "after_us": after / iterations * 1e6,
+                "speedup": before / after if after else float("inf"),
+            }
+        )
+    return results
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--json", action="store_true", help="emit machine-readable JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.iterations)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{'report':<10} {'before (us)':>12} {'after (us)':>12} {'speedup':>8}")
+    for r in results:
+        print(f"{r['report']:<10} {r['before_us']:>12.2f} {r['after_us']:>12.2f} {r['speedup']:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
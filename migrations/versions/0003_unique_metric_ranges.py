@@ -0,0 +1,44 @@
+"""unique reporting range per metric table
+
+Revision ID: 0003_unique_metric_ranges
+Revises: 0002_create_reporting_tables
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0003_unique_metric_ranges'
+down_revision = '0002_create_reporting_tables'
+branch_labels = None
+depends_on = None
+
+METRIC_TABLES = (
+    'sales_performance_metrics',
+    'team_productivity_metrics',
+    'customer_interaction_metrics',
+    'pipeline_analytics_metrics',
+)
+
+
+def upgrade() -> None:
+    for table in METRIC_TABLES:
+        # keep the most recently created row of each duplicated range before enforcing uniqueness
+        op.execute(
+            sa.text(
+                f"DELETE FROM {table} WHERE id NOT IN ("
+                f" SELECT id FROM ("
+                f"  SELECT id, ROW_NUMBER() OVER ("
+                f"   PARTITION BY start_date, end_date ORDER BY created_at DESC, id DESC"
+                f"  ) AS rn FROM {table}"
+                f" ) ranked WHERE rn = 1"
+                f")"
+            )
+        )
+        # a unique index (rather than ALTER TABLE ... ADD CONSTRAINT) works on SQLite too
+        op.create_index(f'uq_{table}_range', table, ['start_date', 'end_date'], unique=True)
+
+
+def downgrade() -> None:
+    for table in reversed(METRIC_TABLES):
+        op.drop_index(f'uq_{table}_range', table_name=table)
@@ -0,0 +1,36 @@
+"""create pipeline_stage_metrics
+
+Revision ID: 0004_pipeline_stage_metrics
+Revises: 0003_unique_metric_ranges
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0004_pipeline_stage_metrics'
+down_revision = '0003_unique_metric_ranges'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Stage-level rows behind pipeline funnels. The JSON rates in pipeline_analytics_metrics
+    # carry no counts, so existing ranges cannot be converted and are left as they are.
+    op.create_table(
+        'pipeline_stage_metrics',
+        sa.Column('id', sa.String(length=36), primary_key=True, nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('stage', sa.String(length=64), nullable=False),
+        sa.Column('stage_order', sa.Integer(), nullable=False),
+        sa.Column('entered', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('converted', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('days_in_stage', sa.Float(), server_default=sa.text('0'), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    )
+    op.create_index('uq_pipeline_stage_metrics_day_stage', 'pipeline_stage_metrics', ['day', 'stage'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_pipeline_stage_metrics_day_stage', table_name='pipeline_stage_metrics')
+    op.drop_table('pipeline_stage_metrics')
@@ -0,0 +1,38 @@
+"""create activity_events
+
+Revision ID: 0005_activity_events
+Revises: 0004_pipeline_stage_metrics
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0005_activity_events'
+down_revision = '0004_pipeline_stage_metrics'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'activity_events',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), primary_key=True, autoincrement=True),
+        sa.Column('occurred_at', sa.DateTime(), nullable=False),
+        # crm_svc.models.ActivityKind: 1 call, 2 email, 3 meeting, 4 stage change
+        sa.Column('kind', sa.SmallInteger(), nullable=False),
+        sa.Column('customer_id', sa.String(length=36), sa.ForeignKey('customers.id'), nullable=False),
+        sa.Column('user_id', sa.String(length=36), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('deal_id', sa.String(length=36), nullable=True),
+        sa.Column('from_stage', sa.String(length=64), nullable=True),
+        sa.Column('stage', sa.String(length=64), nullable=True),
+        sa.Column('amount', sa.Float(), nullable=True),
+        sa.Column('engagement', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    )
+    op.create_index('ix_activity_events_occurred_at', 'activity_events', ['occurred_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_activity_events_occurred_at', table_name='activity_events')
+    op.drop_table('activity_events')
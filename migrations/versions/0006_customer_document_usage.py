@@ -0,0 +1,43 @@
+"""per-customer document usage counters
+
+Revision ID: 0006_customer_document_usage
+Revises: 0005_activity_events
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0006_customer_document_usage'
+down_revision = '0005_activity_events'
+branch_labels = None
+depends_on = None
+
+# crm_svc.models.document.TOTAL_USAGE_KEY
+TOTAL_USAGE_KEY = '*'
+
+
+def upgrade() -> None:
+    op.create_table(
+        'customer_document_usage',
+        sa.Column('customer_id', sa.String(length=36), sa.ForeignKey('customers.id'), primary_key=True),
+        sa.Column('file_type', sa.String(), primary_key=True),
+        sa.Column('document_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('total_bytes', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+    # seed the counters from the documents that already exist
+    op.execute(
+        "INSERT INTO customer_document_usage (customer_id, file_type, document_count, total_bytes) "
+        "SELECT customer_id, file_type, COUNT(*), SUM(file_size) FROM documents GROUP BY customer_id, file_type"
+    )
+    op.execute(
+        sa.text(
+            "INSERT INTO customer_document_usage (customer_id, file_type, document_count, total_bytes) "
+            "SELECT customer_id, :total, COUNT(*), SUM(file_size) FROM documents GROUP BY customer_id"
+        ).bindparams(total=TOTAL_USAGE_KEY)
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('customer_document_usage')
@@ -0,0 +1,124 @@
+"""partition metric tables by month and documents by customer (PostgreSQL only)
+
+Unique keys of a partitioned table must include the partition key, so on
+``documents`` the primary key becomes ``(id, customer_id)`` and the unique
+index ``(stored_filename, customer_id)``: the database no longer enforces
+that ``id`` and ``stored_filename`` are unique across customers.
+``DocumentService.upload_document`` checks that instead, and lookups that do
+not pass ``customer_id`` probe all hash partitions.
+
+The month partition DDL is a frozen copy of ``crm_svc.partitions`` as of this
+revision; later changes there do not change what this migration does.
+
+Revision ID: 0007_partition_large_tables
+Revises: 0006_customer_document_usage
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0007_partition_large_tables'
+down_revision = '0006_customer_document_usage'
+branch_labels = None
+depends_on = None
+
+METRIC_TABLES = (
+    'sales_performance_metrics',
+    'team_productivity_metrics',
+    'customer_interaction_metrics',
+    'pipeline_analytics_metrics',
+)
+# crm_svc.config.METRIC_PARTITION_MONTHS_AHEAD default; crm_svc-partitions keeps it up afterwards
+MONTHS_AHEAD = 3
+# fixed for the life of the table: changing it means rewriting documents
+DOCUMENT_PARTITIONS = 16
+
+
+def _add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _swap_out(table: str, constraints, indexes) -> str:
+    """Rename ``table`` aside and free the index names the new table reuses."""
+    old = f'{table}_unpartitioned'
+    op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    for name in constraints:
+        op.execute(f'ALTER TABLE {old} DROP CONSTRAINT IF EXISTS {name}')
+    for name in indexes:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+    return old
+
+
+def _partition_metric_table(table: str) -> None:
+    old = _swap_out(table, (f'{table}_pkey', f'{table}_id_key'), (f'uq_{table}_range',))
+    op.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE (start_date)')
+    # unique keys of a partitioned table must include the partition key
+    op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, start_date)')
+    op.create_index(f'uq_{table}_range', table, ['start_date', 'end_date'], unique=True)
+
+    # a partition for every month from the oldest row's through the next few, as crm_svc-partitions --from would
+    this_month = date.today().replace(day=1)
+    oldest = op.get_bind().execute(sa.text(f'SELECT MIN(start_date) FROM {old}')).scalar()
+    month = min(oldest.replace(day=1), this_month) if oldest else this_month
+    while month <= _add_months(this_month, MONTHS_AHEAD):
+        op.execute(
+            f"CREATE TABLE {table}_p{month.year:04d}_{month.month:02d} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month}') TO ('{_add_months(month, 1)}')"
+        )
+        month = _add_months(month, 1)
+    op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+    op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+    op.drop_table(old)
+
+
+def _partition_documents() -> None:
+    old = _swap_out('documents', ('documents_pkey', 'documents_id_key', 'documents_stored_filename_key'), ())
+    op.execute(f'CREATE TABLE documents (LIKE {old} INCLUDING DEFAULTS) PARTITION BY HASH (customer_id)')
+    op.execute('ALTER TABLE documents ADD CONSTRAINT documents_pkey PRIMARY KEY (id, customer_id)')
+    op.create_index('uq_documents_stored_filename', 'documents', ['stored_filename', 'customer_id'], unique=True)
+    op.create_index('ix_documents_customer_id', 'documents', ['customer_id'])
+    op.create_foreign_key('fk_documents_customer_id', 'documents', 'customers', ['customer_id'], ['id'])
+    op.create_foreign_key('fk_documents_uploaded_by_user_id', 'documents', 'users', ['uploaded_by_user_id'], ['id'])
+    for remainder in range(DOCUMENT_PARTITIONS):
+        op.execute(
+            f'CREATE TABLE documents_h{remainder:02d} PARTITION OF documents '
+            f'FOR VALUES WITH (MODULUS {DOCUMENT_PARTITIONS}, REMAINDER {remainder})'
+        )
+    op.execute(f'INSERT INTO documents SELECT * FROM {old}')
+    op.drop_table(old)
+
+
+def _unpartition(table: str) -> None:
+    """Copy ``table`` into a plain table and drop the partitioned one with its partitions."""
+    plain = f'{table}_unpartitioned'
+    op.execute(f'CREATE TABLE {plain} (LIKE {table} INCLUDING DEFAULTS)')
+    op.execute(f'INSERT INTO {plain} SELECT * FROM {table}')
+    op.execute(f'DROP TABLE {table} CASCADE')
+    op.execute(f'ALTER TABLE {plain} RENAME TO {table}')
+
+
+def upgrade() -> None:
+    # SQLite has no declarative partitioning; its tables stay as they are
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table in METRIC_TABLES:
+        _partition_metric_table(table)
+    _partition_documents()
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    _unpartition('documents')
+    op.create_primary_key('documents_pkey', 'documents', ['id'])
+    op.create_unique_constraint('documents_stored_filename_key', 'documents', ['stored_filename'])
+    op.create_foreign_key(None, 'documents', 'customers', ['customer_id'], ['id'])
+    op.create_foreign_key(None, 'documents', 'users', ['uploaded_by_user_id'], ['id'])
+    for table in reversed(METRIC_TABLES):
+        _unpartition(table)
+        op.create_primary_key(f'{table}_pkey', table, ['id'])
+        op.create_index(f'uq_{table}_range', table, ['start_date', 'end_date'], unique=True)
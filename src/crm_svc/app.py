@@ -1,9 +1,56 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from crm_svc.middleware import AdmissionMiddleware, MetricsMiddleware, ProfilingMiddleware, TracingMiddleware
+from crm_svc.utils.responses import ORJSONModelResponse
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the database engine and start metric change tracking at startup, not import time."""
+    from crm_svc.models.base import dispose_engine, get_engine
+    from crm_svc.services.report_cache import report_cache
+    from crm_svc.utils.cache import close_cache_backend
+    from crm_svc.utils.events import install_change_tracking
+    from crm_svc.utils.tracing import get_tracer
+
+    try:
+        get_engine()
+        install_change_tracking()
+    except Exception as e:
+        logger.error(e, exc_info=True)
+    yield
+    try:
+        # background refreshes use the engine and the cache backend; stop them first
+        report_cache.shutdown()
+        get_tracer().processor.force_flush()
+        dispose_engine()
+        close_cache_backend()
+    except Exception as e:
+        logger.error(e, exc_info=True)
+
+
 # Minimal FastAPI app required by tests and TestClient
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONModelResponse, lifespan=lifespan)
+app.add_middleware(ProfilingMiddleware)
+# inside MetricsMiddleware, so shed requests still show up as 503s in the HTTP metrics
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
 
 # include reports router
 from crm_svc.routers.reports import reports_router
+from crm_svc.routers.metrics import metrics_router
+from crm_svc.routers.live import live_router
+from crm_svc.routers.ingestion import ingestion_router
+from crm_svc.routers.documents import documents_router
 
 app.include_router(reports_router, prefix="/api")
+app.include_router(live_router, prefix="/api")
+app.include_router(ingestion_router, prefix="/api")
+app.include_router(documents_router, prefix="/api")
+app.include_router(metrics_router)
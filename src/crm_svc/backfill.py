@@ -0,0 +1,289 @@
+"""Streaming backfill of historical rows into the metric tables.
+
+Reads CSV, NDJSON or Parquet files and writes them in fixed-size chunks, so
+memory stays flat however large the file is. Every chunk is validated with the
+report's row schema and upserted on (start_date, end_date) in its own
+transaction:
+
+- PostgreSQL: ``COPY`` into a temporary staging table, then one
+  ``INSERT ... SELECT ... ON CONFLICT DO UPDATE`` into the metric table.
+- SQLite: a single ``executemany`` of the upsert, with WAL and a larger page
+  cache enabled on the connection.
+
+After each commit the number of source records consumed is written to a
+checkpoint file; a rerun skips that many records and carries on. Because
+writes are upserts, a chunk applied twice (e.g. a crash between the commit
+and the checkpoint) leaves the same rows behind.
+
+Usage:
+    crm_svc-backfill sales history/sales_2015_2024.csv
+    crm_svc-backfill pipeline history/pipeline.ndjson --chunk-size 50000
+    crm_svc-backfill team history/team.parquet --database-url postgresql://...
+
+CSV cells of JSON columns (``stage_conversion_rates``) hold a JSON object.
+Parquet needs pyarrow (the ``parquet`` extra).
+"""
+import argparse
+import csv
+import io
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Connection, Engine
+
+from crm_svc.models.types import JSONBCompatible
+from crm_svc.services.ingestion_service import (
+    METRIC_TABLES,
+    build_records,
+    build_upsert,
+    get_metric_model,
+    get_row_adapter,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+
+def read_csv(path: str, json_columns: Sequence[str] = (), chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        for record in csv.DictReader(f):
+            for column in json_columns:
+                if record.get(column):
+                    record[column] = orjson.loads(record[column])
+            yield record
+
+
+def read_ndjson(path: str, json_columns: Sequence[str] = (), chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    with open(path, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield orjson.loads(line)
+
+
+def read_parquet(path: str, json_columns: Sequence[str] = (), chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Reading Parquet requires pyarrow; install crm_svc with the 'parquet' extra")
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield from batch.to_pylist()
+
+
+READERS: Dict[str, Callable[..., Iterator[Dict[str, Any]]]] = {
+    "csv": read_csv,
+    "ndjson": read_ndjson,
+    "parquet": read_parquet,
+}
+_EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".parquet": "parquet", ".pq": "parquet"}
+
+
+def detect_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        return _EXTENSIONS[ext]
+    except KeyError:
+        raise ValueError(f"Cannot infer the format of {path}; pass --format")
+
+
+class Checkpoint:
+    """Number of source records of ``source`` already committed for ``report``."""
+
+    def __init__(self, path: str, source: str, report: str):
+        self.path = path
+        self.source = os.path.abspath(source)
+        self.report = report
+
+    def load(self) -> int:
+        try:
+            with open(self.path, "rb") as f:
+                state = orjson.loads(f.read())
+        except FileNotFoundError:
+            return 0
+        if state.get("source") != self.source or state.get("report") != self.report:
+            raise ValueError(
+                f"Checkpoint {self.path} belongs to {state.get('report')} from {state.get('source')}; "
+                "pass --restart or another --checkpoint"
+            )
+        return int(state.get("records", 0))
+
+    def save(self, records: int) -> None:
+        # write then rename, so a crash never leaves a truncated checkpoint
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(orjson.dumps({"source": self.source, "report": self.report, "records": records}))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+class SQLiteWriter:
+    # synchronous stays at its default (FULL): a chunk is durable before its checkpoint is written
+    PRAGMAS = ("PRAGMA journal_mode=WAL", "PRAGMA cache_size=-65536", "PRAGMA temp_store=MEMORY")
+
+    def __init__(self, table, value_columns: Sequence[str]):
+        self.statement = build_upsert("sqlite", table, value_columns)
+
+    def write(self, conn: Connection, records: List[Dict[str, Any]]) -> None:
+        for pragma in self.PRAGMAS:
+            conn.exec_driver_sql(pragma)
+        conn.execute(self.statement, records)
+
+
+def _copy_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode("utf-8")
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+class PostgresCopyWriter:
+    """COPY a chunk into a per-connection staging table and merge it with one upsert."""
+
+    def __init__(self, table, value_columns: Sequence[str]):
+        self.columns = ["id", "start_date", "end_date", "created_at", *value_columns]
+        staging = f"_backfill_{table.name}"
+        cols = ", ".join(self.columns)
+        updates = ", ".join(f"{col} = EXCLUDED.{col}" for col in (*value_columns, "created_at"))
+        self.create_sql = (
+            f"CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE {table.name} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+        self.copy_sql = f"COPY {staging} ({cols}) FROM STDIN WITH (FORMAT csv)"
+        self.merge_sql = (
+            f"INSERT INTO {table.name} ({cols}) SELECT {cols} FROM {staging} "
+            f"ON CONFLICT (start_date, end_date) DO UPDATE SET {updates}"
+        )
+
+    def write(self, conn: Connection, records: List[Dict[str, Any]]) -> None:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for record in records:
+            writer.writerow([_copy_value(record[col]) for col in self.columns])
+        conn.exec_driver_sql(self.create_sql)
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            if hasattr(cursor, "copy_expert"):  # psycopg2
+                buf.seek(0)
+                cursor.copy_expert(self.copy_sql, buf)
+            else:  # psycopg 3
+                with cursor.copy(self.copy_sql) as copy:
+                    copy.write(buf.getvalue())
+        finally:
+            cursor.close()
+        conn.exec_driver_sql(self.merge_sql)
+
+
+def get_writer(dialect_name: str, table, value_columns: Sequence[str]):
+    if dialect_name == "postgresql":
+        return PostgresCopyWriter(table, value_columns)
+    if dialect_name == "sqlite":
+        return SQLiteWriter(table, value_columns)
+    raise ValueError(f"Backfill is not supported on {dialect_name}")
+
+
+class BackfillResult(NamedTuple):
+    skipped: int
+    records: int
+    written: int
+    chunks: int
+    seconds: float
+
+
+def run_backfill(
+    engine: Engine,
+    report: str,
+    path: str,
+    fmt: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    checkpoint_path: Optional[str] = None,
+    restart: bool = False,
+) -> BackfillResult:
+    """Stream ``path`` into the metric table for ``report``, resuming from its checkpoint.
+
+    Raises ValueError naming the first invalid record; everything before its
+    chunk is committed and checkpointed.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    fmt = fmt or detect_format(path)
+    if fmt not in READERS:
+        raise ValueError(f"Unknown format: {fmt}")
+    model = get_metric_model(report)
+    adapter = get_row_adapter(report)
+    writer = get_writer(engine.dialect.name, model.__table__, METRIC_TABLES[report].value_columns)
+    json_columns = [col.name for col in model.__table__.columns if isinstance(col.type, JSONBCompatible)]
+    checkpoint = Checkpoint(checkpoint_path or f"{path}.{report}.checkpoint", path, report)
+
+    skipped = 0 if restart else checkpoint.load()
+    if skipped:
+        logger.info("Resuming %s after %s records", path, skipped)
+    source = itertools.islice(READERS[fmt](path, json_columns, chunk_size), skipped, None)
+
+    started = time.perf_counter()
+    done, written, chunks = skipped, 0, 0
+    while True:
+        chunk = list(itertools.islice(source, chunk_size))
+        if not chunk:
+            break
+        try:
+            rows = adapter.validate_python(chunk)
+        except ValidationError as e:
+            error = e.errors(include_url=False)[0]
+            field = ".".join(str(part) for part in error["loc"][1:])
+            raise ValueError(f"Record {done + error['loc'][0] + 1} of {path} is invalid: {field}: {error['msg']}")
+        records = build_records(report, rows, datetime.utcnow())
+        with engine.begin() as conn:
+            writer.write(conn, records)
+        done += len(chunk)
+        written += len(records)
+        chunks += 1
+        checkpoint.save(done)
+        elapsed = time.perf_counter() - started
+        logger.info("%s: %s records committed (%.0f rows/s)", report, done, (done - skipped) / elapsed if elapsed else 0)
+    return BackfillResult(skipped, done - skipped, written, chunks, time.perf_counter() - started)
+
+
+def main(argv: List[str] = None) -> int:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Stream historical metric rows into a metric table")
+    parser.add_argument("report", choices=sorted(METRIC_TABLES))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=sorted(READERS), default=None, help="defaults to the file extension")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="records per transaction")
+    parser.add_argument("--checkpoint", default=None, help="defaults to <path>.<report>.checkpoint")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--database-url", default=None, help="defaults to DATABASE_URL")
+    args = parser.parse_args(argv)
+
+    if args.database_url:
+        engine = create_engine(args.database_url)
+    else:
+        from crm_svc.models.base import get_engine
+
+        engine = get_engine()
+    try:
+        result = run_backfill(
+            engine, args.report, args.path, args.format, args.chunk_size, args.checkpoint, args.restart
+        )
+    except (ValueError, OSError) as e:
+        logger.error(e)
+        return 1
+    finally:
+        engine.dispose()
+    print(json.dumps(result._asdict()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
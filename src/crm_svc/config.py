@@ -12,3 +12,242 @@ try:
     MAX_FILE_SIZE_MB = int(os.getenv("MAX_FILE_SIZE_MB", 10))
 except Exception:
     MAX_FILE_SIZE_MB = 10
+
+# Per-customer document quotas; 0 disables a limit
+try:
+    CUSTOMER_MAX_DOCUMENTS = int(os.getenv("CUSTOMER_MAX_DOCUMENTS", 0))
+except Exception:
+    CUSTOMER_MAX_DOCUMENTS = 0
+try:
+    CUSTOMER_MAX_STORAGE_MB = float(os.getenv("CUSTOMER_MAX_STORAGE_MB", 0))
+except Exception:
+    CUSTOMER_MAX_STORAGE_MB = 0.0
+
+# Slow query logging: statements slower than the threshold are logged with redacted
+# parameters; a negative threshold disables the log entirely.
+try:
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", 500))
+except Exception:
+    SLOW_QUERY_THRESHOLD_MS = 500.0
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "false").lower() in ("1", "true", "yes")
+try:
+    SLOW_QUERY_EXPLAIN_PER_MINUTE = int(os.getenv("SLOW_QUERY_EXPLAIN_PER_MINUTE", 6))
+except Exception:
+    SLOW_QUERY_EXPLAIN_PER_MINUTE = 6
+
+# Request tracing: fraction of requests traced when the caller did not already decide
+# (W3C traceparent sampled flag), and where finished spans are exported.
+try:
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0.01))
+except Exception:
+    TRACE_SAMPLE_RATE = 0.01
+# "none", "log", "file" or a "package.module:factory" path returning a SpanExporter
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none")
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", os.path.join(os.getcwd(), "traces", "spans.jsonl"))
+
+# On-demand request profiling: requests carrying X-Profile-Token equal to PROFILE_TOKEN,
+# plus a PROFILE_SAMPLE_RATE fraction of all requests, are profiled into PROFILE_OUTPUT_DIR.
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN") or None
+try:
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0.0))
+except Exception:
+    PROFILE_SAMPLE_RATE = 0.0
+PROFILE_OUTPUT_DIR = os.getenv("PROFILE_OUTPUT_DIR", os.path.join(os.getcwd(), "profiles"))
+try:
+    PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", 50))
+except Exception:
+    PROFILE_MAX_FILES = 50
+try:
+    PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 2))
+except Exception:
+    PROFILE_INTERVAL_MS = 2.0
+
+# Server run mode: "development" keeps uvicorn's single-process defaults, "production"
+# runs WEB_CONCURRENCY workers (default: CPU count) with the tuning knobs below.
+SERVER_MODE = os.getenv("SERVER_MODE", "development").lower()
+try:
+    WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 0))
+except Exception:
+    WEB_CONCURRENCY = 0
+try:
+    SERVER_KEEPALIVE_SECONDS = int(os.getenv("SERVER_KEEPALIVE_SECONDS", 75))
+except Exception:
+    SERVER_KEEPALIVE_SECONDS = 75
+try:
+    SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", 2048))
+except Exception:
+    SERVER_BACKLOG = 2048
+# Recycle a worker after this many requests (0 disables); jitter staggers the restarts.
+try:
+    SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", 0))
+except Exception:
+    SERVER_MAX_REQUESTS = 0
+try:
+    SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", 0))
+except Exception:
+    SERVER_MAX_REQUESTS_JITTER = 0
+try:
+    SERVER_GRACEFUL_TIMEOUT_SECONDS = int(os.getenv("SERVER_GRACEFUL_TIMEOUT_SECONDS", 30))
+except Exception:
+    SERVER_GRACEFUL_TIMEOUT_SECONDS = 30
+SERVER_ACCESS_LOG = os.getenv("SERVER_ACCESS_LOG", "false").lower() in ("1", "true", "yes")
+
+
+def _optional_int(name: str):
+    value = os.getenv(name)
+    try:
+        return int(value) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+# Connection pool sizing for non-SQLite databases. DB_MAX_CONNECTIONS is the budget for
+# the whole deployment; in production mode it is split evenly across workers unless
+# DB_POOL_SIZE / DB_MAX_OVERFLOW are set explicitly. Unset values keep SQLAlchemy defaults.
+DB_MAX_CONNECTIONS = _optional_int("DB_MAX_CONNECTIONS")
+DB_POOL_SIZE = _optional_int("DB_POOL_SIZE")
+DB_MAX_OVERFLOW = _optional_int("DB_MAX_OVERFLOW")
+try:
+    DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", 30))
+except Exception:
+    DB_POOL_TIMEOUT_SECONDS = 30.0
+
+# Optional read replica for report and document metadata reads. Reads fall back to the
+# primary while the replica lags by more than REPLICA_MAX_LAG_SECONDS (measured at most
+# every REPLICA_LAG_CHECK_SECONDS) or cannot be reached.
+READ_REPLICA_URL = os.getenv("READ_REPLICA_URL") or None
+try:
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 5))
+except Exception:
+    REPLICA_MAX_LAG_SECONDS = 5.0
+try:
+    REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", 5))
+except Exception:
+    REPLICA_LAG_CHECK_SECONDS = 5.0
+
+# PostgreSQL metric tables are partitioned by month of start_date; crm_svc-partitions
+# keeps this many months beyond the current one created ahead of time.
+try:
+    METRIC_PARTITION_MONTHS_AHEAD = int(os.getenv("METRIC_PARTITION_MONTHS_AHEAD", 3))
+except Exception:
+    METRIC_PARTITION_MONTHS_AHEAD = 3
+
+# Cache backend shared by the report cache and document metadata: "memory" keeps
+# entries in each worker; "redis" shares them across workers and nodes through
+# CACHE_REDIS_URL (any Redis-protocol server) and broadcasts invalidations over pub/sub.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "crm:")
+# entries per worker for the memory backend, least recently used evicted first
+try:
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 2048))
+except Exception:
+    CACHE_MAX_ENTRIES = 2048
+try:
+    DOCUMENT_CACHE_TTL_SECONDS = float(os.getenv("DOCUMENT_CACHE_TTL_SECONDS", 300))
+except Exception:
+    DOCUMENT_CACHE_TTL_SECONDS = 300.0
+# the memory backend cannot see other workers' deletes; cap how long they may serve a deleted document
+try:
+    DOCUMENT_CACHE_LOCAL_TTL_SECONDS = float(os.getenv("DOCUMENT_CACHE_LOCAL_TTL_SECONDS", 30))
+except Exception:
+    DOCUMENT_CACHE_LOCAL_TTL_SECONDS = 30.0
+
+# Longest a request waits for an identical in-flight report call before computing its
+# own result (crm_svc.utils.coalescing).
+try:
+    SINGLE_FLIGHT_WAIT_SECONDS = float(os.getenv("SINGLE_FLIGHT_WAIT_SECONDS", 10))
+except Exception:
+    SINGLE_FLIGHT_WAIT_SECONDS = 10.0
+
+# Server-side report cache (stale-while-revalidate). Per report type, a value younger
+# than the soft TTL is served as is; between the soft and hard TTL it is served
+# immediately while one background refresh recomputes it; past the hard TTL the
+# request recomputes it. REPORT_CACHE_TTLS overrides types as
+# "sales_performance=30:300,pipeline_funnel=0:0" (0:0 disables caching for the type).
+REPORT_CACHE_DEFAULT_TTLS = {
+    "sales_performance": (30.0, 300.0),
+    "team_productivity": (60.0, 600.0),
+    "customer_interaction": (60.0, 600.0),
+    "pipeline_analytics": (60.0, 600.0),
+    "pipeline_funnel": (120.0, 900.0),
+    "sales_series": (60.0, 600.0),
+}
+
+
+def _report_cache_ttls(value: str):
+    ttls = dict(REPORT_CACHE_DEFAULT_TTLS)
+    for item in value.split(","):
+        name, _, pair = item.partition("=")
+        soft, _, hard = pair.partition(":")
+        try:
+            ttls[name.strip()] = (float(soft), float(hard or soft))
+        except ValueError:
+            continue
+    return ttls
+
+
+REPORT_CACHE_TTLS = _report_cache_ttls(os.getenv("REPORT_CACHE_TTLS", ""))
+try:
+    REPORT_CACHE_REFRESH_WORKERS = int(os.getenv("REPORT_CACHE_REFRESH_WORKERS", 2))
+except Exception:
+    REPORT_CACHE_REFRESH_WORKERS = 2
+
+# Admission control: per route group, at most <limit> requests run at once and up
+# to <queue> more wait (at most ADMISSION_QUEUE_TIMEOUT_SECONDS) for a slot; the
+# rest are shed at once with 503 and Retry-After. ADMISSION_LIMITS overrides groups
+# as "export=1:2,reports=28:56"; a limit of 0 disables admission control for the group.
+# Sync routes run on AnyIO's threadpool of 40 tokens, so the limits together stay below
+# it (30), leaving threads for unlimited routes instead of queueing admitted requests there.
+ADMISSION_DEFAULT_LIMITS = {
+    "reports": (24, 48),
+    "export": (2, 4),
+    "upload": (4, 8),
+}
+
+
+def _admission_limits(value: str):
+    limits = dict(ADMISSION_DEFAULT_LIMITS)
+    for item in value.split(","):
+        name, _, pair = item.partition("=")
+        limit, _, queue = pair.partition(":")
+        try:
+            limits[name.strip()] = (int(limit), int(queue or 0))
+        except ValueError:
+            continue
+    return limits
+
+
+ADMISSION_LIMITS = _admission_limits(os.getenv("ADMISSION_LIMITS", ""))
+try:
+    ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", 5))
+except Exception:
+    ADMISSION_QUEUE_TIMEOUT_SECONDS = 5.0
+try:
+    ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", 2))
+except Exception:
+    ADMISSION_RETRY_AFTER_SECONDS = 2
+
+# Dashboard report cache: entries younger than the TTL are served without a request;
+# older ones are revalidated with If-None-Match. Least recently used entries beyond
+# the bound are evicted.
+try:
+    DASHBOARD_CACHE_TTL_SECONDS = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", 60))
+except Exception:
+    DASHBOARD_CACHE_TTL_SECONDS = 60.0
+try:
+    DASHBOARD_CACHE_MAX_ENTRIES = int(os.getenv("DASHBOARD_CACHE_MAX_ENTRIES", 256))
+except Exception:
+    DASHBOARD_CACHE_MAX_ENTRIES = 256
+DASHBOARD_DEBUG = os.getenv("DASHBOARD_DEBUG", "false").lower() in ("1", "true", "yes")
+
+# Bulk ingestion: requests with more rows than this are rejected with 413
+try:
+    INGEST_MAX_ROWS = int(os.getenv("INGEST_MAX_ROWS", 50000))
+except Exception:
+    INGEST_MAX_ROWS = 50000
+# ... and bodies larger than this many bytes, before anything is parsed
+try:
+    INGEST_MAX_BYTES = int(os.getenv("INGEST_MAX_BYTES", 32 * 1024 * 1024))
+except Exception:
+    INGEST_MAX_BYTES = 32 * 1024 * 1024
@@ -1,18 +1,116 @@
+import functools
+import hashlib
 import logging
-from typing import Dict, List
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
 
 from plotly import express as px
 from plotly import graph_objects as go
+from pydantic import BaseModel
 
 from crm_svc.schemas.report import (
     SalesPerformanceResponse,
     TeamProductivityResponse,
     CustomerInteractionResponse,
     PipelineAnalyticsResponse,
+    SalesSeriesResponse,
 )
 
 logger = logging.getLogger(__name__)
 
+CHART_CACHE_MAX_ENTRIES = 128
+
+# Shared layout settings per variant, applied once when a figure is built.
+LAYOUT_TEMPLATES: Dict[str, Dict[str, Any]] = {
+    "desktop": {
+        "height": 420,
+        "margin": {"l": 60, "r": 30, "t": 60, "b": 50},
+        "font": {"size": 14},
+    },
+    "mobile": {
+        "height": 320,
+        "margin": {"l": 40, "r": 10, "t": 50, "b": 40},
+        "font": {"size": 12},
+    },
+}
+
+
+class FigureCache:
+    """Bounded LRU of built figures shared by all dashboard sessions.
+
+    Cached figures are returned as-is and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = CHART_CACHE_MAX_ENTRIES):
+        self.max_entries = max(1, max_entries)
+        self._figures: "OrderedDict[Hashable, go.Figure]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[go.Figure]:
+        with self._lock:
+            fig = self._figures.get(key)
+            if fig is None:
+                self.misses += 1
+                return None
+            self._figures.move_to_end(key)
+            self.hits += 1
+            return fig
+
+    def put(self, key: Hashable, fig: go.Figure) -> None:
+        with self._lock:
+            self._figures[key] = fig
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.max_entries:
+                self._figures.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._figures.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._figures)
+
+
+figure_cache = FigureCache()
+
+
+def payload_fingerprint(data: BaseModel) -> str:
+    """Stable hash of a validated response model, independent of object identity."""
+    return hashlib.blake2b(data.__pydantic_serializer__.to_json(data), digest_size=16).hexdigest()
+
+
+def _apply_layout_template(fig: go.Figure, variant: str) -> None:
+    for name, value in LAYOUT_TEMPLATES.get(variant, LAYOUT_TEMPLATES["desktop"]).items():
+        setattr(fig.layout, name, value)
+
+
+def _memoized_figure(kind: str) -> Callable[[Callable[[Any], go.Figure]], Callable[..., go.Figure]]:
+    """Cache the figures built by a chart function per (payload hash, layout variant)."""
+
+    def decorator(build: Callable[[Any], go.Figure]) -> Callable[..., go.Figure]:
+        @functools.wraps(build)
+        def wrapper(data, variant: str = "desktop") -> go.Figure:
+            if not isinstance(data, BaseModel):
+                fig = build(data)
+                _apply_layout_template(fig, variant)
+                return fig
+            key = (kind, variant, payload_fingerprint(data))
+            fig = figure_cache.get(key)
+            if fig is None:
+                fig = build(data)
+                _apply_layout_template(fig, variant)
+                figure_cache.put(key, fig)
+            return fig
+
+        return wrapper
+
+    return decorator
+
 
 def _format_date_range(start, end) -> str:
     try:
@@ -21,6 +119,7 @@ def _format_date_range(start, end) -> str:
         return ""
 
 
+@_memoized_figure("sales_performance")
 def create_sales_performance_chart(data: SalesPerformanceResponse) -> go.Figure:
     """Create a bar chart summarizing key sales performance metrics.
 
@@ -40,6 +139,7 @@ def create_sales_performance_chart(data: SalesPerformanceResponse) -> go.Figure:
         return fig
 
 
+@_memoized_figure("team_productivity")
 def create_team_productivity_chart(data: TeamProductivityResponse) -> go.Figure:
     """Create a team productivity bar chart.
 
@@ -58,6 +158,7 @@ def create_team_productivity_chart(data: TeamProductivityResponse) -> go.Figure:
         return fig
 
 
+@_memoized_figure("customer_interaction")
 def create_customer_interaction_chart(data: CustomerInteractionResponse) -> go.Figure:
     """Create a customer interaction bar chart.
 
@@ -76,6 +177,7 @@ def create_customer_interaction_chart(data: CustomerInteractionResponse) -> go.F
         return fig
 
 
+@_memoized_figure("pipeline_analytics")
 def create_pipeline_analytics_chart(data: PipelineAnalyticsResponse) -> go.Figure:
     """Create a pipeline analytics chart (bar) for stage conversion rates.
 
@@ -97,3 +199,20 @@ def create_pipeline_analytics_chart(data: PipelineAnalyticsResponse) -> go.Figur
         fig = go.Figure()
         fig.layout.title = "Pipeline Analytics (error generating chart)"
         return fig
+
+
+@_memoized_figure("sales_series")
+def create_sales_series_chart(data: SalesSeriesResponse) -> go.Figure:
+    """Create a daily revenue line chart from a (downsampled) series.
+
+    Returns a plotly.graph_objects.Figure
+    """
+    try:
+        title = f"Daily Revenue ({_format_date_range(data.start_date, data.end_date)})"
+        fig = px.line(x=data.dates, y=data.revenue, labels={"x": "Date", "y": "Revenue"}, title=title)
+        return fig
+    except Exception as e:
+        logger.error(e, exc_info=True)
+        fig = go.Figure()
+        fig.layout.title = "Daily Revenue (error generating chart)"
+        return fig
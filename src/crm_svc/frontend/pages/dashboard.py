@@ -1,31 +1,45 @@
+import importlib.util
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
-from typing import Optional, Dict, Any
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Type
 
 import httpx
 import streamlit as st
+from pydantic import BaseModel
 
 from crm_svc.frontend.components.mobile_components import (
     inject_mobile_base_css,
     inject_viewport_meta,
 )
-from crm_svc.frontend.utils.mobile_utils import is_mobile_view
+from crm_svc.config import DASHBOARD_CACHE_MAX_ENTRIES, DASHBOARD_CACHE_TTL_SECONDS, DASHBOARD_DEBUG
+from crm_svc.frontend.utils.mobile_utils import get_screen_width, is_mobile_view, series_target_points
+from crm_svc.frontend.utils.live_feed import LiveFeed
+from crm_svc.frontend.utils.report_cache import ReportCache
 from crm_svc.frontend.components.charts import (
     create_sales_performance_chart,
     create_team_productivity_chart,
     create_customer_interaction_chart,
     create_pipeline_analytics_chart,
+    create_sales_series_chart,
 )
 from crm_svc.schemas.report import (
     SalesPerformanceResponse,
     TeamProductivityResponse,
     CustomerInteractionResponse,
     PipelineAnalyticsResponse,
+    SalesSeriesResponse,
 )
 
 logger = logging.getLogger(__name__)
 
 BASE_URL = "http://localhost:8000/api"
+REQUEST_TIMEOUT_SECONDS = 10.0
+# live sections re-read the in-memory feed this often; no request is made unless data changed
+LIVE_REFRESH_SECONDS = 1.0
+# date ranges with an open live stream per process; each stream holds one connection
+LIVE_FEED_MAX_ENTRIES = 16
 
 
 def _is_streamlit_runtime() -> bool:
@@ -40,100 +54,302 @@ def _is_streamlit_runtime() -> bool:
         return False
 
 
-@st.cache_data
-def fetch_sales_performance_data(start_date: date, end_date: date) -> Optional[Dict[str, Any]]:
-    """Fetch sales performance metrics from backend API for given date range."""
-    url = f"{BASE_URL}/sales-performance"
+@st.cache_resource
+def get_http_client() -> httpx.Client:
+    """Return the process-wide HTTP client shared by all dashboard sessions.
+
+    Reusing one client keeps TCP (and TLS) connections alive between reruns
+    instead of paying a handshake per request. HTTP/2 is negotiated when the
+    optional ``h2`` package is installed and the backend is served over TLS.
+    """
+    return httpx.Client(
+        http2=importlib.util.find_spec("h2") is not None,
+        timeout=REQUEST_TIMEOUT_SECONDS,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+    )
+
+
+@st.cache_resource
+def get_live_http_client() -> httpx.Client:
+    """Return the client used by the live feeds, one connection per feed.
+
+    The streams stay open indefinitely, so they get their own pool rather than
+    taking connections that report fetches and revalidations would wait for.
+    """
+    return httpx.Client(
+        timeout=REQUEST_TIMEOUT_SECONDS,
+        limits=httpx.Limits(max_connections=LIVE_FEED_MAX_ENTRIES, max_keepalive_connections=LIVE_FEED_MAX_ENTRIES),
+    )
+
+
+@st.cache_resource(max_entries=LIVE_FEED_MAX_ENTRIES, on_release=LiveFeed.stop)
+def get_live_feed(start_date: str, end_date: str) -> LiveFeed:
+    """Return the process-wide live feed for a date range, shared by all sessions viewing it."""
+    return LiveFeed(f"{BASE_URL}/live/metrics", start_date, end_date, get_live_http_client).start()
+
+
+@st.cache_resource
+def get_report_cache() -> ReportCache:
+    """Return the process-wide report cache shared by all dashboard sessions."""
+    return ReportCache(DASHBOARD_CACHE_TTL_SECONDS, DASHBOARD_CACHE_MAX_ENTRIES)
+
+
+def _fetch_report(
+    path: str,
+    label: str,
+    start_date: date,
+    end_date: date,
+    extra_params: Optional[Dict[str, Any]] = None,
+    revalidate: bool = False,
+) -> Optional[Dict[str, Any]]:
+    url = f"{BASE_URL}/{path}"
     params = {"start_date": start_date.isoformat(), "end_date": end_date.isoformat()}
+    if extra_params:
+        params.update(extra_params)
+    cache = get_report_cache()
+    key = (path, *sorted(params.items()))
+    # revalidate skips the TTL and always asks the server (a 304 when unchanged)
+    cached = None if revalidate else cache.get_fresh(key)
+    if cached is not None:
+        return cached
+    etag = cache.etag(key)
+    headers = {"If-None-Match": etag} if etag else None
     try:
-        with st.spinner("Loading sales performance..."):
-            resp = httpx.get(url, params=params, timeout=10.0)
+        with st.spinner(f"Loading {label}..."):
+            resp = get_http_client().get(url, params=params, headers=headers)
+            if resp.status_code == 304:
+                revalidated = cache.mark_revalidated(key)
+                if revalidated is not None:
+                    return revalidated
+                # evicted while the request was in flight; fetch the full payload
+                resp = get_http_client().get(url, params=params)
             resp.raise_for_status()
-            return resp.json()
+            payload = resp.json()
+            cache.store(key, payload, resp.headers.get("etag"))
+            return payload
     except httpx.RequestError as e:
         logger.error(e, exc_info=True)
-        st.error("Network error while fetching sales performance. Please try again.")
+        st.error(f"Network error while fetching {label}. Please try again.")
         return None
     except httpx.HTTPStatusError as e:
         logger.error(e, exc_info=True)
-        st.error("Failed to fetch sales performance: server returned an error.")
+        st.error(f"Failed to fetch {label}: server returned an error.")
         return None
     except Exception as e:
         logger.error(e, exc_info=True)
-        st.error("Unexpected error while fetching sales performance.")
+        st.error(f"Unexpected error while fetching {label}.")
         return None
 
 
-@st.cache_data
-def fetch_team_productivity_data(start_date: date, end_date: date) -> Optional[Dict[str, Any]]:
+def fetch_sales_performance_data(start_date: date, end_date: date, revalidate: bool = False) -> Optional[Dict[str, Any]]:
+    """Fetch sales performance metrics from backend API for given date range."""
+    return _fetch_report("sales-performance", "sales performance", start_date, end_date, revalidate=revalidate)
+
+
+def fetch_team_productivity_data(start_date: date, end_date: date, revalidate: bool = False) -> Optional[Dict[str, Any]]:
     """Fetch team productivity metrics from backend API for given date range."""
-    url = f"{BASE_URL}/team-productivity"
-    params = {"start_date": start_date.isoformat(), "end_date": end_date.isoformat()}
+    return _fetch_report("team-productivity", "team productivity", start_date, end_date, revalidate=revalidate)
+
+
+def fetch_customer_interaction_data(start_date: date, end_date: date, revalidate: bool = False) -> Optional[Dict[str, Any]]:
+    """Fetch customer interaction metrics from backend API for given date range."""
+    return _fetch_report("customer-interaction", "customer interaction", start_date, end_date, revalidate=revalidate)
+
+
+def fetch_pipeline_analytics_data(start_date: date, end_date: date, revalidate: bool = False) -> Optional[Dict[str, Any]]:
+    """Fetch pipeline analytics metrics from backend API for given date range."""
+    return _fetch_report("pipeline-analytics", "pipeline analytics", start_date, end_date, revalidate=revalidate)
+
+
+def fetch_sales_series_data(start_date: date, end_date: date, target: int) -> Optional[Dict[str, Any]]:
+    """Fetch daily revenue downsampled by the backend to ``target`` points."""
+    return _fetch_report(
+        "sales-performance/series", "sales trend", start_date, end_date, {"target": target, "method": "lttb"}
+    )
+
+
+class ReportSection(NamedTuple):
+    key: str
+    title: str
+    label: str
+    fetch: Callable[[date, date], Optional[Dict[str, Any]]]
+    model: Type[BaseModel]
+    chart: Callable[..., Any]
+
+
+def _report_sections() -> List[ReportSection]:
+    # looked up at call time so tests can patch the module-level fetchers
+    return [
+        ReportSection(
+            "sales",
+            "Sales Performance",
+            "sales performance",
+            fetch_sales_performance_data,
+            SalesPerformanceResponse,
+            create_sales_performance_chart,
+        ),
+        ReportSection(
+            "team",
+            "Team Productivity",
+            "team productivity",
+            fetch_team_productivity_data,
+            TeamProductivityResponse,
+            create_team_productivity_chart,
+        ),
+        ReportSection(
+            "customer",
+            "Customer Interaction",
+            "customer interaction",
+            fetch_customer_interaction_data,
+            CustomerInteractionResponse,
+            create_customer_interaction_chart,
+        ),
+        ReportSection(
+            "pipeline",
+            "Pipeline Analytics",
+            "pipeline analytics",
+            fetch_pipeline_analytics_data,
+            PipelineAnalyticsResponse,
+            create_pipeline_analytics_chart,
+        ),
+    ]
+
+
+def _attach_script_run_ctx(ctx) -> None:
+    if ctx is None:
+        return
+    from streamlit.runtime.scriptrunner import add_script_run_ctx
+
+    add_script_run_ctx(threading.current_thread(), ctx)
+
+
+def fetch_all_report_data(
+    start_date: date, end_date: date, sections: Optional[List[ReportSection]] = None
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Fetch every report section concurrently and return the payloads keyed by section.
+
+    Page latency becomes that of the slowest request rather than the sum of
+    all four. Worker threads inherit the script run context so spinners and
+    error messages behave as they do on the script thread.
+    """
+    sections = sections if sections is not None else _report_sections()
+    ctx = None
+    if _is_streamlit_runtime():
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(
+        max_workers=max(1, len(sections)),
+        thread_name_prefix="crm-dashboard-fetch",
+        initializer=_attach_script_run_ctx,
+        initargs=(ctx,),
+    ) as pool:
+        futures = {section.key: pool.submit(section.fetch, start_date, end_date) for section in sections}
+    results: Dict[str, Optional[Dict[str, Any]]] = {}
+    for key, future in futures.items():
+        try:
+            results[key] = future.result()
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            results[key] = None
+    return results
+
+
+def _debug_enabled() -> bool:
+    if DASHBOARD_DEBUG:
+        return True
     try:
-        with st.spinner("Loading team productivity..."):
-            resp = httpx.get(url, params=params, timeout=10.0)
-            resp.raise_for_status()
-            return resp.json()
-    except httpx.RequestError as e:
-        logger.error(e, exc_info=True)
-        st.error("Network error while fetching team productivity. Please try again.")
-        return None
-    except httpx.HTTPStatusError as e:
-        logger.error(e, exc_info=True)
-        st.error("Failed to fetch team productivity: server returned an error.")
-        return None
+        return st.query_params.get("debug") == "1"
+    except Exception:
+        return False
+
+
+def _render_cache_debug_panel() -> None:
+    """Show report cache statistics when debugging is enabled (env or ``?debug=1``)."""
+    try:
+        if not _debug_enabled():
+            return
+        with st.expander("Debug: report cache"):
+            st.json(get_report_cache().stats())
     except Exception as e:
         logger.error(e, exc_info=True)
-        st.error("Unexpected error while fetching team productivity.")
-        return None
 
 
-@st.cache_data
-def fetch_customer_interaction_data(start_date: date, end_date: date) -> Optional[Dict[str, Any]]:
-    """Fetch customer interaction metrics from backend API for given date range."""
-    url = f"{BASE_URL}/customer-interaction"
-    params = {"start_date": start_date.isoformat(), "end_date": end_date.isoformat()}
+def _render_section(section: ReportSection, payload: Optional[Dict[str, Any]]) -> None:
+    st.subheader(section.title)
+    if not payload:
+        st.info(f"No {section.label} data available")
+        return
+    # try to render a responsive chart, with the raw payload available on demand
     try:
-        with st.spinner("Loading customer interaction..."):
-            resp = httpx.get(url, params=params, timeout=10.0)
-            resp.raise_for_status()
-            return resp.json()
-    except httpx.RequestError as e:
-        logger.error(e, exc_info=True)
-        st.error("Network error while fetching customer interaction. Please try again.")
-        return None
-    except httpx.HTTPStatusError as e:
-        logger.error(e, exc_info=True)
-        st.error("Failed to fetch customer interaction: server returned an error.")
-        return None
+        try:
+            parsed = section.model.model_validate(payload)
+        except Exception:
+            parsed = None
+        if parsed is not None:
+            # figures are memoized per payload and variant, so reruns reuse them
+            fig = section.chart(parsed, variant="mobile" if is_mobile_view() else "desktop")
+            try:
+                st.plotly_chart(fig, use_container_width=True, config={"responsive": True})
+            except Exception as e:
+                logger.error(e, exc_info=True)
+                st.info(f"{section.label.capitalize()} chart unavailable")
     except Exception as e:
         logger.error(e, exc_info=True)
-        st.error("Unexpected error while fetching customer interaction.")
-        return None
+    if st.toggle("Show raw data", key=f"raw_{section.key}"):
+        st.json(payload)
 
 
-@st.cache_data
-def fetch_pipeline_analytics_data(start_date: date, end_date: date) -> Optional[Dict[str, Any]]:
-    """Fetch pipeline analytics metrics from backend API for given date range."""
-    url = f"{BASE_URL}/pipeline-analytics"
-    params = {"start_date": start_date.isoformat(), "end_date": end_date.isoformat()}
+def _render_sales_trend(start_date: date, end_date: date) -> None:
+    # one point per couple of screen pixels is all the chart can show
+    target = series_target_points(get_screen_width())
+    series = fetch_sales_series_data(start_date, end_date, target)
+    if not series:
+        return
     try:
-        with st.spinner("Loading pipeline analytics..."):
-            resp = httpx.get(url, params=params, timeout=10.0)
-            resp.raise_for_status()
-            return resp.json()
-    except httpx.RequestError as e:
+        parsed = SalesSeriesResponse.model_validate(series)
+    except Exception:
+        return
+    fig = create_sales_series_chart(parsed, variant="mobile" if is_mobile_view() else "desktop")
+    try:
+        st.plotly_chart(fig, use_container_width=True, config={"responsive": True})
+    except Exception as e:
         logger.error(e, exc_info=True)
-        st.error("Network error while fetching pipeline analytics. Please try again.")
-        return None
-    except httpx.HTTPStatusError as e:
+        st.info("Sales trend chart unavailable")
+
+
+@st.fragment
+def render_report_section(section: ReportSection, start_date: date, end_date: date) -> None:
+    """Fetch and render one report section as an independently rerunning fragment.
+
+    Widgets inside the section (e.g. the raw data toggle) rerun only this
+    function, not the whole page; the payload comes from the report cache.
+    """
+    try:
+        _render_section(section, section.fetch(start_date, end_date))
+        if section.key == "sales" and start_date != end_date:
+            _render_sales_trend(start_date, end_date)
+    except Exception as e:
         logger.error(e, exc_info=True)
-        st.error("Failed to fetch pipeline analytics: server returned an error.")
-        return None
+        st.info(f"No {section.label} data available")
+
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def render_live_section(section: ReportSection, start_date: date, end_date: date) -> None:
+    """Render a section from the live feed, re-reading it every LIVE_REFRESH_SECONDS.
+
+    The payload is fetched once and then kept current by pushed deltas, so a
+    wall display in live mode does not poll the report endpoints.
+    """
+    try:
+        feed = get_live_feed(start_date.isoformat(), end_date.isoformat())
+        payload = feed.payload_for(section.key, lambda: section.fetch(start_date, end_date, revalidate=True))
+        _render_section(section, payload)
+        if not feed.connected:
+            st.caption("Live updates reconnecting...")
     except Exception as e:
         logger.error(e, exc_info=True)
-        st.error("Unexpected error while fetching pipeline analytics.")
-        return None
+        st.info(f"No {section.label} data available")
 
 
 def render_dashboard() -> None:
@@ -190,94 +406,25 @@ def render_dashboard() -> None:
         start_date = today
         end_date = today
 
-    # Sales performance section
-    st.subheader("Sales Performance")
-    sales = fetch_sales_performance_data(start_date, end_date)
-    if sales:
-        st.json(sales)
-        # try to render a responsive chart beneath the raw json
-        try:
-            try:
-                sp = SalesPerformanceResponse.model_validate(sales)
-            except Exception:
-                sp = None
-            if sp is not None:
-                fig = create_sales_performance_chart(sp)
-                try:
-                    st.plotly_chart(fig, use_container_width=True, config={"responsive": True})
-                except Exception as e:
-                    logger.error(e, exc_info=True)
-                    st.info("Sales performance chart unavailable")
-        except Exception as e:
-            logger.error(e, exc_info=True)
-    else:
-        st.info("No sales performance data available")
-
-    # Team productivity section
-    st.subheader("Team Productivity")
-    team = fetch_team_productivity_data(start_date, end_date)
-    if team:
-        st.json(team)
-        try:
-            try:
-                tp = TeamProductivityResponse.model_validate(team)
-            except Exception:
-                tp = None
-            if tp is not None:
-                fig = create_team_productivity_chart(tp)
-                try:
-                    st.plotly_chart(fig, use_container_width=True, config={"responsive": True})
-                except Exception as e:
-                    logger.error(e, exc_info=True)
-                    st.info("Team productivity chart unavailable")
-        except Exception as e:
-            logger.error(e, exc_info=True)
-    else:
-        st.info("No team productivity data available")
-
-    # Customer interaction section
-    st.subheader("Customer Interaction")
-    customer = fetch_customer_interaction_data(start_date, end_date)
-    if customer:
-        st.json(customer)
-        try:
-            try:
-                ci = CustomerInteractionResponse.model_validate(customer)
-            except Exception:
-                ci = None
-            if ci is not None:
-                fig = create_customer_interaction_chart(ci)
-                try:
-                    st.plotly_chart(fig, use_container_width=True, config={"responsive": True})
-                except Exception as e:
-                    logger.error(e, exc_info=True)
-                    st.info("Customer interaction chart unavailable")
-        except Exception as e:
-            logger.error(e, exc_info=True)
-    else:
-        st.info("No customer interaction data available")
-
-    # Pipeline analytics section
-    st.subheader("Pipeline Analytics")
-    pipeline = fetch_pipeline_analytics_data(start_date, end_date)
-    if pipeline:
-        st.json(pipeline)
-        try:
-            try:
-                pa = PipelineAnalyticsResponse.model_validate(pipeline)
-            except Exception:
-                pa = None
-            if pa is not None:
-                fig = create_pipeline_analytics_chart(pa)
-                try:
-                    st.plotly_chart(fig, use_container_width=True, config={"responsive": True})
-                except Exception as e:
-                    logger.error(e, exc_info=True)
-                    st.info("Pipeline analytics chart unavailable")
-        except Exception as e:
-            logger.error(e, exc_info=True)
-    else:
-        st.info("No pipeline analytics data available")
+    live = st.toggle("Live updates", key="live_mode", help="Push changes to this page as they are recorded")
+
+    # Lazy tabs: with on_change="rerun" only the selected tab reports open=True, so
+    # the other sections are neither fetched nor rendered. A tab reporting None
+    # (no state tracking) is treated as visible.
+    sections = _report_sections()
+    tabs = st.tabs([section.title for section in sections], key="report_tab", on_change="rerun")
+    visible = [(tab, section) for tab, section in zip(tabs, sections) if getattr(tab, "open", None) is not False]
+    if len(visible) > 1 and not live:
+        # warm the cache concurrently so the fragments below render from memory
+        fetch_all_report_data(start_date, end_date, [section for _, section in visible])
+    for tab, section in visible:
+        with tab:
+            if live:
+                render_live_section(section, start_date, end_date)
+            else:
+                render_report_section(section, start_date, end_date)
+
+    _render_cache_debug_panel()
 
 
 # Only auto-run UI when inside a Streamlit runtime
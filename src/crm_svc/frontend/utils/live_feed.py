@@ -0,0 +1,116 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+import httpx
+import orjson
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_BACKOFF_SECONDS = (1.0, 2.0, 5.0, 10.0)
+
+
+def parse_sse(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """Yield ``(event, data)`` pairs from the lines of a text/event-stream body."""
+    event, data = "message", []
+    for line in lines:
+        if line == "":
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+            continue
+        if line.startswith(":"):
+            continue
+        name, _, value = line.partition(":")
+        value = value[1:] if value.startswith(" ") else value
+        if name == "event":
+            event = value
+        elif name == "data":
+            data.append(value)
+
+
+class LiveFeed:
+    """Background subscription to the backend's live metric stream for one date range.
+
+    The dashboard reads report payloads through :meth:`payload_for`; a payload
+    is fetched once and afterwards kept current by the pushed deltas, so a
+    page in live mode sends no report requests while nothing changes. Changes
+    the delta cannot express (deletes, rows that only overlap the range, or a
+    resync after dropped events or a reconnect) mark the payload stale and the
+    next read refetches it.
+    """
+
+    def __init__(self, url: str, start_date: str, end_date: str, client_factory: Callable[[], httpx.Client]):
+        self.url = url
+        self.start_date = start_date
+        self.end_date = end_date
+        self._client_factory = client_factory
+        self._payloads: Dict[str, Dict[str, Any]] = {}
+        self._stale: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="crm-live-feed", daemon=True)
+        self.version = 0
+        self.connected = False
+
+    def start(self) -> "LiveFeed":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def payload_for(self, report: str, fetch: Callable[[], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if report in self._payloads and not self._stale.get(report, False):
+                return self._payloads[report]
+        payload = fetch()
+        with self._lock:
+            if payload is not None:
+                self._payloads[report] = payload
+                self._stale[report] = False
+        return payload
+
+    def apply(self, event: str, data: Any) -> None:
+        with self._lock:
+            if event == "resync":
+                self._stale = {report: True for report in self._payloads}
+            elif event == "metrics":
+                for change in data:
+                    self._apply_change(change)
+            else:
+                return
+            self.version += 1
+
+    def _apply_change(self, change: Dict[str, Any]) -> None:
+        report = change.get("report")
+        exact = change.get("start_date") == self.start_date and change.get("end_date") == self.end_date
+        if exact and change.get("op") == "upsert" and change.get("values") is not None:
+            self._payloads[report] = {"start_date": self.start_date, "end_date": self.end_date, **change["values"]}
+            self._stale[report] = False
+        else:
+            self._stale[report] = True
+
+    def _run(self) -> None:
+        attempt = 0
+        params = {"start_date": self.start_date, "end_date": self.end_date}
+        timeout = httpx.Timeout(10.0, read=None)
+        while not self._stop.is_set():
+            try:
+                client = self._client_factory()
+                with client.stream("GET", self.url, params=params, timeout=timeout) as resp:
+                    resp.raise_for_status()
+                    self.connected = True
+                    attempt = 0
+                    # anything may have changed while we were disconnected
+                    self.apply("resync", {})
+                    for event, data in parse_sse(resp.iter_lines()):
+                        if self._stop.is_set():
+                            return
+                        self.apply(event, orjson.loads(data))
+            except Exception as e:
+                logger.error(e, exc_info=True)
+            self.connected = False
+            delay = RECONNECT_BACKOFF_SECONDS[min(attempt, len(RECONNECT_BACKOFF_SECONDS) - 1)]
+            attempt += 1
+            self._stop.wait(delay)
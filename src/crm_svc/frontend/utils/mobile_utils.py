@@ -51,3 +51,16 @@ def breakpoint_thresholds() -> Dict[str, int]:
     Useful for consistent usage across components.
     """
     return {"sm": 576, "md": 768, "lg": 992}
+
+
+def series_target_points(width: int, points_per_pixel: float = 0.5, minimum: int = 50, maximum: int = 2000) -> int:
+    """Return how many points a time-series chart of ``width`` pixels should request.
+
+    More points than pixels are invisible but still shipped and drawn, which
+    is what makes long ranges slow on mobile; the backend downsamples to this.
+    """
+    try:
+        return max(minimum, min(maximum, int(int(width) * points_per_pixel)))
+    except Exception as e:
+        logger.error(e, exc_info=True)
+        return minimum
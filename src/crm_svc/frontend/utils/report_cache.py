@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Entry:
+    __slots__ = ("payload", "etag", "stored_at")
+
+    def __init__(self, payload: Any, etag: Optional[str], stored_at: float):
+        self.payload = payload
+        self.etag = etag
+        self.stored_at = stored_at
+
+
+class ReportCache:
+    """Bounded, TTL-aware cache of report payloads with ETag revalidation.
+
+    Entries younger than ``ttl_seconds`` are fresh and served without a
+    request. Expired entries keep their payload and ETag so the caller can
+    revalidate with If-None-Match; a 304 renews the entry via
+    ``mark_revalidated`` instead of downloading the payload again. The least
+    recently used entry is evicted once ``max_entries`` is exceeded.
+
+    A single instance is shared by all dashboard sessions and fetch threads,
+    so every method takes the lock.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = max(0.0, ttl_seconds)
+        self.max_entries = max(1, max_entries)
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    def get_fresh(self, key: Hashable) -> Optional[Any]:
+        """Return the payload if it is still within its TTL, counting a hit."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._clock() - entry.stored_at >= self.ttl_seconds:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.payload
+
+    def etag(self, key: Hashable) -> Optional[str]:
+        """Return the validator of a (possibly expired) entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.etag if entry is not None else None
+
+    def mark_revalidated(self, key: Hashable) -> Optional[Any]:
+        """Renew an entry after the server answered 304 and return its payload."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry.stored_at = self._clock()
+            self._entries.move_to_end(key)
+            self.revalidations += 1
+            return entry.payload
+
+    def store(self, key: Hashable, payload: Any, etag: Optional[str]) -> None:
+        """Record a full response, counting a miss and evicting beyond the bound."""
+        with self._lock:
+            self._entries[key] = _Entry(payload, etag, self._clock())
+            self._entries.move_to_end(key)
+            self.misses += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.revalidations + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "revalidated": self.revalidations,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round((self.hits + self.revalidations) / lookups, 3) if lookups else 0.0,
+            }
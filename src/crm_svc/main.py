@@ -1,7 +1,10 @@
+import importlib.util
+import inspect
 import logging
+import os
+from typing import Any, Dict, Optional, Tuple
 
-import uvicorn
-from crm_svc.app import app
+from crm_svc import config
 from crm_svc.config import SERVICE_PORT
 
 
@@ -9,12 +12,95 @@ from crm_svc.config import SERVICE_PORT
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+APP_IMPORT_STRING = "crm_svc.app:app"
+
+
+def resolve_workers(requested: int = 0) -> int:
+    """Return the worker count: ``requested`` when positive, else the number of usable CPUs."""
+    if requested and requested > 0:
+        return requested
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+
+def pool_settings_for_workers(max_connections: Optional[int], workers: int) -> Optional[Tuple[int, int]]:
+    """Split a deployment-wide connection budget into per-worker ``(pool_size, max_overflow)``.
+
+    A quarter of each worker's share is kept as overflow for bursts, so steady
+    state holds fewer idle connections while the total never exceeds the budget.
+    """
+    if not max_connections or max_connections <= 0:
+        return None
+    per_worker = max(1, max_connections // max(1, workers))
+    overflow = per_worker // 4
+    return per_worker - overflow, overflow
+
+
+def _module_available(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+def production_server_options(workers: int) -> Dict[str, Any]:
+    """uvicorn.run keyword arguments for production mode."""
+    options: Dict[str, Any] = {
+        "workers": workers,
+        "loop": "uvloop" if _module_available("uvloop") else "asyncio",
+        "http": "httptools" if _module_available("httptools") else "h11",
+        "timeout_keep_alive": config.SERVER_KEEPALIVE_SECONDS,
+        "backlog": config.SERVER_BACKLOG,
+        "timeout_graceful_shutdown": config.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        "access_log": config.SERVER_ACCESS_LOG,
+        "proxy_headers": True,
+    }
+    if config.SERVER_MAX_REQUESTS > 0:
+        options["limit_max_requests"] = config.SERVER_MAX_REQUESTS
+        if config.SERVER_MAX_REQUESTS_JITTER > 0:
+            # older uvicorn releases have no jitter option; recycling still works without it
+            import uvicorn
+
+            if "limit_max_requests_jitter" in inspect.signature(uvicorn.Config).parameters:
+                options["limit_max_requests_jitter"] = config.SERVER_MAX_REQUESTS_JITTER
+    return options
+
+
+def _apply_worker_pool_settings(workers: int) -> None:
+    # workers are spawned processes that re-read config from the environment
+    if config.DB_POOL_SIZE is not None or config.DB_MAX_OVERFLOW is not None:
+        return
+    settings = pool_settings_for_workers(config.DB_MAX_CONNECTIONS, workers)
+    if settings is None:
+        return
+    pool_size, max_overflow = settings
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+    config.DB_POOL_SIZE, config.DB_MAX_OVERFLOW = pool_size, max_overflow
+    logger.info(
+        "DB pool per worker: pool_size=%s max_overflow=%s (%s connections across %s workers)",
+        pool_size,
+        max_overflow,
+        config.DB_MAX_CONNECTIONS,
+        workers,
+    )
+
 
 def main():
+    # uvicorn imports the app from the import string, so neither is needed at module import
+    import uvicorn
+
     service_port = int(SERVICE_PORT)
-    uvicorn.run(app, host="0.0.0.0", port=service_port)
+    if config.SERVER_MODE != "production":
+        uvicorn.run(APP_IMPORT_STRING, host="0.0.0.0", port=service_port)
+        return
+
+    workers = resolve_workers(config.WEB_CONCURRENCY)
+    _apply_worker_pool_settings(workers)
+    options = production_server_options(workers)
+    logger.info("Starting production server: %s", options)
+    uvicorn.run(APP_IMPORT_STRING, host="0.0.0.0", port=service_port, **options)
 
 
 if __name__ == "__main__":
     # Entry point for the application
-    main()
\ No newline at end of file
+    main()
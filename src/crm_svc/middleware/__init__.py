@@ -0,0 +1,6 @@
+from .admission import AdmissionMiddleware
+from .metrics import MetricsMiddleware
+from .profiling import ProfilingMiddleware
+from .tracing import TracingMiddleware
+
+__all__ = ["AdmissionMiddleware", "MetricsMiddleware", "ProfilingMiddleware", "TracingMiddleware"]
@@ -0,0 +1,143 @@
+import asyncio
+import fnmatch
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from crm_svc import config
+from crm_svc.middleware.metrics import resolve_route_template
+from crm_svc.utils.metrics import ADMISSION_ACTIVE, ADMISSION_QUEUE_SECONDS, ADMISSION_QUEUED, ADMISSION_SHED
+
+logger = logging.getLogger(__name__)
+
+# (group, method, route template pattern); the first match wins, unmatched routes are not limited
+ROUTE_GROUPS: Tuple[Tuple[Optional[str], str, str], ...] = (
+    ("export", "GET", "/api/export"),
+    ("upload", "POST", "/api/ingest/*"),
+    # long-lived SSE streams would hold report slots for their whole lifetime
+    (None, "GET", "/api/live/*"),
+    ("reports", "GET", "/api/*"),
+)
+
+
+def route_group(method: str, route: str) -> Optional[str]:
+    if method == "HEAD":
+        method = "GET"
+    for group, group_method, pattern in ROUTE_GROUPS:
+        if method == group_method and fnmatch.fnmatchcase(route, pattern):
+            return group
+    return None
+
+
+class ConcurrencyLimiter:
+    """At most ``limit`` holders at a time, and at most ``queue_depth`` callers waiting, first come first served.
+
+    Lives on one event loop: the worker's, or the TestClient's.
+    """
+
+    def __init__(self, group: str, limit: int, queue_depth: int, timeout: float):
+        self.group = group
+        self.limit = limit
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        """Take a slot, waiting in the queue if needed; False when the request must be shed."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            ADMISSION_ACTIVE.labels(self.group).set(self.active)
+            ADMISSION_QUEUE_SECONDS.labels(self.group).observe(0.0)
+            return True
+        if len(self._waiters) >= self.queue_depth:
+            ADMISSION_SHED.labels(self.group, "queue_full").inc()
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        ADMISSION_QUEUED.labels(self.group).set(len(self._waiters))
+        started = time.perf_counter()
+        try:
+            # release() hands its slot straight to the waiter, so ``active`` is already counted
+            await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            # release() may have handed over the slot just as the wait timed out
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            ADMISSION_SHED.labels(self.group, "timeout").inc()
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            ADMISSION_QUEUED.labels(self.group).set(len(self._waiters))
+        ADMISSION_QUEUE_SECONDS.labels(self.group).observe(time.perf_counter() - started)
+        return True
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+        ADMISSION_ACTIVE.labels(self.group).set(self.active)
+
+
+def build_limiters(
+    limits: Dict[str, Tuple[int, int]], timeout: float = config.ADMISSION_QUEUE_TIMEOUT_SECONDS
+) -> Dict[str, ConcurrencyLimiter]:
+    return {
+        group: ConcurrencyLimiter(group, limit, queue_depth, timeout)
+        for group, (limit, queue_depth) in limits.items()
+        if limit > 0
+    }
+
+
+class AdmissionMiddleware:
+    """Per route group admission control (``ROUTE_GROUPS``, limits from ADMISSION_LIMITS).
+
+    Expensive groups such as exports and bulk ingestion cannot take up the whole
+    threadpool and database pool, so cheap report lookups keep their latency
+    during spikes. A request over its group's limit and queue is answered at
+    once with 503 and ``Retry-After`` instead of waiting behind the backlog.
+    """
+
+    def __init__(self, app: ASGIApp, limiters: Optional[Dict[str, ConcurrencyLimiter]] = None):
+        self.app = app
+        self.limiters = limiters if limiters is not None else build_limiters(config.ADMISSION_LIMITS)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        group = route_group(scope.get("method", "GET"), resolve_route_template(scope))
+        limiter = self.limiters.get(group) if group else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            response = JSONResponse(
+                {"detail": "Server is busy, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(config.ADMISSION_RETRY_AFTER_SECONDS)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
@@ -0,0 +1,70 @@
+import hmac
+import logging
+import random
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from crm_svc import config
+from crm_svc.middleware.metrics import resolve_route_template
+from crm_svc.utils.profiling import RequestProfile, new_profile_id, write_profile
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile-token"
+PROFILE_ID_HEADER = "x-profile-id"
+
+
+def _should_profile(scope: Scope) -> bool:
+    token = config.PROFILE_TOKEN
+    if token:
+        supplied = Headers(scope=scope).get(PROFILE_HEADER)
+        if supplied and hmac.compare_digest(supplied.encode("utf-8"), token.encode("utf-8")):
+            return True
+    rate = config.PROFILE_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+class ProfilingMiddleware:
+    """Opt-in per-request CPU and allocation profiling.
+
+    A request is profiled when it carries ``X-Profile-Token`` matching
+    PROFILE_TOKEN or is picked by PROFILE_SAMPLE_RATE. Settings are read per
+    request so they can be changed without rebuilding the app.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not _should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile.try_start(config.PROFILE_INTERVAL_MS / 1000.0)
+        if profile is None:
+            # another request is being profiled; tracemalloc and the sampler are process-wide
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get("method", "GET")
+        route = resolve_route_template(scope)
+        profile_id = new_profile_id(method, route)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(PROFILE_ID_HEADER, profile_id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.stop()
+            try:
+                await run_in_threadpool(
+                    write_profile, profile, config.PROFILE_OUTPUT_DIR, profile_id, config.PROFILE_MAX_FILES
+                )
+                logger.info("Wrote request profile %s for %s %s", profile_id, method, route)
+            except Exception as e:
+                logger.error(e, exc_info=True)
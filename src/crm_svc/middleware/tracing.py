@@ -0,0 +1,52 @@
+import logging
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from crm_svc.middleware.metrics import resolve_route_template
+from crm_svc.utils.tracing import TRACEPARENT_HEADER, get_tracer, parse_traceparent
+
+logger = logging.getLogger(__name__)
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a root span per request.
+
+    Continues the trace from an incoming ``traceparent`` header and echoes the
+    request span's ``traceparent`` on the response so callers can find it.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tracer = get_tracer()
+        parent = parse_traceparent(Headers(scope=scope).get(TRACEPARENT_HEADER))
+        method = scope.get("method", "GET")
+        route = resolve_route_template(scope)
+        span = tracer.start_root_span(f"{method} {route}", parent)
+        if span is None:
+            await self.app(scope, receive, send)
+            return
+
+        span.attributes.update({"http.method": method, "http.route": route, "http.target": scope.get("path", "")})
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                span.attributes["http.status_code"] = message["status"]
+                if message["status"] >= 500:
+                    span.status = "error"
+                MutableHeaders(scope=message).append(TRACEPARENT_HEADER, span.context.to_traceparent())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            span.status = "error"
+            raise
+        finally:
+            tracer.end_span(span)
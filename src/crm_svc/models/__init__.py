@@ -1,5 +1,12 @@
 from .base import Base, get_db
-from .document import Document
+from .document import CustomerDocumentUsage, Document
 from .customer import Customer
 from .user import User
-from .report import SalesPerformanceMetrics, TeamProductivityMetrics, CustomerInteractionMetrics, PipelineAnalyticsMetrics
+from .activity import ActivityEvent, ActivityKind
+from .report import (
+    SalesPerformanceMetrics,
+    TeamProductivityMetrics,
+    CustomerInteractionMetrics,
+    PipelineAnalyticsMetrics,
+    PipelineStageMetrics,
+)
@@ -0,0 +1,57 @@
+import enum
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, Float, ForeignKey, Index, Integer, SmallInteger, String
+
+from .base import Base
+
+# stage a deal moves to when it is won; its amount counts as revenue
+WON_STAGE = "closed_won"
+
+
+class ActivityKind(enum.IntEnum):
+    CALL = 1
+    EMAIL = 2
+    MEETING = 3
+    # a deal moved from from_stage (NULL when the deal was created) to stage
+    STAGE_CHANGE = 4
+
+
+INTERACTION_KINDS = (ActivityKind.CALL, ActivityKind.EMAIL, ActivityKind.MEETING)
+
+
+class ActivityEvent(Base):
+    """Append-only log of CRM activity; reports aggregate it when no stored metric covers a range.
+
+    ``kind`` is stored as a small integer (see :class:`ActivityKind`) so scans
+    can decode it straight into NumPy arrays.
+    """
+
+    __tablename__ = "activity_events"
+    __table_args__ = (Index("ix_activity_events_occurred_at", "occurred_at"),)
+
+    # integer identity rather than a UUID: the table grows to tens of millions of rows
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    occurred_at = Column(DateTime, nullable=False)
+    kind = Column(SmallInteger, nullable=False)
+    customer_id = Column(
+        String(36),
+        ForeignKey('customers.id', name='fk_activity_events_customer_id', use_alter=True),
+        nullable=False,
+    )
+    user_id = Column(
+        String(36),
+        ForeignKey('users.id', name='fk_activity_events_user_id', use_alter=True),
+        nullable=False,
+    )
+    deal_id = Column(String(36), nullable=True)
+    from_stage = Column(String(64), nullable=True)
+    stage = Column(String(64), nullable=True)
+    # deal value carried by stage changes
+    amount = Column(Float, nullable=True)
+    # 0..1 engagement score of an interaction
+    engagement = Column(Float, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<ActivityEvent(id={self.id}, kind={self.kind}, occurred_at={self.occurred_at})>"
@@ -1,19 +1,262 @@
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional, TypeVar
+
 from sqlalchemy import Column, PrimaryKeyConstraint, String
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import scoped_session, sessionmaker, Session
+from sqlalchemy.orm import sessionmaker, Session
+
+from crm_svc.config import (
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT_SECONDS,
+    READ_REPLICA_URL,
+    REPLICA_LAG_CHECK_SECONDS,
+    REPLICA_MAX_LAG_SECONDS,
+    SLOW_QUERY_EXPLAIN,
+    SLOW_QUERY_EXPLAIN_PER_MINUTE,
+    SLOW_QUERY_THRESHOLD_MS,
+)
+from crm_svc.utils.metrics import DB_READ_ROUTING, DB_REPLICA_LAG, instrument_engine
+from crm_svc.utils.slow_query import install_slow_query_log
+from crm_svc.utils.tracing import instrument_engine_tracing
 
-from crm_svc.config import DATABASE_URL
+logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
+# The engine is created on first use (normally by the app lifespan) rather than at
+# import time: building it pulls in the dialect and DBAPI modules and slows cold start.
+_engine: Optional[Engine] = None
+_session_factory: Optional[sessionmaker] = None
+_replica: Optional["ReplicaMonitor"] = None
+_engine_lock = threading.Lock()
+
+F = TypeVar("F", bound=Callable)
+
+# set while a read-only service operation runs; only then may reads use the replica
+_prefer_replica: ContextVar[bool] = ContextVar("crm_prefer_replica", default=False)
+
+
+@contextmanager
+def replica_reads() -> Iterator[None]:
+    """Let SELECTs issued in this block be served by the read replica."""
+    token = _prefer_replica.set(True)
+    try:
+        yield
+    finally:
+        _prefer_replica.reset(token)
+
+
+def reads_from_replica(fn: F) -> F:
+    """Decorate a read-only service method so its queries may use the read replica."""
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def replication_lag_seconds(engine: Engine) -> float:
+    """Seconds the replica's replay is behind; 0 when caught up or not a streaming standby."""
+    with engine.connect() as conn:
+        if engine.dialect.name != "postgresql":
+            conn.exec_driver_sql("SELECT 1")
+            return 0.0
+        lag = conn.exec_driver_sql(
+            "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+        ).scalar()
+    return float(lag or 0.0)
+
+
+class ReplicaMonitor:
+    """Decides whether the read replica may serve reads.
+
+    Lag is probed at most every ``check_interval_seconds`` by whichever request
+    gets there first; others keep using the last verdict. A failed probe or a
+    disconnect on the replica counts as unhealthy until the next probe.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        max_lag_seconds: float = REPLICA_MAX_LAG_SECONDS,
+        check_interval_seconds: float = REPLICA_LAG_CHECK_SECONDS,
+        probe: Callable[[Engine], float] = replication_lag_seconds,
+    ):
+        self.engine = engine
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.lag_seconds: Optional[float] = None
+        self._probe = probe
+        self._healthy = False
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def healthy(self) -> bool:
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval_seconds and self._lock.acquire(blocking=False):
+            try:
+                self._checked_at = now
+                self._check()
+            finally:
+                self._lock.release()
+        return self._healthy
+
+    def _check(self) -> None:
+        try:
+            lag = self._probe(self.engine)
+        except Exception as e:
+            logger.warning("Read replica unavailable, reading from the primary: %s", e)
+            self.lag_seconds = None
+            self._healthy = False
+            return
+        self.lag_seconds = lag
+        DB_REPLICA_LAG.labels().set(lag)
+        healthy = lag <= self.max_lag_seconds
+        if not healthy and self._healthy:
+            logger.warning("Read replica is %.1fs behind, reading from the primary", lag)
+        self._healthy = healthy
+
+    def mark_unhealthy(self) -> None:
+        self._healthy = False
+        self._checked_at = time.monotonic()
+
+
+class RoutingSession(Session):
+    """Session that sends replica-eligible reads to the read replica.
+
+    A statement uses the replica only when it is a plain SELECT issued inside
+    :func:`replica_reads`, the replica is healthy, and this session has not
+    written yet. The first flush or DML statement pins the session to the
+    primary, so a request always reads its own writes.
+    """
+
+    def __init__(self, *args, replica: Optional[ReplicaMonitor] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replica = replica
+        self.wrote = False
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        primary = super().get_bind(mapper, clause=clause, **kw)
+        if self._flushing or getattr(clause, "is_dml", False):
+            self.wrote = True
+            return primary
+        if self.replica is None or not _prefer_replica.get():
+            return primary
+        if (
+            self.wrote
+            or not getattr(clause, "is_select", False)
+            or getattr(clause, "_for_update_arg", None) is not None
+            or not self.replica.healthy()
+        ):
+            DB_READ_ROUTING.labels("primary").inc()
+            return primary
+        DB_READ_ROUTING.labels("replica").inc()
+        return self.replica.engine
+
+
+def session_like(db_session: Session) -> Session:
+    """A new session on the same engine(s) as ``db_session``, for work that outlives its request."""
+    if isinstance(db_session, RoutingSession):
+        return RoutingSession(bind=db_session.bind, replica=db_session.replica)
+    return Session(bind=db_session.bind)
+
+
+def _engine_options(url: str) -> dict:
+    # SQLite uses single-connection pools that do not take QueuePool sizing arguments
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    options = {"pool_timeout": DB_POOL_TIMEOUT_SECONDS}
+    if DB_POOL_SIZE is not None:
+        options["pool_size"] = DB_POOL_SIZE
+    if DB_MAX_OVERFLOW is not None:
+        options["max_overflow"] = DB_MAX_OVERFLOW
+    return options
+
+
+def _create_engine(url: str = DATABASE_URL, name: str = "primary") -> Engine:
+    engine = create_engine(url, **_engine_options(url))
+    instrument_engine(engine, name)
+    instrument_engine_tracing(engine)
+    install_slow_query_log(
+        engine, SLOW_QUERY_THRESHOLD_MS, explain=SLOW_QUERY_EXPLAIN, explain_per_minute=SLOW_QUERY_EXPLAIN_PER_MINUTE
+    )
+    return engine
+
+
+def _create_replica() -> Optional[ReplicaMonitor]:
+    if not READ_REPLICA_URL:
+        return None
+    replica = ReplicaMonitor(_create_engine(READ_REPLICA_URL, "replica"))
+
+    @event.listens_for(replica.engine, "handle_error")
+    def _replica_error(exception_context):
+        if exception_context.is_disconnect:
+            replica.mark_unhealthy()
+
+    return replica
+
+
+def get_engine() -> Engine:
+    """Return the application (primary) engine, creating it on first call."""
+    global _engine, _session_factory, _replica
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = _create_engine()
+                _replica = _create_replica()
+                _session_factory = sessionmaker(bind=engine, class_=RoutingSession, replica=_replica)
+                _engine = engine
+    return _engine
+
+
+def get_replica() -> Optional[ReplicaMonitor]:
+    """The read replica's monitor, or None when READ_REPLICA_URL is not set."""
+    get_engine()
+    return _replica
+
+
+def get_session_factory() -> sessionmaker:
+    get_engine()
+    return _session_factory
+
+
+def dispose_engine() -> None:
+    """Close pooled connections and forget the engine (used on shutdown)."""
+    global _engine, _session_factory, _replica
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+        if _replica is not None:
+            _replica.engine.dispose()
+        _engine = None
+        _session_factory = None
+        _replica = None
+
+
+def __getattr__(name: str):
+    # engine and SessionLocal used to be module globals; keep them reachable lazily
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        return get_session_factory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_db() -> Session:
-    session = scoped_session(sessionmaker(bind=engine))
+    session = get_session_factory()()
     try:
         yield session
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
@@ -1,13 +1,14 @@
 import uuid
 from datetime import datetime
-import sqlalchemy as sa
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import BigInteger, Column, String, Integer, DateTime, ForeignKey
 
 from .base import Base
+from .types import JSONBCompatible
 
 
 class Document(Base):
+    # On PostgreSQL migration 0007 hash-partitions this table on customer_id
+    # (primary key (id, customer_id)); SQLite keeps the plain table declared here.
     __tablename__ = "documents"
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), unique=True, nullable=False)
@@ -31,7 +32,35 @@ class Document(Base):
     virus_scan_status = Column(String, nullable=False)
     access_level = Column(String, nullable=False)
     # Use JSONB for Postgres and JSON for Sqlite
-    metadata_json = Column(JSONB().with_variant(sa.JSON(), "sqlite"), nullable=True)
+    metadata_json = Column(JSONBCompatible(), nullable=True)
 
     def __repr__(self) -> str:
         return f"<Document(id={self.id}, original_filename='{self.original_filename}')>"
+
+
+# file_type of the row holding a customer's totals across all file types
+TOTAL_USAGE_KEY = "*"
+
+
+class CustomerDocumentUsage(Base):
+    """Per-customer document counters, kept in step with ``documents`` by DocumentService.
+
+    Each customer has a totals row (``file_type == TOTAL_USAGE_KEY``) and one
+    row per file type. Uploads and deletes adjust both in the same transaction
+    as the document row, so usage and quota checks never scan ``documents``.
+    """
+
+    __tablename__ = "customer_document_usage"
+
+    customer_id = Column(
+        String(36),
+        ForeignKey('customers.id', name='fk_customer_document_usage_customer_id', use_alter=True),
+        primary_key=True,
+    )
+    file_type = Column(String, primary_key=True)
+    document_count = Column(Integer, nullable=False, default=0)
+    total_bytes = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<CustomerDocumentUsage(customer_id={self.customer_id}, file_type={self.file_type})>"
@@ -1,28 +1,20 @@
 import uuid
 from datetime import datetime, date
 
-from sqlalchemy import Column, String, Date, DateTime, Integer, Float, JSON as SA_JSON
-from sqlalchemy.dialects import postgresql
-from sqlalchemy.types import TypeDecorator
+from sqlalchemy import Column, String, Date, DateTime, Index, Integer, Float
 
 from .base import Base
+from .types import JSONBCompatible
 
-
-class JSONBCompatible(TypeDecorator):
-    """Dialect-aware JSONB type: use PostgreSQL JSONB when available, otherwise JSON.
-
-    This ensures compatibility with both PostgreSQL and SQLite.
-    """
-    impl = SA_JSON
-
-    def load_dialect_impl(self, dialect):
-        if dialect.name == "postgresql":
-            return dialect.type_descriptor(postgresql.JSONB())
-        return dialect.type_descriptor(SA_JSON())
+# On PostgreSQL migration 0007 partitions the four *_metrics tables by month of
+# start_date (primary key (id, start_date)); crm_svc.partitions creates the
+# upcoming months. SQLite keeps the plain tables declared here.
 
 
 class SalesPerformanceMetrics(Base):
     __tablename__ = "sales_performance_metrics"
+    # one row per reporting range; bulk ingestion upserts on this key
+    __table_args__ = (Index("uq_sales_performance_metrics_range", "start_date", "end_date", unique=True),)
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), unique=True, nullable=False)
     start_date = Column(Date, nullable=False)
@@ -38,6 +30,8 @@ class SalesPerformanceMetrics(Base):
 
 class TeamProductivityMetrics(Base):
     __tablename__ = "team_productivity_metrics"
+    # one row per reporting range; bulk ingestion upserts on this key
+    __table_args__ = (Index("uq_team_productivity_metrics_range", "start_date", "end_date", unique=True),)
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), unique=True, nullable=False)
     start_date = Column(Date, nullable=False)
@@ -53,6 +47,8 @@ class TeamProductivityMetrics(Base):
 
 class CustomerInteractionMetrics(Base):
     __tablename__ = "customer_interaction_metrics"
+    # one row per reporting range; bulk ingestion upserts on this key
+    __table_args__ = (Index("uq_customer_interaction_metrics_range", "start_date", "end_date", unique=True),)
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), unique=True, nullable=False)
     start_date = Column(Date, nullable=False)
@@ -67,6 +63,8 @@ class CustomerInteractionMetrics(Base):
 
 class PipelineAnalyticsMetrics(Base):
     __tablename__ = "pipeline_analytics_metrics"
+    # one row per reporting range; bulk ingestion upserts on this key
+    __table_args__ = (Index("uq_pipeline_analytics_metrics_range", "start_date", "end_date", unique=True),)
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), unique=True, nullable=False)
     start_date = Column(Date, nullable=False)
@@ -77,3 +75,25 @@ class PipelineAnalyticsMetrics(Base):
 
     def __repr__(self) -> str:
         return f"<PipelineAnalyticsMetrics(id={self.id}, stages={self.stage_conversion_rates})>"
+
+
+class PipelineStageMetrics(Base):
+    """Per-day, per-stage pipeline counts; funnels and stage velocity are aggregated in SQL."""
+
+    __tablename__ = "pipeline_stage_metrics"
+    # (day, stage) serves both range scans and the upsert key
+    __table_args__ = (Index("uq_pipeline_stage_metrics_day_stage", "day", "stage", unique=True),)
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), unique=True, nullable=False)
+    day = Column(Date, nullable=False)
+    stage = Column(String(64), nullable=False)
+    # position in the funnel, lowest first
+    stage_order = Column(Integer, nullable=False)
+    entered = Column(Integer, nullable=False, default=0)
+    converted = Column(Integer, nullable=False, default=0)
+    # total days spent in the stage by the deals converted that day
+    days_in_stage = Column(Float, nullable=False, default=0.0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<PipelineStageMetrics(day={self.day}, stage={self.stage}, entered={self.entered})>"
@@ -0,0 +1,19 @@
+from sqlalchemy import JSON as SA_JSON
+from sqlalchemy.types import TypeDecorator
+
+
+class JSONBCompatible(TypeDecorator):
+    """Dialect-aware JSONB type: use PostgreSQL JSONB when available, otherwise JSON.
+
+    This ensures compatibility with both PostgreSQL and SQLite. The PostgreSQL
+    dialect is only imported when a PostgreSQL connection actually needs it.
+    """
+    impl = SA_JSON
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            from sqlalchemy.dialects import postgresql
+
+            return dialect.type_descriptor(postgresql.JSONB())
+        return dialect.type_descriptor(SA_JSON())
@@ -0,0 +1,182 @@
+"""Partition maintenance for the PostgreSQL metric tables.
+
+Migration ``0007_partition_large_tables`` turns the metric tables into tables
+partitioned by month of ``start_date`` (``<table>_pYYYY_MM``, plus a
+``<table>_default`` partition catching anything without a month partition)
+and ``documents`` into 16 hash partitions on ``customer_id``. Hash partitions
+are fixed; month partitions have to keep appearing, which is what this module
+does. Run it from cron (daily is plenty):
+
+    crm_svc-partitions                  # current month + METRIC_PARTITION_MONTHS_AHEAD
+    crm_svc-partitions --months-ahead 6
+    crm_svc-partitions --from 2024-01-01  # also every past month since then (backfills)
+
+Creating a partition is idempotent. Rows that already landed in the default
+partition for a month are moved into that month's new partition. On SQLite,
+or on a database where the migration has not run, it does nothing.
+"""
+import argparse
+import json
+import logging
+import sys
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, Engine
+
+from crm_svc.config import METRIC_PARTITION_MONTHS_AHEAD
+
+logger = logging.getLogger(__name__)
+
+# metric tables partitioned by RANGE (start_date), one partition per month
+MONTHLY_TABLES = (
+    "sales_performance_metrics",
+    "team_productivity_metrics",
+    "customer_interaction_metrics",
+    "pipeline_analytics_metrics",
+)
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+
+def missing_months(
+    table: str, existing: Iterable[str], today: date, months_ahead: int, since: Optional[date] = None
+) -> List[date]:
+    """Months without a partition, from ``since``'s (default ``today``'s) through ``months_ahead`` after ``today``'s."""
+    existing = set(existing)
+    current = month_start(today)
+    first = min(month_start(since), current) if since else current
+    count = (current.year - first.year) * 12 + current.month - first.month + months_ahead + 1
+    months = (add_months(first, n) for n in range(count))
+    return [month for month in months if partition_name(table, month) not in existing]
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    return bool(
+        conn.execute(
+            text(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = :table AND pg_table_is_visible(c.oid))"
+            ),
+            {"table": table},
+        ).scalar()
+    )
+
+
+def list_partitions(conn: Connection, table: str) -> List[str]:
+    return list(
+        conn.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = :table AND pg_table_is_visible(p.oid)"
+            ),
+            {"table": table},
+        ).scalars()
+    )
+
+
+def create_month_partition(conn: Connection, table: str, month: date) -> None:
+    """Create ``table``'s partition for ``month``, moving its rows out of the default partition."""
+    name = partition_name(table, month)
+    lo, hi = month, add_months(month, 1)
+    default = f"{table}_default"
+    create = f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} FOR VALUES FROM ('{lo}') TO ('{hi}')"
+    in_month = {"lo": lo, "hi": hi}
+    stranded = conn.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE start_date >= :lo AND start_date < :hi)"), in_month
+    ).scalar()
+    if not stranded:
+        conn.exec_driver_sql(create)
+        return
+    # PostgreSQL refuses a new partition whose rows sit in the default one; move them across
+    logger.info("Moving %s rows for %s out of %s", table, lo, default)
+    conn.exec_driver_sql(f"ALTER TABLE {table} DETACH PARTITION {default}")
+    conn.exec_driver_sql(create)
+    conn.execute(text(f"INSERT INTO {table} SELECT * FROM {default} WHERE start_date >= :lo AND start_date < :hi"), in_month)
+    conn.execute(text(f"DELETE FROM {default} WHERE start_date >= :lo AND start_date < :hi"), in_month)
+    conn.exec_driver_sql(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT")
+
+
+def ensure_partitions(
+    conn: Connection, table: str, today: date, months_ahead: int, since: Optional[date] = None
+) -> List[date]:
+    """Create ``table``'s missing month partitions (see :func:`missing_months`); returns their months."""
+    months = missing_months(table, list_partitions(conn, table), today, months_ahead, since)
+    for month in months:
+        create_month_partition(conn, table, month)
+    return months
+
+
+def roll_forward(
+    engine: Engine,
+    today: Optional[date] = None,
+    months_ahead: int = METRIC_PARTITION_MONTHS_AHEAD,
+    since: Optional[date] = None,
+) -> Dict[str, List[str]]:
+    """Create the month partitions each metric table is missing; returns the names created per table.
+
+    ``since`` also covers the past months back to its own, e.g. before backfilling
+    history that would otherwise pile up in the default partition.
+    """
+    if engine.dialect.name != "postgresql":
+        return {}
+    if months_ahead < 0:
+        raise ValueError("months_ahead must not be negative")
+    today = today or date.today()
+    created: Dict[str, List[str]] = {}
+    for table in MONTHLY_TABLES:
+        # one transaction per table keeps the parent's lock short
+        with engine.begin() as conn:
+            if not is_partitioned(conn, table):
+                logger.warning("%s is not partitioned; run the migrations first", table)
+                continue
+            months = ensure_partitions(conn, table, today, months_ahead, since)
+        if months:
+            created[table] = [partition_name(table, month) for month in months]
+            logger.info("Created %s", ", ".join(created[table]))
+    return created
+
+
+def main(argv: List[str] = None) -> int:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Create upcoming monthly partitions of the metric tables")
+    parser.add_argument("--months-ahead", type=int, default=METRIC_PARTITION_MONTHS_AHEAD)
+    parser.add_argument(
+        "--from", dest="since", type=date.fromisoformat, default=None,
+        help="also create past month partitions back to this date (YYYY-MM-DD)",
+    )
+    parser.add_argument("--database-url", default=None, help="defaults to DATABASE_URL")
+    args = parser.parse_args(argv)
+
+    if args.database_url:
+        engine = create_engine(args.database_url)
+    else:
+        from crm_svc.models.base import get_engine
+
+        engine = get_engine()
+    try:
+        created = roll_forward(engine, months_ahead=args.months_ahead, since=args.since)
+    except ValueError as e:
+        logger.error(e)
+        return 1
+    finally:
+        engine.dispose()
+    print(json.dumps(created))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
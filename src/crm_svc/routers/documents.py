@@ -0,0 +1,22 @@
+import logging
+from typing import Any
+from uuid import UUID
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from crm_svc.models.base import get_db
+from crm_svc.schemas.document import CustomerUsageResponse
+from crm_svc.services.document_service import DocumentService
+from crm_svc.utils.responses import model_response
+
+logger = logging.getLogger(__name__)
+
+documents_router = APIRouter()
+
+
+@documents_router.get("/customers/{customer_id}/usage", response_model=CustomerUsageResponse)
+def get_customer_usage(customer_id: UUID, db_session: Session = Depends(get_db)) -> Any:
+    """Document count and storage for a customer, read from its counter rows."""
+    service = DocumentService()
+    return model_response(service.get_customer_usage(db_session, customer_id))
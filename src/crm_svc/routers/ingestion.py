@@ -0,0 +1,101 @@
+import logging
+from typing import Any, List
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.orm import Session
+
+from crm_svc.config import INGEST_MAX_BYTES, INGEST_MAX_ROWS
+from crm_svc.models.base import get_db
+from crm_svc.schemas.report import IngestionResponse, ReportTypeFilter
+from crm_svc.services.ingestion_service import MetricIngestionService, get_row_adapter
+from crm_svc.utils.responses import model_response
+
+logger = logging.getLogger(__name__)
+
+ingestion_router = APIRouter()
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+def parse_rows(report: str, body: bytes, content_type: str) -> List[BaseModel]:
+    """Validate a request body into row models for ``report``.
+
+    Accepts a JSON array of rows, an object ``{"rows": [...]}``, or NDJSON
+    (one row per line). NDJSON lines are joined into a single array so the
+    whole payload is validated by pydantic-core in one call.
+    """
+    adapter = get_row_adapter(report)
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type in NDJSON_MEDIA_TYPES:
+        lines = [line.strip() for line in body.splitlines()]
+        return adapter.validate_json(b"[" + b",".join(line for line in lines if line) + b"]")
+    if body.lstrip()[:1] == b"{":
+        payload = orjson.loads(body)
+        return adapter.validate_python(payload.get("rows"))
+    return adapter.validate_json(body)
+
+
+def _too_large(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+
+
+async def read_body(request: Request, max_bytes: int) -> bytes:
+    """Read the request body, rejecting it with 413 as soon as it exceeds ``max_bytes``.
+
+    A declared Content-Length is checked before anything is read; chunked
+    bodies are counted as they arrive.
+    """
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > max_bytes:
+        raise _too_large(f"Request body exceeds {max_bytes} bytes")
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise _too_large(f"Request body exceeds {max_bytes} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@ingestion_router.post("/ingest/{report}", response_model=IngestionResponse)
+async def ingest_metrics(report: ReportTypeFilter, request: Request, db_session: Session = Depends(get_db)) -> Any:
+    """Bulk upsert metric rows; re-sending the same batch is safe."""
+    body = await read_body(request, INGEST_MAX_BYTES)
+    try:
+        # validating tens of thousands of rows is CPU-bound; keep it off the event loop
+        rows = await run_in_threadpool(parse_rows, report.value, body, request.headers.get("content-type", ""))
+    except ValidationError as e:
+        logger.error(e, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=e.errors(include_url=False, include_context=False),
+        )
+    except orjson.JSONDecodeError as e:
+        logger.error(e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Invalid JSON: {e}")
+    if len(rows) > INGEST_MAX_ROWS:
+        raise _too_large(f"At most {INGEST_MAX_ROWS} rows per request; got {len(rows)}")
+
+    service = MetricIngestionService()
+    try:
+        # the upsert batches block; keep them off the event loop
+        result = await run_in_threadpool(service.ingest, db_session, report.value, rows)
+    except ValueError as e:
+        logger.error(e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+    return model_response(
+        IngestionResponse(
+            report=report,
+            received=result.received,
+            written=result.written,
+            batches=result.batches,
+            duration_ms=round(result.seconds * 1000, 3),
+            rows_per_second=round(result.rows_per_second, 1),
+        )
+    )
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from datetime import date
+from typing import AsyncIterator, Optional, Set
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from crm_svc.routers.reports import _parse_date_range
+from crm_svc.schemas.report import DateRangeQuery
+from crm_svc.utils.events import TABLE_REPORTS, bus
+
+logger = logging.getLogger(__name__)
+
+live_router = APIRouter()
+
+HEARTBEAT_SECONDS = 15.0
+# clients reconnect this many milliseconds after the stream drops
+RECONNECT_MS = 1000
+
+
+def format_sse(event: str, data, event_id: Optional[int] = None) -> bytes:
+    """Encode one Server-Sent Event; ``data`` is serialized as a single JSON line."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: ".encode("utf-8") + orjson.dumps(data) + b"\n\n"
+
+
+async def metric_event_stream(
+    start_date: date,
+    end_date: date,
+    reports: Optional[Set[str]] = None,
+    heartbeat_seconds: float = HEARTBEAT_SECONDS,
+) -> AsyncIterator[bytes]:
+    """Yield metric change batches overlapping the range until the client disconnects.
+
+    The bus subscription is taken when the body starts and dropped when it
+    ends, so a client that goes away before that leaves nothing subscribed.
+    Batches that are already queued are merged into one event, so a burst of
+    commits costs the client a single message. Comment lines keep idle
+    connections open through proxies.
+    """
+    sub = bus.subscribe(start_date, end_date, reports)
+    try:
+        yield f"retry: {RECONNECT_MS}\n: connected\n\n".encode("utf-8")
+        while True:
+            try:
+                batch = await asyncio.wait_for(sub.queue.get(), timeout=heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            while not sub.queue.empty():
+                batch = batch + sub.queue.get_nowait()
+            if sub.needs_resync:
+                # deltas were dropped; the client must refetch its reports
+                sub.needs_resync = False
+                yield format_sse("resync", {}, bus.next_sequence())
+                continue
+            yield format_sse("metrics", [change.to_dict() for change in batch], bus.next_sequence())
+    finally:
+        bus.unsubscribe(sub)
+
+
+@live_router.get("/live/metrics")
+async def stream_metric_changes(
+    date_range: DateRangeQuery = Depends(_parse_date_range),
+    reports: Optional[str] = Query(None, description="Comma separated report keys; all reports when omitted"),
+) -> StreamingResponse:
+    """Push metric row changes overlapping the date range as Server-Sent Events."""
+    selected = None
+    if reports:
+        selected = {r.strip() for r in reports.split(",") if r.strip()}
+        unknown = selected - set(TABLE_REPORTS.values())
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Unknown reports: {sorted(unknown)}"
+            )
+    return StreamingResponse(
+        metric_event_stream(date_range.start_date, date_range.end_date, selected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from crm_svc.utils.metrics import CONTENT_TYPE_LATEST, REGISTRY
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+def get_metrics() -> Response:
+    """Expose process metrics in the Prometheus text exposition format."""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE_LATEST)
@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
 from sqlalchemy.orm import Session
 import base64
 import logging
-from typing import Any
+from typing import Any, Dict
 from datetime import date
 
 from crm_svc.models.base import get_db
@@ -13,9 +13,14 @@ from crm_svc.schemas.report import (
     TeamProductivityResponse,
     CustomerInteractionResponse,
     PipelineAnalyticsResponse,
+    PipelineFunnelResponse,
     ReportExportResponse,
+    DownsampleMethod,
+    SalesSeriesResponse,
 )
+from crm_svc.services.report_cache import served_age
 from crm_svc.services.report_service import ReportService
+from crm_svc.utils.responses import conditional_model_response, model_response
 
 logger = logging.getLogger(__name__)
 
@@ -39,14 +44,45 @@ def _parse_date_range(
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
 
 
+def _age_headers() -> Dict[str, str]:
+    """``Age``: seconds since the served report was computed (0 when computed for this request)."""
+    age = served_age()
+    return {"Age": str(int(age))} if age is not None else {}
+
+
 @reports_router.get("/sales-performance", response_model=SalesPerformanceResponse)
 def get_sales_performance(
-    date_range: DateRangeQuery = Depends(_parse_date_range), db_session: Session = Depends(get_db)
+    request: Request,
+    date_range: DateRangeQuery = Depends(_parse_date_range),
+    db_session: Session = Depends(get_db),
 ) -> Any:
     service = ReportService()
     try:
         resp = service.get_sales_performance(db_session, date_range.start_date, date_range.end_date)
-        return resp
+        return conditional_model_response(request, resp, headers=_age_headers())
+    except ValueError as e:
+        logger.error(e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+
+
+@reports_router.get("/sales-performance/series", response_model=SalesSeriesResponse)
+def get_sales_series(
+    request: Request,
+    date_range: DateRangeQuery = Depends(_parse_date_range),
+    target: int = Query(500, ge=3, le=5000, description="Maximum number of points to return"),
+    method: DownsampleMethod = Query(DownsampleMethod.LTTB),
+    db_session: Session = Depends(get_db),
+) -> Any:
+    """Daily revenue downsampled server side so long ranges stay cheap to chart."""
+    service = ReportService()
+    try:
+        resp = service.get_sales_series(
+            db_session, date_range.start_date, date_range.end_date, target, method.value
+        )
+        return conditional_model_response(request, resp, headers=_age_headers())
     except ValueError as e:
         logger.error(e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -57,12 +93,14 @@ def get_sales_performance(
 
 @reports_router.get("/team-productivity", response_model=TeamProductivityResponse)
 def get_team_productivity(
-    date_range: DateRangeQuery = Depends(_parse_date_range), db_session: Session = Depends(get_db)
+    request: Request,
+    date_range: DateRangeQuery = Depends(_parse_date_range),
+    db_session: Session = Depends(get_db),
 ) -> Any:
     service = ReportService()
     try:
         resp = service.get_team_productivity(db_session, date_range.start_date, date_range.end_date)
-        return resp
+        return conditional_model_response(request, resp, headers=_age_headers())
     except ValueError as e:
         logger.error(e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -73,12 +111,14 @@ def get_team_productivity(
 
 @reports_router.get("/customer-interaction", response_model=CustomerInteractionResponse)
 def get_customer_interaction(
-    date_range: DateRangeQuery = Depends(_parse_date_range), db_session: Session = Depends(get_db)
+    request: Request,
+    date_range: DateRangeQuery = Depends(_parse_date_range),
+    db_session: Session = Depends(get_db),
 ) -> Any:
     service = ReportService()
     try:
         resp = service.get_customer_interaction(db_session, date_range.start_date, date_range.end_date)
-        return resp
+        return conditional_model_response(request, resp, headers=_age_headers())
     except ValueError as e:
         logger.error(e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -89,12 +129,33 @@ def get_customer_interaction(
 
 @reports_router.get("/pipeline-analytics", response_model=PipelineAnalyticsResponse)
 def get_pipeline_analytics(
-    date_range: DateRangeQuery = Depends(_parse_date_range), db_session: Session = Depends(get_db)
+    request: Request,
+    date_range: DateRangeQuery = Depends(_parse_date_range),
+    db_session: Session = Depends(get_db),
 ) -> Any:
     service = ReportService()
     try:
         resp = service.get_pipeline_analytics(db_session, date_range.start_date, date_range.end_date)
-        return resp
+        return conditional_model_response(request, resp, headers=_age_headers())
+    except ValueError as e:
+        logger.error(e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+
+
+@reports_router.get("/pipeline-analytics/funnel", response_model=PipelineFunnelResponse)
+def get_pipeline_funnel(
+    request: Request,
+    date_range: DateRangeQuery = Depends(_parse_date_range),
+    db_session: Session = Depends(get_db),
+) -> Any:
+    """Per-stage entered/converted totals, conversion rates and velocity for the range."""
+    service = ReportService()
+    try:
+        resp = service.get_pipeline_funnel(db_session, date_range.start_date, date_range.end_date)
+        return conditional_model_response(request, resp, headers=_age_headers())
     except ValueError as e:
         logger.error(e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -141,7 +202,7 @@ def export_report(
 
         b64 = base64.b64encode(csv_text.encode("utf-8")).decode("utf-8")
         filename = f"report_{report_type.value}.csv"
-        return ReportExportResponse(filename=filename, content_type="text/csv", data_b64=b64)
+        return model_response(ReportExportResponse(filename=filename, content_type="text/csv", data_b64=b64))
     except ValueError as e:
         logger.error(e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -1,4 +1,4 @@
-from .document import DocumentCreate, DocumentResponse, VirusScanStatus
+from .document import CustomerUsageResponse, DocumentCreate, DocumentResponse, VirusScanStatus
 from .report import (
     DateRangeQuery,
     ReportTypeFilter,
@@ -6,10 +6,16 @@ from .report import (
     TeamProductivityResponse,
     CustomerInteractionResponse,
     PipelineAnalyticsResponse,
+    PipelineStageFunnel,
+    PipelineFunnelResponse,
     ReportExportResponse,
+    DownsampleMethod,
+    SalesSeriesResponse,
+    IngestionResponse,
 )
 
 __all__ = [
+    "CustomerUsageResponse",
     "DocumentCreate",
     "DocumentResponse",
     "VirusScanStatus",
@@ -19,5 +25,10 @@ __all__ = [
     "TeamProductivityResponse",
     "CustomerInteractionResponse",
     "PipelineAnalyticsResponse",
+    "PipelineStageFunnel",
+    "PipelineFunnelResponse",
     "ReportExportResponse",
+    "DownsampleMethod",
+    "SalesSeriesResponse",
+    "IngestionResponse",
 ]
@@ -34,3 +34,14 @@ class DocumentResponse(BaseModel):
     metadata: Optional[Dict] = Field(default=None, alias="metadata_json")
 
     model_config = {"from_attributes": True}
+
+
+class CustomerUsageResponse(BaseModel):
+    customer_id: str
+    document_count: int
+    total_bytes: int
+    documents_by_file_type: Dict[str, int]
+    bytes_by_file_type: Dict[str, int]
+    # configured quotas; None means unlimited
+    max_documents: Optional[int] = None
+    max_bytes: Optional[int] = None
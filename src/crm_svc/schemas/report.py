@@ -1,7 +1,7 @@
 from __future__ import annotations
 from datetime import date
 from enum import Enum
-from typing import Dict
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field, model_validator
 
@@ -53,6 +53,53 @@ class PipelineAnalyticsResponse(BaseModel):
     stage_conversion_rates: Dict[str, float]
 
 
+class PipelineStageFunnel(BaseModel):
+    stage: str
+    entered: int
+    converted: int
+    # converted / entered for this stage
+    conversion_rate: float
+    # entered at this stage / entered at the top of the funnel
+    funnel_rate: float
+    # mean days a converted deal spent in the stage; None when nothing converted
+    avg_days_in_stage: Optional[float] = None
+
+
+class PipelineFunnelResponse(BaseModel):
+    start_date: date
+    end_date: date
+    stages: List[PipelineStageFunnel]
+
+
+class DownsampleMethod(str, Enum):
+    LTTB = "lttb"
+    MINMAX = "minmax"
+
+
+class SalesSeriesResponse(BaseModel):
+    """Daily revenue for a date range, downsampled to at most ``target`` points.
+
+    Columnar so a chart can use ``dates``/``revenue`` directly as x/y.
+    """
+
+    start_date: date
+    end_date: date
+    method: DownsampleMethod
+    target: int
+    source_points: int
+    dates: List[date]
+    revenue: List[float]
+
+
+class IngestionResponse(BaseModel):
+    report: ReportTypeFilter
+    received: int
+    written: int
+    batches: int
+    duration_ms: float
+    rows_per_second: float
+
+
 class ReportExportResponse(BaseModel):
     filename: str
     content_type: str
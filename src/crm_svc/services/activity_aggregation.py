@@ -0,0 +1,206 @@
+"""Report metrics computed from the raw activity log.
+
+Events in a date range are read through a streaming cursor in batches of
+``SCAN_BATCH_SIZE`` rows. Each batch is loaded into one typed (structured)
+NumPy array, and each report folds the batches into a handful of running
+totals with vectorized reductions. Memory is bounded by the batch size,
+however many events the range holds.
+
+Per-row Python work is what limits the scan, so it is kept to a minimum:
+
+- the query runs on the Core connection, skipping ORM row loading;
+- flags (won deal, new deal) arrive from the database as 0/1 integers;
+- timestamps arrive as day offsets from the range start, never as datetime
+  objects;
+- distinct counts (active user-days) are left to the database.
+
+The hot loops therefore never parse dates or compare Python strings.
+"""
+import logging
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import Date, Integer, case, cast, func, literal, select
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+SCAN_BATCH_SIZE = 100_000
+
+
+def _bounds(start_date: date, end_date: date) -> Tuple[datetime, datetime]:
+    # whole days: [start 00:00, end + 1 day 00:00)
+    return datetime.combine(start_date, time.min), datetime.combine(end_date + timedelta(days=1), time.min)
+
+
+def flag(condition) -> Any:
+    """A 0/1 integer column for ``condition`` (NULL counts as 0)."""
+    return case((condition, 1), else_=0)
+
+
+def day_offset(dialect_name: str, column, start_date: date) -> Any:
+    """Whole days between ``start_date`` and the timestamp ``column``, computed by the database."""
+    if dialect_name == "sqlite":
+        return cast(func.julianday(func.date(column)) - func.julianday(literal(start_date.isoformat())), Integer)
+    # PostgreSQL: date - date is an integer number of days
+    return cast(column, Date) - literal(start_date, Date)
+
+
+def scan_events(
+    db_session: Session,
+    columns: Dict[str, Tuple[Any, Any]],
+    start_date: date,
+    end_date: date,
+    kinds: Optional[Iterable[int]] = None,
+    batch_size: int = SCAN_BATCH_SIZE,
+) -> Iterator[Dict[str, np.ndarray]]:
+    """Yield batches of events in the range as ``{name: array}``.
+
+    ``columns`` maps an output name to ``(column expression, dtype)``. NULLs
+    become NaN in float columns. The arrays are fields of one structured
+    array per batch, filled by ``np.fromiter`` without a Python transpose.
+    """
+    from crm_svc.models import ActivityEvent
+
+    lo, hi = _bounds(start_date, end_date)
+    names = list(columns)
+    stmt = select(*(columns[name][0] for name in names)).where(
+        ActivityEvent.occurred_at >= lo, ActivityEvent.occurred_at < hi
+    )
+    if kinds is not None:
+        stmt = stmt.where(ActivityEvent.kind.in_([int(k) for k in kinds]))
+    # bind by statement so a routing session may serve the scan from the read replica
+    conn = db_session.connection(bind_arguments={"clause": stmt})
+    result = conn.execute(stmt.execution_options(yield_per=batch_size))
+    dtype = np.dtype([(name, columns[name][1]) for name in names])
+    for rows in result.partitions():
+        batch = np.fromiter(map(tuple, rows), dtype=dtype, count=len(rows))
+        yield {name: batch[name] for name in names}
+
+
+class ActivityAggregator:
+    """Computes each report's fields from activity events; ``None`` when the range has none."""
+
+    def __init__(self, batch_size: int = SCAN_BATCH_SIZE):
+        self.batch_size = batch_size
+
+    def _scan(self, db_session, columns, start_date, end_date, kinds=None) -> Iterator[Dict[str, np.ndarray]]:
+        return scan_events(db_session, columns, start_date, end_date, kinds, self.batch_size)
+
+    def sales(self, db_session: Session, start_date: date, end_date: date) -> Optional[Dict[str, float]]:
+        """Revenue of won deals, won / created deals, and won revenue per day."""
+        from crm_svc.models import ActivityEvent, ActivityKind
+        from crm_svc.models.activity import WON_STAGE
+
+        columns = {
+            "won": (flag(ActivityEvent.stage == WON_STAGE), bool),
+            "created": (flag(ActivityEvent.from_stage.is_(None)), bool),
+            "amount": (ActivityEvent.amount, np.float64),
+        }
+        events = won = created = 0
+        revenue = 0.0
+        for batch in self._scan(db_session, columns, start_date, end_date, [ActivityKind.STAGE_CHANGE]):
+            events += len(batch["won"])
+            won += int(np.count_nonzero(batch["won"]))
+            created += int(np.count_nonzero(batch["created"]))
+            revenue += float(np.nansum(batch["amount"][batch["won"]]))
+        if not events:
+            return None
+        days = (end_date - start_date).days + 1
+        return {
+            "revenue": round(revenue, 2),
+            # deals won in the range may have been created before it; cap the ratio
+            "conversion_rate": min(1.0, won / created) if created else 0.0,
+            "pipeline_velocity": round(revenue / days, 4),
+        }
+
+    def team(self, db_session: Session, start_date: date, end_date: date) -> Optional[Dict[str, Any]]:
+        """Interactions logged, deals won, and the share of days each active user logged anything."""
+        from crm_svc.models import ActivityEvent, ActivityKind
+        from crm_svc.models.activity import INTERACTION_KINDS, WON_STAGE
+
+        columns = {
+            "kind": (ActivityEvent.kind, np.int16),
+            "won": (flag(ActivityEvent.stage == WON_STAGE), bool),
+        }
+        interaction_kinds = [int(k) for k in INTERACTION_KINDS]
+        events = tasks = deals = 0
+        for batch in self._scan(db_session, columns, start_date, end_date):
+            events += len(batch["kind"])
+            tasks += int(np.count_nonzero(np.isin(batch["kind"], interaction_kinds)))
+            deals += int(np.count_nonzero((batch["kind"] == ActivityKind.STAGE_CHANGE) & batch["won"]))
+        if not events:
+            return None
+        active_days, users = self._active_user_days(db_session, start_date, end_date, interaction_kinds)
+        days = (end_date - start_date).days + 1
+        return {
+            "tasks_completed": tasks,
+            "deals_closed": deals,
+            "activity_level": round(active_days / (users * days), 4) if users else 0.0,
+        }
+
+    @staticmethod
+    def _active_user_days(db_session: Session, start_date: date, end_date: date, kinds) -> Tuple[int, int]:
+        """(distinct (user, day) pairs with an interaction, distinct users), counted by the database."""
+        from crm_svc.models import ActivityEvent
+
+        lo, hi = _bounds(start_date, end_date)
+        dialect_name = db_session.get_bind().dialect.name
+        pairs = (
+            select(ActivityEvent.user_id, day_offset(dialect_name, ActivityEvent.occurred_at, start_date).label("day"))
+            .where(ActivityEvent.occurred_at >= lo, ActivityEvent.occurred_at < hi, ActivityEvent.kind.in_(kinds))
+            .distinct()
+            .subquery()
+        )
+        stmt = select(func.count(), func.count(pairs.c.user_id.distinct())).select_from(pairs)
+        conn = db_session.connection(bind_arguments={"clause": stmt})
+        active_days, users = conn.execute(stmt).one()
+        return active_days, users
+
+    def customer(self, db_session: Session, start_date: date, end_date: date) -> Optional[Dict[str, Any]]:
+        """Interactions with customers and their mean engagement score."""
+        from crm_svc.models import ActivityEvent
+        from crm_svc.models.activity import INTERACTION_KINDS
+
+        columns = {"engagement": (ActivityEvent.engagement, np.float64)}
+        interactions = scored = 0
+        total = 0.0
+        for batch in self._scan(db_session, columns, start_date, end_date, INTERACTION_KINDS):
+            engagement = batch["engagement"]
+            interactions += len(engagement)
+            known = ~np.isnan(engagement)
+            scored += int(np.count_nonzero(known))
+            total += float(engagement[known].sum())
+        if not interactions:
+            return None
+        return {
+            "total_interactions": interactions,
+            "avg_engagement_score": round(total / scored, 4) if scored else 0.0,
+        }
+
+    def pipeline(self, db_session: Session, start_date: date, end_date: date) -> Optional[Dict[str, Any]]:
+        """Per-stage conversion: deals that left a stage / deals that entered it."""
+        from crm_svc.models import ActivityEvent, ActivityKind
+
+        columns = {"from_stage": (ActivityEvent.from_stage, object), "stage": (ActivityEvent.stage, object)}
+        entered: Counter = Counter()
+        converted: Counter = Counter()
+        events = 0
+        for batch in self._scan(db_session, columns, start_date, end_date, [ActivityKind.STAGE_CHANGE]):
+            events += len(batch["stage"])
+            # stage names are few and hashable; Counter tallies them in C
+            entered.update(batch["stage"].tolist())
+            converted.update(batch["from_stage"].tolist())
+        if not events:
+            return None
+        entered.pop(None, None)
+        return {
+            "stage_conversion_rates": {
+                stage: round(min(1.0, converted[stage] / count), 4) for stage, count in entered.items() if count
+            }
+        }
+
+
+activity_aggregator = ActivityAggregator()
@@ -1,12 +1,19 @@
 import logging
-from typing import List, Tuple, Optional
+import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple
 from uuid import UUID
 
 from fastapi import HTTPException, UploadFile
-from sqlalchemy import select
+from sqlalchemy import delete, exists, or_, select
 from sqlalchemy.orm import Session
 
-from crm_svc.schemas.document import DocumentResponse, VirusScanStatus
+from crm_svc import config
+from crm_svc.models.base import reads_from_replica
+from crm_svc.schemas.document import CustomerUsageResponse, DocumentResponse, VirusScanStatus
+from crm_svc.utils.cache import CacheBackend, get_cache_backend
+from crm_svc.utils.metrics import DOCUMENT_BYTES
+from crm_svc.utils.operations import track_operation
 from crm_svc.utils.file_storage import (
     _validate_file_size,
     _get_file_type,
@@ -18,6 +25,113 @@ from crm_svc.utils.file_storage import (
 logger = logging.getLogger(__name__)
 
 
+def _document_by_id(document_id: UUID, customer_id: Optional[UUID] = None):
+    """Select a document by id.
+
+    On PostgreSQL ``documents`` is hash-partitioned on customer_id; passing the
+    customer confines the lookup to a single partition instead of probing all.
+    """
+    from crm_svc.models import Document
+
+    stmt = select(Document).where(Document.id == str(document_id))
+    if customer_id is not None:
+        stmt = stmt.where(Document.customer_id == str(customer_id))
+    return stmt
+
+
+def _identity_taken(db: Session, document_id: str, stored_filename: str) -> bool:
+    """Whether any customer's document already has this id or stored file name.
+
+    On PostgreSQL the partitioned table only enforces uniqueness per customer
+    (migration 0007), so global uniqueness is checked here, probing every
+    partition once per upload.
+    """
+    from crm_svc.models import Document
+
+    taken = exists().where(or_(Document.id == document_id, Document.stored_filename == stored_filename))
+    return bool(db.execute(select(taken)).scalar())
+
+
+def _metadata_cache_key(document_id) -> str:
+    return f"document:{document_id}"
+
+
+def _metadata_ttl(backend: CacheBackend) -> float:
+    """Seconds to cache metadata; 0 disables the cache.
+
+    Deleting a document evicts its metadata only from ``backend``. With a
+    shared backend that is every worker. A memory backend lives in one worker,
+    so the others keep serving their copy until it expires; such copies are
+    kept for at most DOCUMENT_CACHE_LOCAL_TTL_SECONDS.
+    """
+    if backend.shared:
+        return config.DOCUMENT_CACHE_TTL_SECONDS
+    return min(config.DOCUMENT_CACHE_TTL_SECONDS, config.DOCUMENT_CACHE_LOCAL_TTL_SECONDS)
+
+
+def _usage_limits() -> Tuple[Optional[int], Optional[int]]:
+    """Configured (max documents, max bytes) per customer; None where unlimited."""
+    max_documents = config.CUSTOMER_MAX_DOCUMENTS if config.CUSTOMER_MAX_DOCUMENTS > 0 else None
+    max_bytes = int(config.CUSTOMER_MAX_STORAGE_MB * 1024 * 1024) if config.CUSTOMER_MAX_STORAGE_MB > 0 else None
+    return max_documents, max_bytes
+
+
+def _quota_error(document_count: int, total_bytes: int) -> Optional[str]:
+    max_documents, max_bytes = _usage_limits()
+    if max_documents is not None and document_count > max_documents:
+        return f"Document quota exceeded: at most {max_documents} documents per customer"
+    if max_bytes is not None and total_bytes > max_bytes:
+        return f"Storage quota exceeded: at most {config.CUSTOMER_MAX_STORAGE_MB:g} MB per customer"
+    return None
+
+
+def _customer_totals(db: Session, customer_id: str) -> Tuple[int, int]:
+    from crm_svc.models import CustomerDocumentUsage
+    from crm_svc.models.document import TOTAL_USAGE_KEY
+
+    row = db.execute(
+        select(CustomerDocumentUsage.document_count, CustomerDocumentUsage.total_bytes).where(
+            CustomerDocumentUsage.customer_id == customer_id,
+            CustomerDocumentUsage.file_type == TOTAL_USAGE_KEY,
+        )
+    ).one_or_none()
+    return (int(row[0]), int(row[1])) if row else (0, 0)
+
+
+def _apply_usage_delta(db: Session, customer_id: str, file_type: str, documents: int, size: int) -> None:
+    """Adjust the customer's totals and file-type counters in the current transaction.
+
+    The increment happens in the database (``count = count + n``), so
+    concurrent uploads never overwrite each other's update. The totals row is
+    always written first; it also serializes a customer's uploads for the
+    quota check.
+    """
+    from crm_svc.models import CustomerDocumentUsage as Usage
+    from crm_svc.models.document import TOTAL_USAGE_KEY
+
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"Usage counters are not supported on {dialect_name}")
+    now = datetime.utcnow()
+    for key in (TOTAL_USAGE_KEY, file_type):
+        stmt = insert(Usage).values(
+            customer_id=customer_id, file_type=key, document_count=documents, total_bytes=size, updated_at=now
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["customer_id", "file_type"],
+            set_={
+                "document_count": Usage.document_count + documents,
+                "total_bytes": Usage.total_bytes + size,
+                "updated_at": now,
+            },
+        )
+        db.execute(stmt)
+
+
 class DocumentService:
     """Service handling document operations."""
 
@@ -26,6 +140,7 @@ class DocumentService:
         # Placeholder: integrate real virus scanner here in future
         return VirusScanStatus.CLEAN
 
+    @track_operation("document.upload")
     def upload_document(
         self,
         db: Session,
@@ -55,6 +170,12 @@ class DocumentService:
         if scan_status == VirusScanStatus.INFECTED:
             raise HTTPException(status_code=400, detail="File infected by virus")
 
+        # cheap early rejection; the authoritative check runs after the counters are incremented
+        document_count, total_bytes = _customer_totals(db, str(customer_id))
+        quota_error = _quota_error(document_count + 1, total_bytes + len(file_content))
+        if quota_error:
+            raise HTTPException(status_code=403, detail=quota_error)
+
         try:
             stored_filename, file_path = _save_file_to_disk(file_content, file.filename, customer_id)
         except IOError as e:
@@ -65,7 +186,11 @@ class DocumentService:
         try:
             from crm_svc.models import Document
 
+            document_id = str(uuid.uuid4())
+            if _identity_taken(db, document_id, stored_filename):
+                raise HTTPException(status_code=409, detail="Document identifier already in use; retry the upload")
             doc = Document(
+                id=document_id,
                 customer_id=str(customer_id),
                 uploaded_by_user_id=str(uploaded_by_user_id),
                 original_filename=file.filename,
@@ -78,33 +203,62 @@ class DocumentService:
                 metadata_json=metadata,
             )
             db.add(doc)
+            _apply_usage_delta(db, str(customer_id), file_type, 1, len(file_content))
+            # the totals row is locked by this transaction, so concurrent uploads cannot both pass
+            quota_error = _quota_error(*_customer_totals(db, str(customer_id)))
+            if quota_error:
+                raise HTTPException(status_code=403, detail=quota_error)
             db.commit()
             db.refresh(doc)
+            DOCUMENT_BYTES.labels("upload", file_type).inc(len(file_content))
             return DocumentResponse.model_validate(doc)
+        except HTTPException:
+            self._discard_upload(db, file_path)
+            raise
         except Exception as e:
             logger.error(e, exc_info=True)
-            # attempt cleanup
-            try:
-                _delete_file_from_disk(file_path)
-            except Exception:
-                logger.error("Failed to cleanup saved file after DB error", exc_info=True)
+            self._discard_upload(db, file_path)
             raise HTTPException(status_code=500, detail="Failed to persist document metadata")
 
-    def get_document_metadata(self, db: Session, document_id: UUID) -> DocumentResponse:
-        from crm_svc.models import Document
+    @staticmethod
+    def _discard_upload(db: Session, file_path: str) -> None:
+        # undo the document row and counter updates, then remove the stored file
+        try:
+            db.rollback()
+        except Exception:
+            logger.error("Failed to rollback session", exc_info=True)
+        try:
+            _delete_file_from_disk(file_path)
+        except Exception:
+            logger.error("Failed to cleanup saved file after DB error", exc_info=True)
 
+    @track_operation("document.get_metadata")
+    @reads_from_replica
+    def get_document_metadata(self, db: Session, document_id: UUID, customer_id: Optional[UUID] = None) -> DocumentResponse:
+        """Served from the cache backend (see :func:`_metadata_ttl`); deleting the document evicts it."""
         try:
-            stmt = select(Document).where(Document.id == str(document_id))
-            result = db.execute(stmt).scalars().one_or_none()
+            cache, key = get_cache_backend(), _metadata_cache_key(document_id)
+            ttl = _metadata_ttl(cache)
+            cached = cache.get(key) if ttl > 0 else None
+            if cached is not None:
+                if customer_id is not None and cached.customer_id != str(customer_id):
+                    raise HTTPException(status_code=404, detail="Document not found")
+                return cached
+            result = db.execute(_document_by_id(document_id, customer_id)).scalars().one_or_none()
             if result is None:
                 raise HTTPException(status_code=404, detail="Document not found")
-            return DocumentResponse.model_validate(result)
+            response = DocumentResponse.model_validate(result)
+            if ttl > 0:
+                cache.set(key, response, ttl)
+            return response
         except HTTPException:
             raise
         except Exception as e:
             logger.error(e, exc_info=True)
             raise HTTPException(status_code=500, detail="Failed to fetch document metadata")
 
+    @track_operation("document.list")
+    @reads_from_replica
     def list_documents_for_customer(self, db: Session, customer_id: UUID) -> List[DocumentResponse]:
         from crm_svc.models import Document
 
@@ -116,15 +270,52 @@ class DocumentService:
             logger.error(e, exc_info=True)
             raise HTTPException(status_code=500, detail="Failed to list documents")
 
-    def download_document(self, db: Session, document_id: UUID) -> Tuple[bytes, str, str]:
-        from crm_svc.models import Document
+    @track_operation("document.usage")
+    @reads_from_replica
+    def get_customer_usage(self, db: Session, customer_id: UUID) -> CustomerUsageResponse:
+        """Read the customer's usage from the counter rows; never scans ``documents``."""
+        from crm_svc.models import CustomerDocumentUsage
+        from crm_svc.models.document import TOTAL_USAGE_KEY
+
+        try:
+            rows = db.execute(
+                select(
+                    CustomerDocumentUsage.file_type,
+                    CustomerDocumentUsage.document_count,
+                    CustomerDocumentUsage.total_bytes,
+                ).where(CustomerDocumentUsage.customer_id == str(customer_id))
+            ).all()
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            raise HTTPException(status_code=500, detail="Failed to fetch customer usage")
+        document_count, total_bytes = 0, 0
+        documents_by_file_type, bytes_by_file_type = {}, {}
+        for file_type, count, size in rows:
+            if file_type == TOTAL_USAGE_KEY:
+                document_count, total_bytes = int(count), int(size)
+            elif count:
+                documents_by_file_type[file_type] = int(count)
+                bytes_by_file_type[file_type] = int(size)
+        max_documents, max_bytes = _usage_limits()
+        return CustomerUsageResponse(
+            customer_id=str(customer_id),
+            document_count=document_count,
+            total_bytes=total_bytes,
+            documents_by_file_type=documents_by_file_type,
+            bytes_by_file_type=bytes_by_file_type,
+            max_documents=max_documents,
+            max_bytes=max_bytes,
+        )
 
+    @track_operation("document.download")
+    @reads_from_replica
+    def download_document(self, db: Session, document_id: UUID, customer_id: Optional[UUID] = None) -> Tuple[bytes, str, str]:
         try:
-            stmt = select(Document).where(Document.id == str(document_id))
-            result = db.execute(stmt).scalars().one_or_none()
+            result = db.execute(_document_by_id(document_id, customer_id)).scalars().one_or_none()
             if result is None:
                 raise HTTPException(status_code=404, detail="Document not found")
             content = _get_file_content(result.file_path)
+            DOCUMENT_BYTES.labels("download", result.file_type).inc(len(content))
             return content, result.original_filename, result.file_type
         except HTTPException:
             raise
@@ -135,12 +326,12 @@ class DocumentService:
             logger.error(e, exc_info=True)
             raise HTTPException(status_code=500, detail="Failed to download document")
 
-    def delete_document(self, db: Session, document_id: UUID) -> None:
+    @track_operation("document.delete")
+    def delete_document(self, db: Session, document_id: UUID, customer_id: Optional[UUID] = None) -> None:
         from crm_svc.models import Document
 
         try:
-            stmt = select(Document).where(Document.id == str(document_id))
-            result = db.execute(stmt).scalars().one_or_none()
+            result = db.execute(_document_by_id(document_id, customer_id)).scalars().one_or_none()
             if result is None:
                 raise HTTPException(status_code=404, detail="Document not found")
             try:
@@ -149,11 +340,16 @@ class DocumentService:
                 logger.error(e, exc_info=True)
                 raise HTTPException(status_code=500, detail="Failed to delete stored file")
             try:
-                db.delete(result)
+                # keyed on the partition column as well, so the DELETE touches one partition
+                db.execute(
+                    delete(Document).where(Document.id == result.id, Document.customer_id == result.customer_id)
+                )
+                _apply_usage_delta(db, result.customer_id, result.file_type, -1, -result.file_size)
                 db.commit()
             except Exception as e:
                 logger.error(e, exc_info=True)
                 raise HTTPException(status_code=500, detail="Failed to delete document record")
+            get_cache_backend().delete([_metadata_cache_key(result.id)])
         except HTTPException:
             raise
         except Exception as e:
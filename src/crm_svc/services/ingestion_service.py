@@ -0,0 +1,187 @@
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Sequence, Tuple, Type
+
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import JSON, cast, or_
+from sqlalchemy.orm import Session
+
+from crm_svc.utils.events import MetricChange, publish_changes
+from crm_svc.utils.metrics import INGEST_ROWS, INGEST_SECONDS
+from crm_svc.utils.operations import track_operation
+
+logger = logging.getLogger(__name__)
+
+# rows per INSERT statement; 1000 rows x 6 columns stays well below the bind
+# parameter limits of both SQLite (32766) and PostgreSQL (65535)
+INGEST_BATCH_SIZE = 1000
+
+
+class MetricTableSpec(NamedTuple):
+    model_name: str
+    row_schema_name: str
+    value_columns: Tuple[str, ...]
+
+
+# report key -> metric table; value columns are everything but the range, id and created_at
+METRIC_TABLES: Dict[str, MetricTableSpec] = {
+    "sales": MetricTableSpec(
+        "SalesPerformanceMetrics", "SalesPerformanceResponse", ("revenue", "conversion_rate", "pipeline_velocity")
+    ),
+    "team": MetricTableSpec(
+        "TeamProductivityMetrics", "TeamProductivityResponse", ("tasks_completed", "deals_closed", "activity_level")
+    ),
+    "customer": MetricTableSpec(
+        "CustomerInteractionMetrics", "CustomerInteractionResponse", ("total_interactions", "avg_engagement_score")
+    ),
+    "pipeline": MetricTableSpec("PipelineAnalyticsMetrics", "PipelineAnalyticsResponse", ("stage_conversion_rates",)),
+}
+
+_adapters: Dict[str, TypeAdapter] = {}
+
+
+def _spec(report: str) -> MetricTableSpec:
+    try:
+        return METRIC_TABLES[report]
+    except KeyError:
+        raise ValueError(f"Unknown report: {report}")
+
+
+def get_metric_model(report: str):
+    import crm_svc.models as models
+
+    return getattr(models, _spec(report).model_name)
+
+
+def get_row_adapter(report: str) -> TypeAdapter:
+    """TypeAdapter validating a JSON array of rows for ``report`` in one pydantic-core pass."""
+    adapter = _adapters.get(report)
+    if adapter is None:
+        import crm_svc.schemas as schemas
+
+        row_schema: Type[BaseModel] = getattr(schemas, _spec(report).row_schema_name)
+        adapter = _adapters[report] = TypeAdapter(List[row_schema])
+    return adapter
+
+
+def _comparable(dialect_name: str, column, value):
+    """``value`` in a form ``IS DISTINCT FROM`` accepts for ``column``."""
+    # PostgreSQL has no equality operator for json (the type migration 0002 created); jsonb has one
+    if dialect_name == "postgresql" and isinstance(getattr(column.type, "impl", column.type), JSON):
+        from sqlalchemy.dialects.postgresql import JSONB
+
+        return cast(value, JSONB)
+    return value
+
+
+def build_upsert(dialect_name: str, table, value_columns: Sequence[str]):
+    """Return ``INSERT ... ON CONFLICT (start_date, end_date) DO UPDATE`` for ``table``.
+
+    Only rows whose values differ are updated, and created_at is refreshed
+    with them; re-sending identical rows leaves them untouched.
+    """
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"Bulk upsert is not supported on {dialect_name}")
+    stmt = insert(table)
+    updates = {col: stmt.excluded[col] for col in (*value_columns, "created_at")}
+    changed = or_(
+        *(
+            _comparable(dialect_name, table.c[col], table.c[col]).is_distinct_from(
+                _comparable(dialect_name, table.c[col], stmt.excluded[col])
+            )
+            for col in value_columns
+        )
+    )
+    return stmt.on_conflict_do_update(index_elements=["start_date", "end_date"], set_=updates, where=changed)
+
+
+def build_records(report: str, rows: Iterable[BaseModel], created_at: datetime) -> List[Dict[str, Any]]:
+    """Turn validated rows into insert parameters, one per (start_date, end_date).
+
+    Rows repeating a range collapse to the last one, as PostgreSQL rejects a
+    statement that updates the same row twice.
+    """
+    spec = _spec(report)
+    by_range: Dict[Tuple[Any, Any], Dict[str, Any]] = {}
+    for row in rows:
+        if row.start_date > row.end_date:
+            raise ValueError(f"start_date must be less than or equal to end_date ({row.start_date} > {row.end_date})")
+        by_range[(row.start_date, row.end_date)] = {
+            "id": str(uuid.uuid4()),
+            "start_date": row.start_date,
+            "end_date": row.end_date,
+            "created_at": created_at,
+            **{col: getattr(row, col) for col in spec.value_columns},
+        }
+    return list(by_range.values())
+
+
+class IngestionResult(NamedTuple):
+    received: int
+    # rows inserted or updated; rows equal to the stored ones are not counted
+    written: int
+    batches: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.written / self.seconds if self.seconds > 0 else float(self.written)
+
+
+class MetricIngestionService:
+    """Writes validated metric rows with batched, idempotent upserts."""
+
+    @track_operation("ingest.metrics")
+    def ingest(
+        self, db_session: Session, report: str, rows: Sequence[BaseModel], batch_size: int = INGEST_BATCH_SIZE
+    ) -> IngestionResult:
+        """Upsert ``rows`` into the metric table for ``report`` keyed on (start_date, end_date).
+
+        Rows repeating a range within the request collapse to the last one.
+        Rows equal to the stored ones are not rewritten and publish no change,
+        so re-sending a payload leaves the table (created_at included) as it
+        was. All batches commit together.
+        """
+        spec = _spec(report)
+        model = get_metric_model(report)
+        started = time.perf_counter()
+
+        records = build_records(report, rows, datetime.utcnow())
+
+        table = model.__table__
+        stmt = build_upsert(db_session.get_bind().dialect.name, table, spec.value_columns)
+        # inserted and updated rows come back; rows skipped as unchanged do not
+        stmt = stmt.returning(table.c.start_date, table.c.end_date)
+        changed = set()
+        batches = 0
+        try:
+            for offset in range(0, len(records), batch_size):
+                changed.update(tuple(row) for row in db_session.execute(stmt, records[offset : offset + batch_size]))
+                batches += 1
+            db_session.commit()
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            try:
+                db_session.rollback()
+            except Exception:
+                logger.error("Failed to rollback session", exc_info=True)
+            raise
+
+        elapsed = time.perf_counter() - started
+        INGEST_ROWS.labels(report).inc(len(changed))
+        INGEST_SECONDS.labels(report).observe(elapsed)
+        # Core upserts bypass the ORM change tracking; announce them to live subscribers
+        changes = [
+            MetricChange(report, "upsert", r["start_date"], r["end_date"], {col: r[col] for col in spec.value_columns})
+            for r in records
+            if (r["start_date"], r["end_date"]) in changed
+        ]
+        if changes:
+            publish_changes(changes)
+        return IngestionResult(len(rows), len(changed), batches, elapsed)
@@ -0,0 +1,274 @@
+"""Stale-while-revalidate cache for ReportService results.
+
+Each report type has a soft and a hard TTL (``config.REPORT_CACHE_TTLS``):
+
+- younger than the soft TTL: served from the cache;
+- between the soft and hard TTL: served from the cache at once, and a single
+  background refresh recomputes it on its own database session;
+- older than the hard TTL, or missing: the request computes it.
+
+So no value is ever more than the hard TTL old. Entries live in the cache
+backend (``crm_svc.utils.cache``), so with Redis every worker shares them and
+one lease per key keeps refreshes to one across workers.
+
+Metric row changes published on the change bus delete the entries whose range
+they overlap, found through a per-report index of keys rather than a scan of
+the keyspace, and are broadcast on the backend's invalidation channel. Every
+worker then discards refreshes and computations it started before the change,
+so they cannot store pre-change values. The age of the value a request was
+served is available through :func:`served_age` for the ``Age`` response header.
+"""
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import date
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, TypeVar
+
+from crm_svc import config
+from crm_svc.models.base import session_like
+from crm_svc.utils.cache import CacheBackend, get_cache_backend
+from crm_svc.utils.events import MetricChange, bus
+from crm_svc.utils.metrics import REPORT_CACHE_REFRESHES, REPORT_CACHE_REQUESTS
+from crm_svc.utils.operations import track_operation
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable)
+
+KEY_PREFIX = "report:"
+LEASE_PREFIX = "lease:report:"
+# per change bus report, the keys of the entries computed from its rows
+INDEX_PREFIX = "index:report:"
+# longest a worker may hold a key's refresh lease before another may take over
+REFRESH_LEASE_SECONDS = 60.0
+
+# cached report type -> change bus report whose rows it is computed from
+REPORT_SOURCES: Dict[str, str] = {
+    "sales_performance": "sales",
+    "sales_series": "sales",
+    "team_productivity": "team",
+    "customer_interaction": "customer",
+    "pipeline_analytics": "pipeline",
+    "pipeline_funnel": "pipeline",
+}
+
+# age in seconds of the report last served in this context
+_served_age: ContextVar[Optional[float]] = ContextVar("crm_report_age", default=None)
+
+
+def served_age() -> Optional[float]:
+    return _served_age.get()
+
+
+class CachePolicy(NamedTuple):
+    soft_ttl: float
+    hard_ttl: float
+
+
+def _index(report: str) -> str:
+    return INDEX_PREFIX + REPORT_SOURCES.get(report, report)
+
+
+def cache_key(report: str, start_date: date, end_date: date, *rest: Any) -> str:
+    """``report:<type>:<start>:<end>[:<rest>...]``; invalidation parses the range back out."""
+    return ":".join((KEY_PREFIX + report, start_date.isoformat(), end_date.isoformat(), *map(str, rest)))
+
+
+class ReportCache:
+    def __init__(
+        self,
+        policies: Dict[str, CachePolicy],
+        backend: Optional[CacheBackend] = None,
+        refresh_workers: int = config.REPORT_CACHE_REFRESH_WORKERS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.policies = policies
+        self.refresh_workers = refresh_workers
+        self.clock = clock
+        self._backend = backend
+        self._subscribed: Optional[CacheBackend] = None
+        self._refreshing: Set[str] = set()
+        # bumped by every invalidation; values computed before a bump are not stored
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def backend(self) -> CacheBackend:
+        backend = self._backend or get_cache_backend()
+        if self._subscribed is not backend:
+            with self._lock:
+                if self._subscribed is not backend:
+                    backend.subscribe(self._on_invalidation)
+                    self._subscribed = backend
+        return backend
+
+    def policy(self, report: str) -> CachePolicy:
+        return self.policies.get(report, CachePolicy(0.0, 0.0))
+
+    def get_or_compute(
+        self,
+        report: str,
+        key: str,
+        compute: Callable[[], Any],
+        refresh: Callable[[], Any],
+    ) -> Any:
+        """Return the cached value for ``key`` or compute it; see the module docstring."""
+        policy = self.policy(report)
+        if policy.hard_ttl <= 0:
+            _served_age.set(0.0)
+            return compute()
+        backend = self.backend
+        entry = backend.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            age = self.clock() - stored_at
+            if age < policy.hard_ttl:
+                if age < policy.soft_ttl:
+                    REPORT_CACHE_REQUESTS.labels(report, "hit").inc()
+                else:
+                    REPORT_CACHE_REQUESTS.labels(report, "stale").inc()
+                    self._schedule_refresh(report, key, policy, refresh)
+                _served_age.set(max(0.0, age))
+                return value
+
+        REPORT_CACHE_REQUESTS.labels(report, "miss").inc()
+        started, generation = self.clock(), self._generation
+        value = compute()
+        self._store(report, key, value, started, generation, policy)
+        _served_age.set(0.0)
+        return value
+
+    def _store(
+        self, report: str, key: str, value: Any, stored_at: float, generation: int, policy: CachePolicy
+    ) -> None:
+        if generation != self._generation:
+            return
+        backend = self.backend
+        backend.set(key, [stored_at, value], policy.hard_ttl)
+        backend.index_add(_index(report), key, policy.hard_ttl)
+
+    def _schedule_refresh(self, report: str, key: str, policy: CachePolicy, refresh: Callable[[], Any]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        if not self.backend.acquire(LEASE_PREFIX + key, min(REFRESH_LEASE_SECONDS, policy.hard_ttl)):
+            # another worker is refreshing it
+            with self._lock:
+                self._refreshing.discard(key)
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.refresh_workers, thread_name_prefix="crm-report-refresh")
+            executor = self._executor
+        executor.submit(self._refresh, report, key, policy, refresh)
+
+    def _refresh(self, report: str, key: str, policy: CachePolicy, refresh: Callable[[], Any]) -> None:
+        started, generation = self.clock(), self._generation
+        try:
+            value = refresh()
+        except Exception as e:
+            # keep serving the stale value; the next stale hit retries
+            logger.error(e, exc_info=True)
+            REPORT_CACHE_REFRESHES.labels(report, "error").inc()
+        else:
+            self._store(report, key, value, started, generation, policy)
+            REPORT_CACHE_REFRESHES.labels(report, "ok").inc()
+        finally:
+            self.backend.delete([LEASE_PREFIX + key])
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def invalidate(self, changes: List[MetricChange]) -> None:
+        """Delete entries computed from rows overlapping any of ``changes`` and tell the other workers."""
+        self._bump()
+        backend = self.backend
+        # only the changed reports' indexes are read, never the whole keyspace
+        for source in {c.report for c in changes}:
+            index = INDEX_PREFIX + source
+            stale = []
+            for key in backend.index_members(index):
+                start, end = key.split(":", 4)[2:4]
+                start_date, end_date = date.fromisoformat(start), date.fromisoformat(end)
+                if any(
+                    c.report == source and c.start_date <= end_date and c.end_date >= start_date for c in changes
+                ):
+                    stale.append(key)
+            backend.delete(stale)
+            backend.index_remove(index, stale)
+        backend.publish({"reports": [[c.report, c.start_date, c.end_date] for c in changes]})
+
+    def _on_invalidation(self, message: Dict[str, Any]) -> None:
+        if "reports" in message:
+            self._bump()
+
+    def _bump(self) -> None:
+        with self._lock:
+            self._generation += 1
+
+    def clear(self) -> None:
+        self._bump()
+        backend = self.backend
+        for index in {_index(report) for report in (*REPORT_SOURCES, *self.policies)}:
+            keys = backend.index_members(index)
+            backend.delete(keys)
+            backend.index_remove(index, keys)
+
+    def wait_for_refreshes(self, timeout: float = 5.0) -> None:
+        """Block until no background refresh is running (for tests and shutdown)."""
+        deadline = time.monotonic() + timeout
+        while self._refreshing and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Let running refreshes finish (up to ``timeout``), then stop the refresh threads."""
+        self.wait_for_refreshes(timeout)
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+report_cache = ReportCache({name: CachePolicy(*ttls) for name, ttls in config.REPORT_CACHE_TTLS.items()})
+bus.add_listener(report_cache.invalidate)
+
+
+def cached_report(report: str, cache: ReportCache = report_cache) -> Callable[[F], F]:
+    """Serve a ReportService method through the stale-while-revalidate cache.
+
+    The method is called as ``(self, db_session, start_date, end_date, *rest)``
+    and cached per report type and arguments. Background refreshes run on a
+    new session bound like the request's, recorded as ``report.<type>.refresh``.
+    A session that has written (``RoutingSession.wrote``) must read its own,
+    possibly uncommitted, rows, so its calls bypass the cache both ways.
+    """
+
+    def decorator(fn: F) -> F:
+        @track_operation(f"report.{report}.refresh")
+        def refresh(self, db_session, *args, **kwargs):
+            session = session_like(db_session)
+            try:
+                return fn(self, session, *args, **kwargs)
+            finally:
+                session.close()
+
+        @functools.wraps(fn)
+        def wrapper(self, db_session, start_date, end_date, *args, **kwargs):
+            if getattr(db_session, "wrote", False):
+                _served_age.set(0.0)
+                return fn(self, db_session, start_date, end_date, *args, **kwargs)
+            key = cache_key(report, start_date, end_date, *args, *(kwargs[name] for name in sorted(kwargs)))
+            return cache.get_or_compute(
+                report,
+                key,
+                lambda: fn(self, db_session, start_date, end_date, *args, **kwargs),
+                lambda: refresh(self, db_session, start_date, end_date, *args, **kwargs),
+            )
+
+        return wrapper
+
+    return decorator
@@ -1,15 +1,27 @@
 import logging
 from datetime import date
-from typing import Dict
+from typing import Any, Dict, List, Optional
 
-from sqlalchemy import select
+from sqlalchemy import Float, cast, func, select
 from sqlalchemy.orm import Session
 
-logger = logging.getLogger(__name__)
+from crm_svc.models.base import reads_from_replica
+from crm_svc.services.activity_aggregation import activity_aggregator
+from crm_svc.services.report_cache import cached_report
+from crm_svc.utils.coalescing import single_flight
+from crm_svc.utils.operations import track_operation
 
+logger = logging.getLogger(__name__)
 
 class ReportService:
-    """Service to fetch or generate CRM reports without persisting mock data."""
+    """Service to fetch or generate CRM reports without persisting mock data.
+
+    Each report prefers a stored metric row for the exact range, then values
+    derived from the activity log, and only then falls back to mock data.
+    Results are cached per report type with stale-while-revalidate (see
+    services.report_cache), and concurrent identical computations share one
+    execution (see utils.coalescing).
+    """
 
     def _validate_date_range(self, start_date: date, end_date: date) -> None:
         if start_date > end_date:
@@ -18,6 +30,10 @@ class ReportService:
     def _days_span(self, start_date: date, end_date: date) -> int:
         return (end_date - start_date).days + 1
 
+    @track_operation("report.sales_performance")
+    @cached_report("sales_performance")
+    @single_flight("report.sales_performance")
+    @reads_from_replica
     def get_sales_performance(self, db_session: Session, start_date: date, end_date: date):
         from crm_svc.models import SalesPerformanceMetrics
         from crm_svc.schemas import SalesPerformanceResponse
@@ -39,6 +55,12 @@ class ReportService:
                 }
                 return SalesPerformanceResponse.model_validate(data)
 
+            derived = activity_aggregator.sales(db_session, start_date, end_date)
+            if derived is not None:
+                return SalesPerformanceResponse.model_validate(
+                    {"start_date": start_date, "end_date": end_date, **derived}
+                )
+
             # generate deterministic mock data (do NOT persist)
             days = self._days_span(start_date, end_date)
             revenue = float(days * 1000.0)
@@ -63,6 +85,10 @@ class ReportService:
                 logger.error("Failed to rollback session", exc_info=True)
             raise
 
+    @track_operation("report.team_productivity")
+    @cached_report("team_productivity")
+    @single_flight("report.team_productivity")
+    @reads_from_replica
     def get_team_productivity(self, db_session: Session, start_date: date, end_date: date):
         from crm_svc.models import TeamProductivityMetrics
         from crm_svc.schemas import TeamProductivityResponse
@@ -84,6 +110,12 @@ class ReportService:
                 }
                 return TeamProductivityResponse.model_validate(data)
 
+            derived = activity_aggregator.team(db_session, start_date, end_date)
+            if derived is not None:
+                return TeamProductivityResponse.model_validate(
+                    {"start_date": start_date, "end_date": end_date, **derived}
+                )
+
             days = self._days_span(start_date, end_date)
             tasks_completed = int(days * 5)
             deals_closed = int(min(tasks_completed, max(0, tasks_completed * 0.3)))
@@ -107,6 +139,10 @@ class ReportService:
                 logger.error("Failed to rollback session", exc_info=True)
             raise
 
+    @track_operation("report.customer_interaction")
+    @cached_report("customer_interaction")
+    @single_flight("report.customer_interaction")
+    @reads_from_replica
     def get_customer_interaction(self, db_session: Session, start_date: date, end_date: date):
         from crm_svc.models import CustomerInteractionMetrics
         from crm_svc.schemas import CustomerInteractionResponse
@@ -127,6 +163,12 @@ class ReportService:
                 }
                 return CustomerInteractionResponse.model_validate(data)
 
+            derived = activity_aggregator.customer(db_session, start_date, end_date)
+            if derived is not None:
+                return CustomerInteractionResponse.model_validate(
+                    {"start_date": start_date, "end_date": end_date, **derived}
+                )
+
             days = self._days_span(start_date, end_date)
             total_interactions = int(days * 20)
             avg_engagement_score = min(1.0, 0.3 + days * 0.02)
@@ -148,6 +190,10 @@ class ReportService:
                 logger.error("Failed to rollback session", exc_info=True)
             raise
 
+    @track_operation("report.pipeline_analytics")
+    @cached_report("pipeline_analytics")
+    @single_flight("report.pipeline_analytics")
+    @reads_from_replica
     def get_pipeline_analytics(self, db_session: Session, start_date: date, end_date: date):
         from crm_svc.models import PipelineAnalyticsMetrics
         from crm_svc.schemas import PipelineAnalyticsResponse
@@ -167,6 +213,23 @@ class ReportService:
                 }
                 return PipelineAnalyticsResponse.model_validate(data)
 
+            stages = self._stage_funnel(db_session, start_date, end_date)
+            if stages:
+                data = {
+                    "start_date": start_date,
+                    "end_date": end_date,
+                    "stage_conversion_rates": {
+                        s["stage"]: round(s["conversion_rate"], 4) for s in stages if s["entered"]
+                    },
+                }
+                return PipelineAnalyticsResponse.model_validate(data)
+
+            derived = activity_aggregator.pipeline(db_session, start_date, end_date)
+            if derived is not None:
+                return PipelineAnalyticsResponse.model_validate(
+                    {"start_date": start_date, "end_date": end_date, **derived}
+                )
+
             days = self._days_span(start_date, end_date)
             base_rates: Dict[str, float] = {
                 "lead": 0.6,
@@ -196,3 +259,116 @@ class ReportService:
             except Exception:
                 logger.error("Failed to rollback session", exc_info=True)
             raise
+
+    def _stage_funnel(self, db_session: Session, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+        """Aggregate stage rows for the range into funnel steps, entirely in SQL.
+
+        Returns one mapping per stage in funnel order with entered/converted
+        totals, the stage conversion rate, the share of the top stage's
+        entries that reached it, and the mean days converted deals spent in it.
+        """
+        from crm_svc.models import PipelineStageMetrics as M
+
+        entered = func.sum(M.entered)
+        converted = func.sum(M.converted)
+        position = func.min(M.stage_order)
+        stmt = (
+            select(
+                M.stage,
+                entered.label("entered"),
+                converted.label("converted"),
+                func.coalesce(cast(converted, Float) / func.nullif(entered, 0), 0.0).label("conversion_rate"),
+                func.coalesce(
+                    cast(entered, Float) / func.nullif(func.first_value(entered).over(order_by=position), 0), 0.0
+                ).label("funnel_rate"),
+                (func.sum(M.days_in_stage) / func.nullif(converted, 0)).label("avg_days_in_stage"),
+            )
+            .where(M.day >= start_date, M.day <= end_date)
+            .group_by(M.stage)
+            .order_by(position, M.stage)
+        )
+        return [dict(row) for row in db_session.execute(stmt).mappings()]
+
+    @track_operation("report.pipeline_funnel")
+    @cached_report("pipeline_funnel")
+    @single_flight("report.pipeline_funnel")
+    @reads_from_replica
+    def get_pipeline_funnel(self, db_session: Session, start_date: date, end_date: date):
+        """Stage funnel for the range; empty when no stage rows were recorded."""
+        from crm_svc.schemas import PipelineFunnelResponse
+
+        self._validate_date_range(start_date, end_date)
+        try:
+            stages = self._stage_funnel(db_session, start_date, end_date)
+            return PipelineFunnelResponse.model_validate(
+                {"start_date": start_date, "end_date": end_date, "stages": stages}
+            )
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            try:
+                db_session.rollback()
+            except Exception:
+                logger.error("Failed to rollback session", exc_info=True)
+            raise
+
+    @track_operation("report.sales_series")
+    @cached_report("sales_series")
+    @single_flight("report.sales_series")
+    @reads_from_replica
+    def get_sales_series(
+        self, db_session: Session, start_date: date, end_date: date, target: int, method: str = "lttb"
+    ):
+        """Return daily revenue between the dates, downsampled to ``target`` points.
+
+        Daily rows are metrics whose start_date equals their end_date. The
+        result is cached per (range, target, method) by ``cached_report``;
+        sales row changes inside the range evict it.
+        """
+        import numpy as np
+
+        from crm_svc.models import SalesPerformanceMetrics
+        from crm_svc.schemas import SalesSeriesResponse
+        from crm_svc.utils.downsampling import downsample
+
+        self._validate_date_range(start_date, end_date)
+        try:
+            daily = (
+                SalesPerformanceMetrics.start_date == SalesPerformanceMetrics.end_date,
+                SalesPerformanceMetrics.start_date >= start_date,
+                SalesPerformanceMetrics.start_date <= end_date,
+            )
+            rows = db_session.execute(
+                select(SalesPerformanceMetrics.start_date, SalesPerformanceMetrics.revenue)
+                .where(*daily)
+                .order_by(SalesPerformanceMetrics.start_date)
+            ).all()
+            if rows:
+                ordinals = np.fromiter((r[0].toordinal() for r in rows), dtype=np.int64, count=len(rows))
+                revenue = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+            else:
+                # generate a deterministic mock series (do NOT persist)
+                ordinals = np.arange(start_date.toordinal(), end_date.toordinal() + 1, dtype=np.int64)
+                revenue = 1000.0 + 250.0 * np.sin(ordinals / 7.0) + 100.0 * ((ordinals * 7919) % 13) / 13.0
+
+            keep = downsample(ordinals, revenue, target, method)
+            data = {
+                "start_date": start_date,
+                "end_date": end_date,
+                "method": method,
+                "target": target,
+                "source_points": int(len(ordinals)),
+                "dates": [date.fromordinal(int(o)) for o in ordinals[keep]],
+                "revenue": revenue[keep].round(2).tolist(),
+            }
+            return SalesSeriesResponse.model_validate(data)
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            try:
+                db_session.rollback()
+            except Exception:
+                logger.error("Failed to rollback session", exc_info=True)
+            raise
@@ -0,0 +1,383 @@
+"""Cache backends shared by the report cache and document metadata.
+
+``MemoryBackend`` keeps entries in the worker process. ``RedisBackend`` keeps
+them in any Redis-protocol server, so all workers and nodes share one copy,
+and broadcasts invalidation messages to every worker over pub/sub.
+
+Redis values are msgpack-encoded when msgpack is installed, and orjson-encoded
+otherwise. Pydantic models from ``crm_svc.schemas`` are stored as their
+JSON-mode dump, tagged with the schema name. A failing backend operation is
+logged, counted in ``crm_cache_backend_errors_total`` and behaves as a miss,
+so an unreachable cache slows requests down but does not fail them.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import orjson
+from pydantic import BaseModel
+
+from crm_svc import config
+from crm_svc.utils.metrics import CACHE_BACKEND_ERRORS
+
+logger = logging.getLogger(__name__)
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+_MODEL_EXT, _DATE_EXT, _DATETIME_EXT = 1, 2, 3
+
+
+def _schema(name: str):
+    import crm_svc.schemas as schemas
+
+    cls = getattr(schemas, name, None)
+    if not (isinstance(cls, type) and issubclass(cls, BaseModel)):
+        raise ValueError(f"Cannot decode cached value of unknown schema {name}")
+    return cls
+
+
+def _dump_model(model: BaseModel) -> List[Any]:
+    return [type(model).__name__, model.model_dump(mode="json", by_alias=True)]
+
+
+def _msgpack_default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return msgpack.ExtType(_MODEL_EXT, msgpack.packb(_dump_model(obj)))
+    if isinstance(obj, datetime):
+        return msgpack.ExtType(_DATETIME_EXT, obj.isoformat().encode())
+    if isinstance(obj, date):
+        return msgpack.ExtType(_DATE_EXT, obj.isoformat().encode())
+    raise TypeError(f"Cannot encode {type(obj).__name__}")
+
+
+def _msgpack_ext(code: int, data: bytes) -> Any:
+    if code == _MODEL_EXT:
+        name, fields = msgpack.unpackb(data)
+        return _schema(name).model_validate(fields)
+    if code == _DATETIME_EXT:
+        return datetime.fromisoformat(data.decode())
+    if code == _DATE_EXT:
+        return date.fromisoformat(data.decode())
+    return msgpack.ExtType(code, data)
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return {"__model__": _dump_model(obj)}
+    if isinstance(obj, datetime):
+        return {"__datetime__": obj.isoformat()}
+    if isinstance(obj, date):
+        return {"__date__": obj.isoformat()}
+    raise TypeError(f"Cannot encode {type(obj).__name__}")
+
+
+def _json_restore(obj: Any) -> Any:
+    if isinstance(obj, list):
+        return [_json_restore(item) for item in obj]
+    if isinstance(obj, dict):
+        if "__model__" in obj:
+            name, fields = obj["__model__"]
+            return _schema(name).model_validate(fields)
+        if "__datetime__" in obj:
+            return datetime.fromisoformat(obj["__datetime__"])
+        if "__date__" in obj:
+            return date.fromisoformat(obj["__date__"])
+        return {key: _json_restore(value) for key, value in obj.items()}
+    return obj
+
+
+def encode(value: Any) -> bytes:
+    if msgpack is not None:
+        return msgpack.packb(value, default=_msgpack_default)
+    return orjson.dumps(value, default=_json_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+def decode(data: bytes) -> Any:
+    if msgpack is not None:
+        return msgpack.unpackb(data, ext_hook=_msgpack_ext)
+    return _json_restore(orjson.loads(data))
+
+
+class CacheBackend:
+    """Key/value store with per-entry TTLs and an invalidation channel; TTLs are in seconds."""
+
+    # whether every worker sees the same entries (and so each other's deletes)
+    shared = False
+
+    def get(self, key: str) -> Any:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        raise NotImplementedError
+
+    def delete(self, keys: Iterable[str]) -> None:
+        raise NotImplementedError
+
+    def acquire(self, key: str, ttl: float) -> bool:
+        """Take the lease ``key`` unless someone holds it; it lapses after ``ttl``."""
+        raise NotImplementedError
+
+    def index_add(self, index: str, member: str, ttl: float) -> None:
+        """Record ``member`` in the set ``index``; it drops out after ``ttl``."""
+        raise NotImplementedError
+
+    def index_members(self, index: str) -> List[str]:
+        raise NotImplementedError
+
+    def index_remove(self, index: str, members: Iterable[str]) -> None:
+        raise NotImplementedError
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """Entries held by this process, least recently used evicted beyond ``max_entries``."""
+
+    def __init__(self, max_entries: int = config.CACHE_MAX_ENTRIES, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        # key -> (value, expires at)
+        self._entries: OrderedDict = OrderedDict()
+        self._leases: Dict[str, float] = {}
+        # index -> member -> expires at
+        self._indexes: Dict[str, Dict[str, float]] = {}
+        self._subscribers: List[Callable[[Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[1] <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return item[0]
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, self.clock() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                self._leases.pop(key, None)
+
+    def acquire(self, key: str, ttl: float) -> bool:
+        now = self.clock()
+        with self._lock:
+            if self._leases.get(key, 0.0) > now:
+                return False
+            self._leases[key] = now + ttl
+            return True
+
+    def index_add(self, index: str, member: str, ttl: float) -> None:
+        with self._lock:
+            self._indexes.setdefault(index, {})[member] = self.clock() + ttl
+
+    def index_members(self, index: str) -> List[str]:
+        now = self.clock()
+        with self._lock:
+            members = self._indexes.get(index, {})
+            for member in [m for m, expires in members.items() if expires <= now]:
+                del members[member]
+            return list(members)
+
+    def index_remove(self, index: str, members: Iterable[str]) -> None:
+        with self._lock:
+            indexed = self._indexes.get(index, {})
+            for member in members:
+                indexed.pop(member, None)
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        for callback in list(self._subscribers):
+            try:
+                callback(message)
+            except Exception as e:
+                logger.error(e, exc_info=True)
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        self._subscribers.append(callback)
+
+
+class RedisBackend(CacheBackend):
+    """Entries shared through a Redis-protocol server, under ``prefix``.
+
+    Invalidation messages go out on the ``<prefix>invalidate`` channel; a
+    daemon thread delivers the ones from all workers (this one included) to
+    the subscribed callbacks.
+    """
+
+    shared = True
+
+    def __init__(self, client, prefix: str = config.CACHE_KEY_PREFIX):
+        self.client = client
+        self.prefix = prefix
+        self.channel = f"{prefix}invalidate"
+        self._subscribers: List[Callable[[Dict[str, Any]], None]] = []
+        self._pubsub = None
+        self._listener = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = config.CACHE_KEY_PREFIX) -> "RedisBackend":
+        try:
+            import redis
+        except ImportError:
+            raise ValueError("CACHE_BACKEND=redis requires the redis package; install crm_svc with the 'redis' extra")
+        return cls(redis.Redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0), prefix)
+
+    def _failed(self, operation: str, error: Exception) -> None:
+        logger.warning("Cache %s failed: %s", operation, error)
+        CACHE_BACKEND_ERRORS.labels(operation).inc()
+
+    def get(self, key: str) -> Any:
+        try:
+            data = self.client.get(self.prefix + key)
+            return decode(data) if data is not None else None
+        except Exception as e:
+            self._failed("get", e)
+            return None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        try:
+            self.client.set(self.prefix + key, encode(value), px=max(1, int(ttl * 1000)))
+        except Exception as e:
+            self._failed("set", e)
+
+    def delete(self, keys: Iterable[str]) -> None:
+        names = [self.prefix + key for key in keys]
+        if not names:
+            return
+        try:
+            self.client.delete(*names)
+        except Exception as e:
+            self._failed("delete", e)
+
+    def acquire(self, key: str, ttl: float) -> bool:
+        try:
+            return bool(self.client.set(self.prefix + key, b"1", nx=True, px=max(1, int(ttl * 1000))))
+        except Exception as e:
+            self._failed("acquire", e)
+            return False
+
+    # indexes are sorted sets scored by expiry (wall clock, shared by all workers)
+    def index_add(self, index: str, member: str, ttl: float) -> None:
+        try:
+            self.client.zadd(self.prefix + index, {member: time.time() + ttl})
+        except Exception as e:
+            self._failed("index_add", e)
+
+    def index_members(self, index: str) -> List[str]:
+        name = self.prefix + index
+        try:
+            pipe = self.client.pipeline()
+            pipe.zremrangebyscore(name, "-inf", time.time())
+            pipe.zrange(name, 0, -1)
+            return [member.decode() for member in pipe.execute()[1]]
+        except Exception as e:
+            self._failed("index_members", e)
+            return []
+
+    def index_remove(self, index: str, members: Iterable[str]) -> None:
+        members = list(members)
+        if not members:
+            return
+        try:
+            self.client.zrem(self.prefix + index, *members)
+        except Exception as e:
+            self._failed("index_remove", e)
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        try:
+            self.client.publish(self.channel, encode(message))
+        except Exception as e:
+            self._failed("publish", e)
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        with self._lock:
+            self._subscribers.append(callback)
+            if self._listener is not None:
+                return
+            try:
+                self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                self._pubsub.subscribe(**{self.channel: self._deliver})
+                self._listener = self._pubsub.run_in_thread(sleep_time=0.5, daemon=True)
+            except Exception as e:
+                self._failed("subscribe", e)
+
+    def _deliver(self, raw: Dict[str, Any]) -> None:
+        try:
+            message = decode(raw["data"])
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            return
+        for callback in list(self._subscribers):
+            try:
+                callback(message)
+            except Exception as e:
+                logger.error(e, exc_info=True)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._listener is not None:
+                self._listener.stop()
+                self._listener = None
+            if self._pubsub is not None:
+                self._pubsub.close()
+                self._pubsub = None
+        self.client.close()
+
+
+_backend: Optional[CacheBackend] = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name: str = config.CACHE_BACKEND) -> CacheBackend:
+    if name == "memory":
+        return MemoryBackend()
+    if name == "redis":
+        return RedisBackend.from_url(config.CACHE_REDIS_URL, config.CACHE_KEY_PREFIX)
+    raise ValueError(f"Unknown CACHE_BACKEND: {name}")
+
+
+def get_cache_backend() -> CacheBackend:
+    """Return the process-wide cache backend, creating it from config on first call."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+
+def set_cache_backend(backend: Optional[CacheBackend]) -> Optional[CacheBackend]:
+    """Install ``backend`` (None: recreate from config on next use); returns the previous one."""
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+    return previous
+
+
+def close_cache_backend() -> None:
+    previous = set_cache_backend(None)
+    if previous is not None:
+        previous.close()
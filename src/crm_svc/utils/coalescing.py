@@ -0,0 +1,127 @@
+"""Single-flight coalescing of identical concurrent calls.
+
+When many requests ask for the same report at once (the dashboard's morning
+load of ``today..today``), only the first caller for a key executes; callers
+arriving while it runs wait and share its result or exception. Nothing is
+kept once the call finishes, so this is not a cache: a request arriving after
+the leader returned starts a new execution. A caller that has waited
+``wait_timeout`` seconds (SINGLE_FLIGHT_WAIT_SECONDS) stops waiting and
+executes on its own, so one stuck execution cannot hold every caller.
+
+Threads (sync routes in the threadpool) and coroutines are coalesced
+separately; a sync and an async caller of the same key do not share.
+"""
+import asyncio
+import functools
+import inspect
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from crm_svc import config
+from crm_svc.utils.metrics import SINGLE_FLIGHT_CALLS
+
+F = TypeVar("F", bound=Callable)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Runs at most one execution per key at a time and hands its outcome to every concurrent caller."""
+
+    def __init__(self, wait_timeout: Optional[float] = None):
+        self.wait_timeout = config.SINGLE_FLIGHT_WAIT_SECONDS if wait_timeout is None else wait_timeout
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], "asyncio.Future"] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any], operation: str = "") -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            SINGLE_FLIGHT_CALLS.labels(operation, "coalesced").inc()
+            if not call.done.wait(self.wait_timeout):
+                SINGLE_FLIGHT_CALLS.labels(operation, "timeout").inc()
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        SINGLE_FLIGHT_CALLS.labels(operation, "leader").inc()
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]], operation: str = "") -> Any:
+        loop = asyncio.get_running_loop()
+        task_key = (loop, key)
+        task = self._tasks.get(task_key)
+        if task is None:
+            SINGLE_FLIGHT_CALLS.labels(operation, "leader").inc()
+            task = self._tasks[task_key] = loop.create_task(fn())
+            task.add_done_callback(lambda _: self._tasks.pop(task_key, None))
+            # a caller that disconnects must not cancel the execution the others are waiting on
+            return await asyncio.shield(task)
+        SINGLE_FLIGHT_CALLS.labels(operation, "coalesced").inc()
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), self.wait_timeout)
+        except asyncio.TimeoutError:
+            SINGLE_FLIGHT_CALLS.labels(operation, "timeout").inc()
+            return await fn()
+
+    def in_flight(self) -> int:
+        return len(self._calls) + len(self._tasks)
+
+
+report_flights = SingleFlight()
+
+
+def single_flight(name: str, flights: SingleFlight = report_flights) -> Callable[[F], F]:
+    """Coalesce concurrent calls of a service method that have equal arguments.
+
+    The method is called as ``(self, db_session, *args, **kwargs)``; the key
+    is ``name`` plus everything after the session, which must be hashable.
+    Coalesced callers' own sessions go unused. A session that has written
+    (``RoutingSession.wrote``) is pinned to the primary and may hold
+    uncommitted rows, so its calls always execute on their own. Works on sync
+    and async methods.
+    """
+
+    def decorator(fn: F) -> F:
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(self, db_session, *args, **kwargs):
+                if getattr(db_session, "wrote", False):
+                    return await fn(self, db_session, *args, **kwargs)
+                key = (name, args, tuple(sorted(kwargs.items())))
+                return await flights.do_async(key, lambda: fn(self, db_session, *args, **kwargs), name)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(self, db_session, *args, **kwargs):
+            if getattr(db_session, "wrote", False):
+                return fn(self, db_session, *args, **kwargs)
+            key = (name, args, tuple(sorted(kwargs.items())))
+            return flights.do(key, lambda: fn(self, db_session, *args, **kwargs), name)
+
+        return wrapper
+
+    return decorator
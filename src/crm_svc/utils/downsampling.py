@@ -0,0 +1,80 @@
+"""Time-series downsampling for charts.
+
+Both algorithms return the *indices* of the points to keep, always including
+the first and last point, so callers can slice any number of parallel arrays.
+
+- ``lttb``: Largest-Triangle-Three-Buckets keeps the point of each bucket that
+  forms the largest triangle with the previously kept point and the average of
+  the next bucket. It preserves the visual shape of a line well.
+- ``min_max``: keeps the minimum and maximum of each bucket, so peaks and dips
+  are never lost; better for spiky data.
+"""
+from typing import Callable, Dict
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, target: int) -> np.ndarray:
+    """Indices of ``target`` points selected by Largest-Triangle-Three-Buckets."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if target >= n or target < 3:
+        return np.arange(n)
+
+    # points 1..n-2 split into target-2 buckets; edges are strictly increasing since target-2 <= n-2
+    edges = np.linspace(1, n - 1, target - 1).astype(np.int64)
+    counts = np.diff(edges)
+    # per-bucket means in one pass; bucket i's triangle uses the mean of bucket i+1
+    mean_x = np.add.reduceat(x[1 : n - 1], edges[:-1] - 1) / counts
+    mean_y = np.add.reduceat(y[1 : n - 1], edges[:-1] - 1) / counts
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(target, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(target - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - next_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[i] - ay))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def min_max(x: np.ndarray, y: np.ndarray, target: int) -> np.ndarray:
+    """Indices of at most ``target`` points keeping each bucket's minimum and maximum."""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if target >= n or target < 4:
+        return np.arange(n)
+
+    inner = y[1 : n - 1]
+    buckets = (target - 2) // 2
+    size = -(-len(inner) // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[: len(inner)] = inner
+    grid = padded.reshape(buckets, size)
+    # drop trailing buckets that only hold padding
+    valid = ~np.all(np.isnan(grid), axis=1)
+    grid = grid[valid]
+    offsets = np.flatnonzero(valid) * size + 1
+    lows = offsets + np.nanargmin(grid, axis=1)
+    highs = offsets + np.nanargmax(grid, axis=1)
+    return np.unique(np.concatenate(([0], lows, highs, [n - 1])))
+
+
+METHODS: Dict[str, Callable[[np.ndarray, np.ndarray, int], np.ndarray]] = {
+    "lttb": lttb,
+    "minmax": min_max,
+}
+
+
+def downsample(x: np.ndarray, y: np.ndarray, target: int, method: str = "lttb") -> np.ndarray:
+    """Dispatch to one of :data:`METHODS` by name."""
+    try:
+        return METHODS[method](x, y, target)
+    except KeyError:
+        raise ValueError(f"Unknown downsampling method: {method}")
@@ -0,0 +1,214 @@
+"""In-process bus for metric row changes, feeding the live (SSE) endpoint.
+
+Changes to the metric tables made through the ORM are collected per session
+in ``after_flush`` and published once the transaction commits, so rolled
+back work is never announced. Code that writes with Core statements (bulk
+upserts) bypasses the ORM events and calls :func:`publish_changes` itself.
+
+Subscribers live on an asyncio event loop while publishers are usually
+request threads, so delivery goes through ``loop.call_soon_threadsafe``.
+A subscriber that falls too far behind is flagged for a resync instead of
+buffering without bound.
+"""
+import asyncio
+import itertools
+import logging
+import threading
+from datetime import date
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from crm_svc.utils.metrics import LIVE_EVENTS_PUBLISHED, LIVE_SUBSCRIBERS
+
+logger = logging.getLogger(__name__)
+
+# metric table -> report key used by the API and dashboard
+TABLE_REPORTS: Dict[str, str] = {
+    "sales_performance_metrics": "sales",
+    "team_productivity_metrics": "team",
+    "customer_interaction_metrics": "customer",
+    "pipeline_analytics_metrics": "pipeline",
+    "pipeline_stage_metrics": "pipeline",
+}
+# per-day detail tables: a change marks its day's reports stale but carries no report values
+_DAY_TABLES = frozenset({"pipeline_stage_metrics"})
+_SKIPPED_COLUMNS = frozenset({"id", "created_at"})
+_SESSION_KEY = "crm_metric_changes"
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+class MetricChange:
+    """One changed metric row: which report, which range, and its new values."""
+
+    __slots__ = ("report", "op", "start_date", "end_date", "values")
+
+    def __init__(self, report: str, op: str, start_date: date, end_date: date, values: Optional[Dict[str, Any]]):
+        self.report = report
+        self.op = op
+        self.start_date = start_date
+        self.end_date = end_date
+        self.values = values
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "report": self.report,
+            "op": self.op,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "values": self.values,
+        }
+
+
+class Subscription:
+    """Changes overlapping ``[start_date, end_date]`` for the selected reports."""
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        start_date: date,
+        end_date: date,
+        reports: Optional[FrozenSet[str]] = None,
+        max_queue: int = SUBSCRIBER_QUEUE_SIZE,
+    ):
+        self.loop = loop
+        self.start_date = start_date
+        self.end_date = end_date
+        self.reports = reports
+        self.queue: "asyncio.Queue[List[MetricChange]]" = asyncio.Queue(maxsize=max_queue)
+        self.needs_resync = False
+
+    def matches(self, change: MetricChange) -> bool:
+        if self.reports is not None and change.report not in self.reports:
+            return False
+        return change.start_date <= self.end_date and change.end_date >= self.start_date
+
+    def _deliver(self, batch: List[MetricChange]) -> None:
+        # runs on the subscriber's loop
+        try:
+            self.queue.put_nowait(batch)
+        except asyncio.QueueFull:
+            self.needs_resync = True
+
+
+class MetricChangeBus:
+    def __init__(self):
+        self._subscribers: List[Subscription] = []
+        self._listeners: List[Callable[[List[MetricChange]], None]] = []
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+
+    def add_listener(self, listener: Callable[[List[MetricChange]], None]) -> None:
+        """Call ``listener`` with every published batch, synchronously in the publishing thread."""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def subscribe(
+        self, start_date: date, end_date: date, reports: Optional[Iterable[str]] = None
+    ) -> Subscription:
+        """Register a subscription on the running event loop."""
+        sub = Subscription(
+            asyncio.get_running_loop(), start_date, end_date, frozenset(reports) if reports else None
+        )
+        with self._lock:
+            self._subscribers.append(sub)
+            LIVE_SUBSCRIBERS.labels().set(len(self._subscribers))
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+            LIVE_SUBSCRIBERS.labels().set(len(self._subscribers))
+
+    def next_sequence(self) -> int:
+        return next(self._sequence)
+
+    def publish(self, changes: List[MetricChange]) -> None:
+        """Hand each subscriber the subset of ``changes`` it asked for; safe from any thread."""
+        if not changes:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+            listeners = list(self._listeners)
+        for change in changes:
+            LIVE_EVENTS_PUBLISHED.labels(change.report).inc()
+        for listener in listeners:
+            try:
+                listener(changes)
+            except Exception as e:
+                logger.error(e, exc_info=True)
+        for sub in subscribers:
+            batch = [c for c in changes if sub.matches(c)]
+            if not batch:
+                continue
+            try:
+                sub.loop.call_soon_threadsafe(sub._deliver, batch)
+            except RuntimeError:
+                # the subscriber's loop has closed without unsubscribing
+                self.unsubscribe(sub)
+
+
+bus = MetricChangeBus()
+
+
+def publish_changes(changes: List[MetricChange]) -> None:
+    """Publish changes written outside the ORM unit of work (e.g. Core upserts)."""
+    try:
+        bus.publish(changes)
+    except Exception as e:
+        logger.error(e, exc_info=True)
+
+
+def _row_change(obj: Any, op: str) -> Optional[MetricChange]:
+    table = getattr(obj, "__tablename__", "")
+    report = TABLE_REPORTS.get(table)
+    if report is None:
+        return None
+    if table in _DAY_TABLES:
+        return MetricChange(report, op, obj.day, obj.day, None)
+    values = None
+    if op != "delete":
+        values = {
+            attr.key: getattr(obj, attr.key)
+            for attr in inspect(obj).mapper.column_attrs
+            if attr.key not in _SKIPPED_COLUMNS and attr.key not in ("start_date", "end_date")
+        }
+    return MetricChange(report, op, obj.start_date, obj.end_date, values)
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    pending: List[MetricChange] = session.info.setdefault(_SESSION_KEY, [])
+    for objects, op in ((session.new, "upsert"), (session.dirty, "upsert"), (session.deleted, "delete")):
+        for obj in objects:
+            change = _row_change(obj, op)
+            if change is not None:
+                pending.append(change)
+
+
+def _after_commit(session: Session) -> None:
+    pending = session.info.pop(_SESSION_KEY, None)
+    if pending:
+        publish_changes(pending)
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
+
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+def install_change_tracking() -> None:
+    """Listen for metric row changes on every Session (idempotent)."""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        event.listen(Session, "after_flush", _after_flush)
+        event.listen(Session, "after_commit", _after_commit)
+        event.listen(Session, "after_rollback", _after_rollback)
+        _installed = True
@@ -9,6 +9,7 @@ from uuid import UUID
 import filetype
 
 from crm_svc.config import DOCUMENT_STORAGE_PATH, MAX_FILE_SIZE_MB
+from crm_svc.utils.tracing import start_span
 
 logger = logging.getLogger(__name__)
 
@@ -37,23 +38,24 @@ def _save_file_to_disk(file_content: bytes, original_filename: str, customer_id:
     Returns stored_filename and absolute file_path.
     """
     try:
-        customer_dir = _ensure_customer_dir(customer_id)
-        ext = _get_extension_from_filename(original_filename)
-        stored_filename = f"{uuid.uuid4().hex}{ext}"
-        tmp_fd, tmp_path = tempfile.mkstemp(dir=customer_dir)
-        os.close(tmp_fd)
-        try:
-            with open(tmp_path, "wb") as f:
-                f.write(file_content)
-            final_path = os.path.join(customer_dir, stored_filename)
-            os.replace(tmp_path, final_path)
-            return stored_filename, os.path.abspath(final_path)
-        finally:
-            if os.path.exists(tmp_path):
-                try:
-                    os.remove(tmp_path)
-                except Exception:
-                    pass
+        with start_span("storage.write", **{"storage.bytes": len(file_content)}):
+            customer_dir = _ensure_customer_dir(customer_id)
+            ext = _get_extension_from_filename(original_filename)
+            stored_filename = f"{uuid.uuid4().hex}{ext}"
+            tmp_fd, tmp_path = tempfile.mkstemp(dir=customer_dir)
+            os.close(tmp_fd)
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(file_content)
+                final_path = os.path.join(customer_dir, stored_filename)
+                os.replace(tmp_path, final_path)
+                return stored_filename, os.path.abspath(final_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    try:
+                        os.remove(tmp_path)
+                    except Exception:
+                        pass
     except Exception as e:
         logger.error(e, exc_info=True)
         raise IOError("Failed to save file to disk") from e
@@ -61,8 +63,9 @@ def _save_file_to_disk(file_content: bytes, original_filename: str, customer_id:
 
 def _delete_file_from_disk(file_path: str) -> None:
     try:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        with start_span("storage.delete"):
+            if os.path.exists(file_path):
+                os.remove(file_path)
     except Exception as e:
         logger.error(e, exc_info=True)
         raise IOError("Failed to delete file from disk") from e
@@ -70,8 +73,12 @@ def _delete_file_from_disk(file_path: str) -> None:
 
 def _get_file_content(file_path: str) -> bytes:
     try:
-        with open(file_path, "rb") as f:
-            return f.read()
+        with start_span("storage.read") as span:
+            with open(file_path, "rb") as f:
+                content = f.read()
+            if span is not None:
+                span.set_attribute("storage.bytes", len(content))
+            return content
     except Exception as e:
         logger.error(e, exc_info=True)
         raise IOError("Failed to read file from disk") from e
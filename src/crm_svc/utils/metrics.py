@@ -0,0 +1,357 @@
+"""Minimal Prometheus-style metrics registry and SQLAlchemy instrumentation.
+
+Metrics are kept in-process and rendered in the Prometheus text exposition
+format by the /metrics route. Only the small subset we need is implemented:
+counters, gauges and histograms with labels, plus scrape-time collectors.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS: Tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str, **kwargs: str):
+        if kwargs:
+            values = tuple(str(kwargs[n]) for n in self.labelnames)
+        else:
+            values = tuple(str(v) for v in values)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def clear(self) -> None:
+        with self._lock:
+            self._children.clear()
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class _ValueChild:
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = float(value)
+
+    def get(self) -> float:
+        return self._value
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def _samples(self) -> Iterable[str]:
+        for values, child in list(self._children.items()):
+            yield f"{self.name}_total{_format_labels(self.labelnames, values)} {_format_value(child.get())}"
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def _samples(self) -> Iterable[str]:
+        for values, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.get())}"
+
+
+class _HistogramChild:
+    __slots__ = ("_buckets", "_counts", "_sum", "_count", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self._counts), self._sum, self._count
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _samples(self) -> Iterable[str]:
+        for values, child in list(self._children.items()):
+            counts, total, count = child.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, values, ("le", _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class MetricsRegistry:
+    """Holds metrics in registration order and renders them for scraping."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Register a callable run before each render to refresh scrape-time gauges."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        for collector in list(self._collectors):
+            try:
+                collector()
+            except Exception as e:
+                logger.error(e, exc_info=True)
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "crm_http_requests", "HTTP requests handled, by route template and status.", ("method", "route", "status")
+)
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "crm_http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route")
+)
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "crm_http_requests_in_flight", "HTTP requests currently being served.", ("method", "route")
+)
+ADMISSION_QUEUE_SECONDS = REGISTRY.histogram(
+    "crm_admission_queue_seconds", "Time admitted requests waited for a slot, by route group.", ("group",)
+)
+ADMISSION_SHED = REGISTRY.counter(
+    "crm_admission_shed", "Requests rejected with 503 by admission control, by route group and reason.", ("group", "reason")
+)
+ADMISSION_ACTIVE = REGISTRY.gauge("crm_admission_active", "Requests holding an admission slot.", ("group",))
+ADMISSION_QUEUED = REGISTRY.gauge("crm_admission_queued", "Requests waiting for an admission slot.", ("group",))
+SERVICE_OPERATION_DURATION = REGISTRY.histogram(
+    "crm_service_operation_duration_seconds",
+    "ReportService/DocumentService method latency.",
+    ("operation", "outcome"),
+)
+SINGLE_FLIGHT_CALLS = REGISTRY.counter(
+    "crm_single_flight_calls",
+    "Calls to coalesced service operations; role 'coalesced' waited on another call's execution,"
+    " 'timeout' then gave up waiting and executed itself.",
+    ("operation", "role"),
+)
+REPORT_CACHE_REQUESTS = REGISTRY.counter(
+    "crm_report_cache_requests", "Report cache lookups by result: hit, stale or miss.", ("report", "result")
+)
+REPORT_CACHE_REFRESHES = REGISTRY.counter(
+    "crm_report_cache_refreshes", "Background report refreshes by outcome.", ("report", "outcome")
+)
+CACHE_BACKEND_ERRORS = REGISTRY.counter(
+    "crm_cache_backend_errors", "Cache backend operations that failed and were treated as misses.", ("operation",)
+)
+DB_QUERIES = REGISTRY.counter(
+    "crm_db_queries", "SQL statements executed, by calling service operation.", ("engine", "operation", "statement")
+)
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "crm_db_query_duration_seconds",
+    "SQL statement execution time, by calling service operation.",
+    ("engine", "operation", "statement"),
+    buckets=DB_BUCKETS,
+)
+DB_POOL_CHECKOUTS = REGISTRY.counter("crm_db_pool_checkouts", "Connections checked out of the pool.", ("engine",))
+DB_POOL_CHECKOUT_DURATION = REGISTRY.histogram(
+    "crm_db_pool_checkout_duration_seconds",
+    "Time a pooled connection stayed checked out before being returned.",
+    ("engine",),
+    buckets=DB_BUCKETS,
+)
+DB_POOL_CONNECTS = REGISTRY.counter("crm_db_pool_connects", "New DBAPI connections opened by the pool.", ("engine",))
+DB_POOL_CHECKED_OUT = REGISTRY.gauge("crm_db_pool_checked_out", "Connections currently checked out.", ("engine",))
+DB_POOL_SIZE = REGISTRY.gauge("crm_db_pool_size", "Configured pool size.", ("engine",))
+DB_POOL_OVERFLOW = REGISTRY.gauge("crm_db_pool_overflow", "Connections open beyond the pool size.", ("engine",))
+DB_READ_ROUTING = REGISTRY.counter(
+    "crm_db_read_routing", "Replica-eligible reads by the engine that served them.", ("target",)
+)
+DB_REPLICA_LAG = REGISTRY.gauge("crm_db_replica_lag_seconds", "Last measured replication lag of the read replica.")
+DOCUMENT_BYTES = REGISTRY.counter(
+    "crm_document_bytes", "Document bytes transferred by DocumentService.", ("direction", "file_type")
+)
+LIVE_SUBSCRIBERS = REGISTRY.gauge("crm_live_subscribers", "Open live metric (SSE) streams.")
+LIVE_EVENTS_PUBLISHED = REGISTRY.counter(
+    "crm_live_events_published", "Metric row changes published to live subscribers.", ("report",)
+)
+INGEST_ROWS = REGISTRY.counter("crm_ingest_rows", "Metric rows upserted by bulk ingestion.", ("report",))
+INGEST_SECONDS = REGISTRY.histogram(
+    "crm_ingest_seconds", "Duration of bulk ingestion requests (validation excluded).", ("report",)
+)
+
+
+def _statement_kind(statement: str) -> str:
+    head = statement.lstrip().split(None, 1)
+    kind = head[0].upper() if head else ""
+    if kind in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH"):
+        return kind
+    return "OTHER"
+
+
+def instrument_engine(engine: Engine, name: str = "primary") -> Engine:
+    """Attach query and pool instrumentation to ``engine`` (idempotent)."""
+    if getattr(engine, "_crm_metrics_instrumented", False):
+        return engine
+    engine._crm_metrics_instrumented = True
+
+    # imported here to avoid a cycle: operations records into this module's metrics
+    from crm_svc.utils.operations import get_current_operation
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("crm_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("crm_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        labels = (name, get_current_operation() or "none", _statement_kind(statement))
+        DB_QUERIES.labels(*labels).inc()
+        DB_QUERY_DURATION.labels(*labels).observe(elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("crm_query_start"):
+            conn.info["crm_query_start"].pop()
+
+    # pool listeners are carried over to the new pool by engine.dispose() / pool.recreate()
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        DB_POOL_CONNECTS.labels(name).inc()
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKOUTS.labels(name).inc()
+        connection_record.info["crm_checkout_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("crm_checkout_at", None)
+        if checked_out_at is not None:
+            DB_POOL_CHECKOUT_DURATION.labels(name).observe(time.perf_counter() - checked_out_at)
+
+    def _collect_pool_stats() -> None:
+        current = engine.pool
+        if isinstance(current, QueuePool):
+            DB_POOL_SIZE.labels(name).set(current.size())
+            DB_POOL_OVERFLOW.labels(name).set(max(0, current.overflow()))
+            DB_POOL_CHECKED_OUT.labels(name).set(current.checkedout())
+
+    REGISTRY.add_collector(_collect_pool_stats)
+    return engine
@@ -0,0 +1,49 @@
+import functools
+import logging
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional, TypeVar
+
+from crm_svc.utils.metrics import SERVICE_OPERATION_DURATION
+from crm_svc.utils.tracing import start_span
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable)
+
+# name of the service operation currently executing, e.g. "report.sales_performance"
+_current_operation: ContextVar[Optional[str]] = ContextVar("crm_current_operation", default=None)
+
+
+def get_current_operation() -> Optional[str]:
+    """Return the innermost service operation running in this context, if any."""
+    return _current_operation.get()
+
+
+def track_operation(name: str) -> Callable[[F], F]:
+    """Decorate a service method so its latency is recorded and nested work is labelled.
+
+    The operation name is exposed through get_current_operation() for the
+    duration of the call, which lets the SQL instrumentation attribute
+    statements to the report or document operation that issued them. Inside a
+    sampled request the call is also recorded as a tracing span.
+    """
+
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            token = _current_operation.set(name)
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                with start_span(name):
+                    result = fn(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                SERVICE_OPERATION_DURATION.labels(name, outcome).observe(time.perf_counter() - started)
+                _current_operation.reset(token)
+
+        return wrapper
+
+    return decorator
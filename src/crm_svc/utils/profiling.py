@@ -0,0 +1,163 @@
+"""Statistical CPU and allocation profiling for a single request.
+
+StackSampler polls ``sys._current_frames()`` from a background thread and
+aggregates the stacks of threads executing crm_svc code into the folded
+format understood by flamegraph.pl, speedscope and inferno. Allocation
+statistics come from tracemalloc. Sync endpoints run in a threadpool, so the
+sampler cannot pin a single thread; stacks of concurrent requests may appear
+in the same profile.
+"""
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Optional
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ALLOC_TOP_N = 25
+
+_profile_lock = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+
+class StackSampler:
+    """Sample the stacks of threads running crm_svc code every ``interval`` seconds."""
+
+    def __init__(self, interval: float = 0.002, package_dir: str = PACKAGE_DIR):
+        self.interval = interval
+        self.package_dir = package_dir
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="crm-profiler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _sample_once(self) -> None:
+        own_id = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            labels: List[str] = []
+            in_package = False
+            while frame is not None:
+                if frame.f_code.co_filename.startswith(self.package_dir):
+                    in_package = True
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            if in_package:
+                self.stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._sample_once()
+            self._stop.wait(self.interval)
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class RequestProfile:
+    """Context for one profiled request; only one profile runs at a time per process."""
+
+    def __init__(self, interval: float):
+        self.sampler = StackSampler(interval)
+        self.started_tracemalloc = False
+        self.alloc_snapshot: Optional[tracemalloc.Snapshot] = None
+        self.wall_seconds = 0.0
+        self._started = 0.0
+
+    @classmethod
+    def try_start(cls, interval: float) -> Optional["RequestProfile"]:
+        if not _profile_lock.acquire(blocking=False):
+            return None
+        profile = cls(interval)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(16)
+            profile.started_tracemalloc = True
+        profile._started = time.perf_counter()
+        profile.sampler.start()
+        return profile
+
+    def stop(self) -> None:
+        try:
+            self.sampler.stop()
+            self.wall_seconds = time.perf_counter() - self._started
+            self.alloc_snapshot = tracemalloc.take_snapshot().filter_traces(
+                (
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                    tracemalloc.Filter(False, __file__),
+                )
+            )
+            if self.started_tracemalloc:
+                tracemalloc.stop()
+        finally:
+            _profile_lock.release()
+
+    def allocation_summary(self, top_n: int = ALLOC_TOP_N) -> str:
+        if self.alloc_snapshot is None:
+            return ""
+        stats = self.alloc_snapshot.statistics("lineno")
+        total = sum(s.size for s in stats)
+        lines = [f"# live allocations traced during request: {total} bytes in {sum(s.count for s in stats)} blocks"]
+        for stat in stats[:top_n]:
+            frame = stat.traceback[0]
+            lines.append(f"{stat.size:>12} B {stat.count:>8} blocks  {frame.filename}:{frame.lineno}")
+        return "\n".join(lines) + "\n"
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", value).strip("_")[:60] or "root"
+
+
+def new_profile_id(method: str, route: str) -> str:
+    """Return a sortable, filesystem-safe id used as the stem of the profile files."""
+    return f"{time.strftime('%Y%m%dT%H%M%S')}_{time.time_ns() % 1_000_000_000:09d}_{method}_{_slug(route)}"
+
+
+def write_profile(profile: RequestProfile, output_dir: str, profile_id: str, max_files: int) -> None:
+    """Write ``<id>.folded`` and ``<id>.alloc.txt`` and prune the oldest profiles."""
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, profile_id)
+    with open(base + ".folded", "w") as f:
+        f.write(profile.sampler.folded())
+    with open(base + ".alloc.txt", "w") as f:
+        f.write(f"# wall_ms={profile.wall_seconds * 1000:.3f} samples={profile.sampler.samples}\n")
+        f.write(profile.allocation_summary())
+    _rotate(output_dir, max_files)
+
+
+def _rotate(output_dir: str, max_files: int) -> None:
+    stems: Dict[str, float] = {}
+    for name in os.listdir(output_dir):
+        if name.endswith(".folded"):
+            stem = name[: -len(".folded")]
+            try:
+                stems[stem] = os.path.getmtime(os.path.join(output_dir, name))
+            except OSError:
+                continue
+    excess = len(stems) - max(1, max_files)
+    if excess <= 0:
+        return
+    for stem, _ in sorted(stems.items(), key=lambda item: (item[1], item[0]))[:excess]:
+        for suffix in (".folded", ".alloc.txt"):
+            try:
+                os.remove(os.path.join(output_dir, stem + suffix))
+            except OSError:
+                pass
@@ -0,0 +1,86 @@
+import hashlib
+import logging
+from typing import Any, Mapping, Optional
+
+import orjson
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+
+logger = logging.getLogger(__name__)
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+class ORJSONModelResponse(JSONResponse):
+    """JSON response rendered with orjson, with a direct path for pydantic models.
+
+    Pydantic models are serialized by their compiled core serializer, which
+    skips FastAPI's model_dump -> re-validate -> jsonable_encoder round trip.
+    Any other content (dicts, lists, error payloads) is rendered with orjson.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return orjson.dumps(content, option=_ORJSON_OPTIONS)
+
+
+def model_response(
+    model: BaseModel,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+    background: Optional[BackgroundTask] = None,
+) -> ORJSONModelResponse:
+    """Wrap an already validated response model so FastAPI returns it as is.
+
+    Routes keep their ``response_model`` for the OpenAPI schema; returning a
+    Response instance tells FastAPI not to serialize the value again.
+    """
+    return ORJSONModelResponse(model, status_code=status_code, headers=headers, background=background)
+
+
+# Clients may reuse a representation only after revalidating it with If-None-Match.
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+def compute_etag(body: bytes) -> str:
+    """Return a strong ETag derived from the rendered response body."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Apply the weak comparison RFC 9110 prescribes for If-None-Match."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def conditional_model_response(
+    request: Request, model: BaseModel, status_code: int = 200, headers: Optional[Mapping[str, str]] = None
+) -> Response:
+    """Like model_response, but tagged with an ETag and answered with 304 when unchanged.
+
+    The body is still rendered to compute the tag; a match saves the transfer
+    and the client's parse, which dominate for large report payloads.
+    ``headers`` are sent with either response.
+    """
+    response = model_response(model, status_code=status_code)
+    etag = compute_etag(response.body)
+    headers = {**(headers or {}), "ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return response
@@ -0,0 +1,165 @@
+"""Slow-query log with optional, rate-limited EXPLAIN capture.
+
+Statements slower than a threshold are logged as one JSON object per line
+with redacted bound parameters, the duration and the service operation that
+issued them. When enabled, the plan for slow SELECTs is captured with
+``EXPLAIN`` (PostgreSQL) or ``EXPLAIN QUERY PLAN`` (SQLite) on the same
+connection; a token bucket and a per-statement cooldown keep plan capture
+from adding meaningful load to the database.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from crm_svc.utils.operations import get_current_operation
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_PREFIXES = {
+    "postgresql": "EXPLAIN",
+    "sqlite": "EXPLAIN QUERY PLAN",
+}
+# same statement text is explained at most once per cooldown window
+EXPLAIN_COOLDOWN_SECONDS = 60.0
+MAX_STATEMENT_CHARS = 4000
+
+
+def redact_value(value: Any) -> Any:
+    """Replace a bound parameter with a description of its type and size."""
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (str, bytes, bytearray)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    if isinstance(value, (list, tuple, set)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact_parameters(parameters: Any) -> Any:
+    if parameters is None:
+        return None
+    if isinstance(parameters, dict):
+        return {k: redact_value(v) for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            # executemany: summarise the first row only
+            return {"rows": len(parameters), "first": redact_parameters(parameters[0])}
+        return [redact_value(v) for v in parameters]
+    return redact_value(parameters)
+
+
+class _TokenBucket:
+    def __init__(self, per_minute: int):
+        self.capacity = max(0, per_minute)
+        self.tokens = float(self.capacity)
+        self.rate = self.capacity / 60.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class SlowQueryLog:
+    """Engine listener that logs statements slower than ``threshold_ms``."""
+
+    def __init__(self, threshold_ms: float, explain: bool = False, explain_per_minute: int = 6):
+        self.threshold_seconds = threshold_ms / 1000.0
+        self.explain = explain
+        self._bucket = _TokenBucket(explain_per_minute)
+        self._explained_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def install(self, engine: Engine) -> Engine:
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+        return engine
+
+    def _handle_error(self, exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("crm_slow_query_start"):
+            conn.info["crm_slow_query_start"].pop()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("crm_slow_query_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("crm_slow_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if elapsed < self.threshold_seconds:
+            return
+        try:
+            entry = {
+                "duration_ms": round(elapsed * 1000, 3),
+                "operation": get_current_operation(),
+                "dialect": conn.dialect.name,
+                "statement": statement[:MAX_STATEMENT_CHARS],
+                "parameters": redact_parameters(parameters),
+                "executemany": bool(executemany),
+            }
+            if self.explain and not executemany and self._should_explain(conn.dialect.name, statement):
+                entry["plan"] = self._capture_plan(conn, statement, parameters)
+            logger.warning("slow_query %s", orjson.dumps(entry, default=str).decode("utf-8"))
+        except Exception as e:
+            logger.error(e, exc_info=True)
+
+    def _should_explain(self, dialect_name: str, statement: str) -> bool:
+        if dialect_name not in EXPLAIN_PREFIXES:
+            return False
+        # EXPLAIN of a write would still plan it, but only reads are worth the round trip
+        if not statement.lstrip()[:6].upper().startswith(("SELECT", "WITH")):
+            return False
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained_at.get(statement)
+            if last is not None and now - last < EXPLAIN_COOLDOWN_SECONDS:
+                return False
+            if not self._bucket.acquire():
+                return False
+            self._explained_at[statement] = now
+            if len(self._explained_at) > 1024:
+                cutoff = now - EXPLAIN_COOLDOWN_SECONDS
+                self._explained_at = {k: v for k, v in self._explained_at.items() if v >= cutoff}
+        return True
+
+    def _capture_plan(self, conn, statement: str, parameters: Any) -> Optional[List[str]]:
+        prefix = EXPLAIN_PREFIXES[conn.dialect.name]
+        # use a raw DBAPI cursor so the EXPLAIN itself does not re-enter these listeners
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            if parameters:
+                cursor.execute(f"{prefix} {statement}", parameters)
+            else:
+                cursor.execute(f"{prefix} {statement}")
+            return [" | ".join(str(col) for col in row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.debug("EXPLAIN failed: %s", e)
+            return None
+        finally:
+            cursor.close()
+
+
+def install_slow_query_log(
+    engine: Engine, threshold_ms: float, explain: bool = False, explain_per_minute: int = 6
+) -> Optional[SlowQueryLog]:
+    """Attach a SlowQueryLog to ``engine``; a negative threshold disables it."""
+    if threshold_ms < 0:
+        return None
+    slow_log = SlowQueryLog(threshold_ms, explain=explain, explain_per_minute=explain_per_minute)
+    slow_log.install(engine)
+    return slow_log
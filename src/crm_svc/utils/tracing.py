@@ -0,0 +1,351 @@
+"""Lightweight request tracing.
+
+A root span is opened per HTTP request by TracingMiddleware; service
+operations, SQL statements and storage reads/writes open child spans while a
+sampled span is active. Unsampled requests pay for one ContextVar lookup per
+instrumented call and nothing is recorded.
+
+Trace context follows the W3C ``traceparent`` header. Finished spans are
+handed to a background BatchSpanProcessor which calls the configured
+SpanExporter, so exporting never blocks a request.
+"""
+import importlib
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_HEADER = "traceparent"
+MAX_STATEMENT_CHARS = 1000
+
+
+class SpanContext:
+    __slots__ = ("trace_id", "span_id", "sampled")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    def to_traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[SpanContext]:
+    """Parse a W3C ``traceparent`` header, returning None when it is absent or malformed."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) < 4:
+        return None
+    version, trace_id, span_id, flags = parts[0], parts[1], parts[2], parts[3]
+    try:
+        if len(version) != 2 or version == "ff" or len(trace_id) != 32 or len(span_id) != 16 or len(flags) != 2:
+            return None
+        int(trace_id, 16), int(span_id, 16)
+        sampled = bool(int(flags, 16) & 0x01)
+    except ValueError:
+        return None
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return SpanContext(trace_id.lower(), span_id.lower(), sampled)
+
+
+def _new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+class Span:
+    __slots__ = ("name", "context", "parent_span_id", "start_ns", "end_ns", "attributes", "status", "_token")
+
+    def __init__(self, name: str, context: SpanContext, parent_span_id: Optional[str] = None):
+        self.name = name
+        self.context = context
+        self.parent_span_id = parent_span_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = {}
+        self.status = "ok"
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_span_id": self.parent_span_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class SpanExporter:
+    """Base class for span exporters; ``export`` is called from a background thread."""
+
+    def export(self, spans: List[Span]) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        return None
+
+
+class NoopSpanExporter(SpanExporter):
+    def export(self, spans: List[Span]) -> None:
+        return None
+
+
+class LoggingSpanExporter(SpanExporter):
+    def export(self, spans: List[Span]) -> None:
+        for span in spans:
+            logger.info("span %s", orjson.dumps(span.to_dict(), default=str).decode("utf-8"))
+
+
+class JsonFileSpanExporter(SpanExporter):
+    """Append spans as JSON lines to a local file for offline analysis."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        payload = b"".join(orjson.dumps(s.to_dict(), default=str) + b"\n" for s in spans)
+        with self._lock:
+            with open(self.path, "ab") as f:
+                f.write(payload)
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps exported spans in a list; intended for tests."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, spans: List[Span]) -> None:
+        self.spans.extend(spans)
+
+
+class BatchSpanProcessor:
+    """Queues finished spans and exports them in batches from a daemon thread."""
+
+    def __init__(self, exporter: SpanExporter, max_queue_size: int = 10000, batch_size: int = 512, interval: float = 1.0):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=max_queue_size)
+        self._flush_lock = threading.Lock()
+        self.dropped = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="crm-span-exporter", daemon=True)
+        self._thread.start()
+
+    def on_end(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self) -> List[Span]:
+        batch: List[Span] = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def force_flush(self) -> None:
+        with self._flush_lock:
+            while True:
+                batch = self._drain()
+                if not batch:
+                    return
+                try:
+                    self.exporter.export(batch)
+                except Exception as e:
+                    logger.error(e, exc_info=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.force_flush()
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self.force_flush()
+        self.exporter.shutdown()
+
+
+class Tracer:
+    def __init__(self, exporter: Optional[SpanExporter] = None, sample_rate: float = 0.0):
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.processor = BatchSpanProcessor(exporter or NoopSpanExporter())
+
+    @property
+    def exporter(self) -> SpanExporter:
+        return self.processor.exporter
+
+    def should_sample(self, parent: Optional[SpanContext]) -> bool:
+        # parent-based: honour the caller's decision, otherwise sample by ratio
+        if parent is not None:
+            return parent.sampled
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start_root_span(self, name: str, parent: Optional[SpanContext] = None) -> Optional[Span]:
+        """Start a request span, or return None when the request is not sampled."""
+        if not self.should_sample(parent):
+            return None
+        trace_id = parent.trace_id if parent is not None else _new_trace_id()
+        span = Span(name, SpanContext(trace_id, _new_span_id(), True), parent.span_id if parent else None)
+        span._token = _current_span.set(span)
+        return span
+
+    def start_child_span(self, name: str) -> Optional[Span]:
+        parent = _current_span.get()
+        if parent is None:
+            return None
+        span = Span(name, SpanContext(parent.context.trace_id, _new_span_id(), True), parent.context.span_id)
+        span._token = _current_span.set(span)
+        return span
+
+    def end_span(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        if span._token is not None:
+            try:
+                _current_span.reset(span._token)
+            except ValueError:
+                # ended from a different context (e.g. SQL events); just restore the parent
+                pass
+            span._token = None
+        self.processor.on_end(span)
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("crm_current_span", default=None)
+
+
+def get_current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def _build_exporter(name: str, path: str) -> SpanExporter:
+    if name in ("", "none"):
+        return NoopSpanExporter()
+    if name == "log":
+        return LoggingSpanExporter()
+    if name == "file":
+        return JsonFileSpanExporter(path)
+    module_name, _, attr = name.partition(":")
+    factory = getattr(importlib.import_module(module_name), attr)
+    return factory()
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Return the process tracer, building it from config on first use."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                from crm_svc.config import TRACE_EXPORT_PATH, TRACE_EXPORTER, TRACE_SAMPLE_RATE
+
+                try:
+                    exporter = _build_exporter(TRACE_EXPORTER, TRACE_EXPORT_PATH)
+                except Exception as e:
+                    logger.error(e, exc_info=True)
+                    exporter = NoopSpanExporter()
+                _tracer = Tracer(exporter, TRACE_SAMPLE_RATE)
+    return _tracer
+
+
+def configure_tracing(exporter: Optional[SpanExporter] = None, sample_rate: float = 0.0) -> Tracer:
+    """Replace the process tracer, e.g. to plug in a custom exporter."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is not None:
+            _tracer.processor.shutdown()
+        _tracer = Tracer(exporter, sample_rate)
+    return _tracer
+
+
+@contextmanager
+def start_span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Open a child span of the active span; a no-op outside sampled requests."""
+    if _current_span.get() is None:
+        yield None
+        return
+    tracer = get_tracer()
+    span = tracer.start_child_span(name)
+    if span is not None and attributes:
+        span.attributes.update(attributes)
+    try:
+        yield span
+    except BaseException:
+        if span is not None:
+            span.status = "error"
+        raise
+    finally:
+        if span is not None:
+            tracer.end_span(span)
+
+
+def instrument_engine_tracing(engine: Engine) -> Engine:
+    """Open a ``db.query`` span around every statement executed in a sampled request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current_span.get() is None:
+            return
+        span = get_tracer().start_child_span("db.query")
+        if span is None:
+            return
+        span.attributes["db.system"] = conn.dialect.name
+        span.attributes["db.statement"] = statement[:MAX_STATEMENT_CHARS]
+        conn.info.setdefault("crm_trace_spans", []).append(span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("crm_trace_spans")
+        if spans:
+            get_tracer().end_span(spans.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        spans = conn.info.get("crm_trace_spans") if conn is not None else None
+        if spans:
+            span = spans.pop()
+            span.status = "error"
+            get_tracer().end_span(span)
+
+    return engine
@@ -0,0 +1,33 @@
+import uuid
+
+from crm_svc.models import Customer, CustomerDocumentUsage
+
+
+def test_customer_usage_reads_counters(client, db_session):
+    customer_id = str(uuid.uuid4())
+    db_session.add(Customer(id=customer_id))
+    db_session.add_all(
+        [
+            CustomerDocumentUsage(customer_id=customer_id, file_type="*", document_count=3, total_bytes=300),
+            CustomerDocumentUsage(customer_id=customer_id, file_type="image/png", document_count=2, total_bytes=100),
+            CustomerDocumentUsage(customer_id=customer_id, file_type="application/pdf", document_count=1, total_bytes=200),
+        ]
+    )
+    db_session.commit()
+
+    resp = client.get(f"/api/customers/{customer_id}/usage")
+    assert resp.status_code == 200
+    j = resp.json()
+    assert (j["document_count"], j["total_bytes"]) == (3, 300)
+    assert j["bytes_by_file_type"] == {"image/png": 100, "application/pdf": 200}
+    assert j["max_documents"] is None
+
+
+def test_customer_usage_for_unknown_customer_is_zero(client):
+    resp = client.get(f"/api/customers/{uuid.uuid4()}/usage")
+    assert resp.status_code == 200
+    assert resp.json()["document_count"] == 0
+
+
+def test_customer_usage_rejects_invalid_id(client):
+    assert client.get("/api/customers/not-a-uuid/usage").status_code == 422
@@ -0,0 +1,79 @@
+import json
+
+
+def _row(day, revenue=10.0):
+    return {
+        "start_date": f"2024-03-{day:02d}",
+        "end_date": f"2024-03-{day:02d}",
+        "revenue": revenue,
+        "conversion_rate": 0.2,
+        "pipeline_velocity": 1.5,
+    }
+
+
+def test_ingest_json_array(client):
+    resp = client.post("/api/ingest/sales", json=[_row(d) for d in range(1, 11)])
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["report"] == "sales"
+    assert body["received"] == body["written"] == 10
+    assert body["rows_per_second"] >= 0
+
+    report = client.get("/api/sales-performance", params={"start_date": "2024-03-01", "end_date": "2024-03-01"})
+    assert report.json()["revenue"] == 10.0
+
+
+def test_ingest_ndjson_retry_is_idempotent(client):
+    payload = "\n".join(json.dumps(_row(d, revenue=42.0)) for d in range(1, 4)) + "\n"
+    headers = {"content-type": "application/x-ndjson"}
+    for written in (3, 0):
+        resp = client.post("/api/ingest/sales", content=payload, headers=headers)
+        assert resp.status_code == 200
+        # the retry finds every row unchanged
+        assert resp.json()["written"] == written
+
+    report = client.get("/api/sales-performance", params={"start_date": "2024-03-02", "end_date": "2024-03-02"})
+    assert report.json()["revenue"] == 42.0
+
+
+def test_ingest_rows_envelope(client):
+    resp = client.post("/api/ingest/sales", json={"rows": [_row(5)]})
+    assert resp.status_code == 200
+    assert resp.json()["written"] == 1
+
+
+def test_ingest_invalid_rows_return_422(client):
+    bad = _row(1)
+    del bad["revenue"]
+    resp = client.post("/api/ingest/sales", json=[_row(2), bad])
+    assert resp.status_code == 422
+    assert resp.json()["detail"][0]["loc"] == [1, "revenue"]
+
+
+def test_ingest_inverted_range_returns_400(client):
+    row = _row(5)
+    row["end_date"] = "2024-03-01"
+    resp = client.post("/api/ingest/sales", json=[row])
+    assert resp.status_code == 400
+
+
+def test_ingest_unknown_report_returns_422(client):
+    resp = client.post("/api/ingest/unknown", json=[])
+    assert resp.status_code == 422
+
+
+def test_ingest_oversized_body_rejected_before_parsing(client, monkeypatch):
+    from crm_svc.routers import ingestion
+
+    def fail(*args):
+        raise AssertionError("an oversized body must not be parsed")
+
+    monkeypatch.setattr(ingestion, "INGEST_MAX_BYTES", 64)
+    monkeypatch.setattr(ingestion, "parse_rows", fail)
+    payload = json.dumps([_row(d) for d in range(1, 4)])
+    resp = client.post("/api/ingest/sales", content=payload, headers={"content-type": "application/json"})
+    assert resp.status_code == 413
+
+    # without a Content-Length the body is counted as it streams in
+    resp = client.post("/api/ingest/sales", content=iter([payload.encode()]))
+    assert resp.status_code == 413
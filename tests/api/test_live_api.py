@@ -0,0 +1,64 @@
+import asyncio
+import json
+from datetime import date
+
+from crm_svc.routers.live import metric_event_stream
+from crm_svc.utils.events import MetricChange, bus
+
+
+def _events(chunks):
+    events = []
+    for chunk in chunks:
+        fields = dict(line.split(": ", 1) for line in chunk.decode().splitlines() if line and not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_stream_pushes_merged_deltas_and_heartbeats():
+    async def scenario():
+        stream = metric_event_stream(date(2024, 1, 1), date(2024, 1, 31), heartbeat_seconds=0.05)
+        chunks = [await stream.__anext__()]
+        assert chunks[0].startswith(b"retry: ")
+
+        chunks.append(await stream.__anext__())
+        assert chunks[-1] == b": keep-alive\n\n"
+
+        for revenue in (1.0, 2.0):
+            bus.publish([MetricChange("sales", "upsert", date(2024, 1, 5), date(2024, 1, 5), {"revenue": revenue})])
+        await asyncio.sleep(0.01)
+        chunks.append(await stream.__anext__())
+        await stream.aclose()
+        return chunks
+
+    chunks = asyncio.run(scenario())
+    (name, data), = _events(chunks)
+    assert name == "metrics"
+    # both commits arrive in one message
+    assert [d["values"]["revenue"] for d in data] == [1.0, 2.0]
+    assert data[0]["start_date"] == "2024-01-05"
+
+
+def test_subscription_lives_as_long_as_the_stream():
+    before = len(bus._subscribers)
+
+    async def scenario():
+        # a client gone before the body started: the stream is never iterated
+        metric_event_stream(date(2024, 1, 1), date(2024, 1, 31))
+        assert len(bus._subscribers) == before
+
+        stream = metric_event_stream(date(2024, 1, 1), date(2024, 1, 31), {"sales"}, heartbeat_seconds=0.05)
+        await stream.__anext__()
+        assert len(bus._subscribers) == before + 1
+        await stream.aclose()
+
+    asyncio.run(scenario())
+    assert len(bus._subscribers) == before
+
+
+def test_unknown_report_rejected(client):
+    resp = client.get(
+        "/api/live/metrics",
+        params={"start_date": "2024-01-01", "end_date": "2024-01-31", "reports": "sales,bogus"},
+    )
+    assert resp.status_code == 422
@@ -0,0 +1,22 @@
+def test_metrics_endpoint_reports_route_latency(client):
+    resp = client.get(
+        "/api/sales-performance",
+        params={"start_date": "2023-01-01", "end_date": "2023-01-05"},
+    )
+    assert resp.status_code == 200
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain")
+    body = metrics.text
+    assert 'crm_http_request_duration_seconds_count{method="GET",route="/api/sales-performance"}' in body
+    assert 'crm_http_requests_total{method="GET",route="/api/sales-performance",status="200"}' in body
+    assert 'crm_http_requests_in_flight{method="GET",route="/api/sales-performance"} 0' in body
+    assert 'crm_service_operation_duration_seconds_count{operation="report.sales_performance",outcome="ok"}' in body
+
+
+def test_metrics_use_route_template_for_unknown_paths(client):
+    client.get("/does-not-exist/123")
+    body = client.get("/metrics").text
+    assert 'route="unmatched"' in body
+    assert "/does-not-exist/123" not in body
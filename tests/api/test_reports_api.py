@@ -93,3 +93,35 @@ def test_invalid_date_range_returns_422(client):
         params={"start_date": "2023-07-10", "end_date": "2023-07-01", "report_type": "sales"},
     )
     assert resp2.status_code == 422
+
+
+def test_sales_series_downsampled_to_target(client):
+    resp = client.get(
+        "/api/sales-performance/series",
+        params={"start_date": "2020-01-01", "end_date": "2023-12-31", "target": 200},
+    )
+    assert resp.status_code == 200
+    j = resp.json()
+    assert j["source_points"] == 1461
+    assert len(j["dates"]) == len(j["revenue"]) == 200
+    assert j["dates"][0] == "2020-01-01" and j["dates"][-1] == "2023-12-31"
+    assert j["method"] == "lttb"
+
+
+def test_sales_series_rejects_out_of_range_target(client):
+    resp = client.get(
+        "/api/sales-performance/series",
+        params={"start_date": "2020-01-01", "end_date": "2020-02-01", "target": 1},
+    )
+    assert resp.status_code == 422
+
+
+def test_pipeline_funnel_ok(client):
+    resp = client.get(
+        "/api/pipeline-analytics/funnel",
+        params={"start_date": "2023-01-01", "end_date": "2023-01-31"},
+    )
+    assert resp.status_code == 200
+    j = resp.json()
+    assert j["start_date"] == "2023-01-01"
+    assert j["stages"] == []
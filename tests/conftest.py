@@ -39,4 +39,16 @@ def client(session_local):
     with TestClient(app) as c:
         yield c
     app.dependency_overrides[get_db] = get_db
-# DO NOT MODIFY SECTION END
\ No newline at end of file
+# DO NOT MODIFY SECTION END
+
+@pytest.fixture(autouse=True)
+def clear_report_cache():
+    # cached reports and documents must not leak between tests that reuse the same keys
+    from crm_svc.services.report_cache import report_cache
+    from crm_svc.utils.cache import MemoryBackend, set_cache_backend
+
+    set_cache_backend(MemoryBackend())
+    report_cache.clear()
+    yield
+    report_cache.wait_for_refreshes()
+    set_cache_backend(None)
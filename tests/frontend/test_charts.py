@@ -9,6 +9,9 @@ from crm_svc.schemas.report import (
     PipelineAnalyticsResponse,
 )
 from crm_svc.frontend.components.charts import (
+    LAYOUT_TEMPLATES,
+    FigureCache,
+    figure_cache,
     create_sales_performance_chart,
     create_team_productivity_chart,
     create_customer_interaction_chart,
@@ -98,3 +101,40 @@ def test_create_pipeline_analytics_chart_empty():
     assert isinstance(fig, go.Figure)
     # when empty, functions return a Figure with no data
     assert len(fig.data) == 0
+
+
+def _sales(revenue=100.0):
+    return SalesPerformanceResponse(
+        start_date=date(2025, 7, 1),
+        end_date=date(2025, 7, 31),
+        revenue=revenue,
+        conversion_rate=0.2,
+        pipeline_velocity=1.5,
+    )
+
+
+def test_figures_memoized_by_payload_and_variant():
+    figure_cache.clear()
+
+    desktop = create_sales_performance_chart(_sales())
+    # an equal payload from a new model instance reuses the built figure
+    assert create_sales_performance_chart(_sales()) is desktop
+    assert figure_cache.hits == 1
+
+    mobile = create_sales_performance_chart(_sales(), variant="mobile")
+    assert mobile is not desktop
+    assert mobile.layout.height == LAYOUT_TEMPLATES["mobile"]["height"]
+    assert desktop.layout.height == LAYOUT_TEMPLATES["desktop"]["height"]
+
+    changed = create_sales_performance_chart(_sales(revenue=101.0))
+    assert changed is not desktop
+    assert list(changed.data[0]["y"])[0] == 101.0
+
+
+def test_figure_cache_is_bounded():
+    cache = FigureCache(max_entries=2)
+    for i in range(3):
+        cache.put(i, go.Figure())
+    assert len(cache) == 2
+    assert cache.get(0) is None
+    assert cache.get(2) is not None
@@ -2,10 +2,19 @@ import importlib
 from datetime import date
 from types import SimpleNamespace
 
+import pytest
 import streamlit as st
 import httpx
 
 
+@pytest.fixture(autouse=True)
+def _fresh_shared_resources():
+    # the report cache and HTTP client are process-wide cache_resource singletons
+    st.cache_resource.clear()
+    yield
+    st.cache_resource.clear()
+
+
 def _make_spinner_recorder(record):
     class Spinner:
         def __init__(self, msg):
@@ -20,50 +29,78 @@ def _make_spinner_recorder(record):
     return Spinner
 
 
-def test_fetchers_use_cache_decorator(monkeypatch):
-    # patch streamlit.cache_data before importing module so decorator is applied
-    def fake_cache_data(fn):
-        fn._cached = True
-        return fn
+class _FakeClient:
+    """Stands in for the shared httpx.Client returned by get_http_client."""
 
-    monkeypatch.setattr(st, "cache_data", fake_cache_data)
+    def __init__(self, get):
+        self.get = get
 
-    # minimal st.spinner to avoid actual spinner behavior
-    monkeypatch.setattr(st, "spinner", lambda msg: _make_spinner_recorder([])(msg))
 
+def _response(payload, status_code=200, etag=None):
+    class Resp:
+        def __init__(self):
+            self.status_code = status_code
+            self.headers = {"etag": etag} if etag else {}
+
+        def raise_for_status(self):
+            return None
+
+        def json(self):
+            return payload
+
+    return Resp()
+
+
+def test_fetchers_serve_fresh_entries_and_revalidate_expired_ones(monkeypatch):
+    from crm_svc.frontend.utils.report_cache import ReportCache
+
+    monkeypatch.setattr(st, "spinner", lambda msg: _make_spinner_recorder([])(msg))
     mod = importlib.import_module("crm_svc.frontend.pages.dashboard")
     importlib.reload(mod)
 
-    assert getattr(mod.fetch_sales_performance_data, "_cached", False) is True
-    assert getattr(mod.fetch_team_productivity_data, "_cached", False) is True
-    assert getattr(mod.fetch_customer_interaction_data, "_cached", False) is True
-    assert getattr(mod.fetch_pipeline_analytics_data, "_cached", False) is True
+    now = [0.0]
+    cache = ReportCache(ttl_seconds=30, max_entries=8, clock=lambda: now[0])
+    monkeypatch.setattr(mod, "get_report_cache", lambda: cache)
 
+    sent_headers = []
 
-def test_fetchers_call_httpx_with_params(monkeypatch):
-    calls = []
+    def fake_get(url, params=None, headers=None):
+        sent_headers.append(headers)
+        if headers and headers.get("If-None-Match") == '"v1"':
+            return _response(None, status_code=304, etag='"v1"')
+        return _response({"revenue": 1.0}, etag='"v1"')
 
-    def fake_get(url, params=None, timeout=None):
-        calls.append((url, params, timeout))
+    monkeypatch.setattr(mod, "get_http_client", lambda: _FakeClient(fake_get))
+    sd, ed = date(2023, 1, 1), date(2023, 1, 2)
 
-        class Resp:
-            def raise_for_status(self):
-                return None
+    assert mod.fetch_sales_performance_data(sd, ed) == {"revenue": 1.0}
+    # within the TTL no request is made
+    assert mod.fetch_sales_performance_data(sd, ed) == {"revenue": 1.0}
+    assert sent_headers == [None]
 
-            def json(self):
-                return {"url": url, "params": params}
+    # once expired, a conditional request returns 304 and the cached payload is reused
+    now[0] = 31.0
+    assert mod.fetch_sales_performance_data(sd, ed) == {"revenue": 1.0}
+    assert sent_headers[-1] == {"If-None-Match": '"v1"'}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["revalidated"] == 1
+    assert cache.stats()["misses"] == 1
 
-        return Resp()
+
+def test_fetchers_call_httpx_with_params(monkeypatch):
+    calls = []
+
+    def fake_get(url, params=None, headers=None):
+        calls.append((url, params, headers))
+        return _response({"url": url, "params": params})
 
     # ensure decorator and spinner are stubbed
-    monkeypatch.setattr(st, "cache_data", lambda fn: fn)
     spinner_calls = []
     monkeypatch.setattr(st, "spinner", lambda msg: _make_spinner_recorder(spinner_calls)(msg))
 
-    monkeypatch.setattr(httpx, "get", fake_get)
-
     mod = importlib.import_module("crm_svc.frontend.pages.dashboard")
     importlib.reload(mod)
+    monkeypatch.setattr(mod, "get_http_client", lambda: _FakeClient(fake_get))
 
     sd = date(2023, 1, 1)
     ed = date(2023, 1, 10)
@@ -98,14 +135,12 @@ def test_fetchers_handle_http_errors(monkeypatch):
     def raise_http_status(*args, **kwargs):
         raise httpx.HTTPStatusError(message="err", request=None, response=None)
 
-    monkeypatch.setattr(st, "cache_data", lambda fn: fn)
     err_calls = []
     monkeypatch.setattr(st, "error", lambda msg: err_calls.append(msg))
 
-    monkeypatch.setattr(httpx, "get", raise_http_status)
-
     mod = importlib.import_module("crm_svc.frontend.pages.dashboard")
     importlib.reload(mod)
+    monkeypatch.setattr(mod, "get_http_client", lambda: _FakeClient(raise_http_status))
 
     sd = date(2023, 1, 1)
     ed = date(2023, 1, 2)
@@ -118,14 +153,12 @@ def test_fetchers_handle_request_errors(monkeypatch):
     def raise_request_error(*args, **kwargs):
         raise httpx.RequestError("network")
 
-    monkeypatch.setattr(st, "cache_data", lambda fn: fn)
     err_calls = []
     monkeypatch.setattr(st, "error", lambda msg: err_calls.append(msg))
 
-    monkeypatch.setattr(httpx, "get", raise_request_error)
-
     mod = importlib.import_module("crm_svc.frontend.pages.dashboard")
     importlib.reload(mod)
+    monkeypatch.setattr(mod, "get_http_client", lambda: _FakeClient(raise_request_error))
 
     sd = date(2023, 2, 1)
     ed = date(2023, 2, 2)
@@ -134,40 +167,119 @@ def test_fetchers_handle_request_errors(monkeypatch):
     assert any("Network error" in e or "Network error while fetching" in e for e in err_calls)
 
 
-def test_render_dashboard_displays_raw_json(monkeypatch):
-    # prepare stubbed responses
-    def fake_get(url, params=None, timeout=None):
-        class Resp:
-            def raise_for_status(self):
-                return None
+class _FakeTab:
+    def __init__(self, is_open):
+        self.open = is_open
 
-            def json(self):
-                return {"url": url, "params": params}
+    def __enter__(self):
+        return self
 
-        return Resp()
+    def __exit__(self, exc_type, exc, tb):
+        return False
 
-    # stub streamlit UI pieces
-    monkeypatch.setattr(st, "cache_data", lambda fn: fn)
-    displayed = {"json": []}
 
+def _stub_dashboard_ui(monkeypatch, tab_state, displayed):
+    # fragments are only executed inside a Streamlit runtime; run them inline
+    monkeypatch.setattr(st, "fragment", lambda fn=None, **kw: fn if fn is not None else (lambda f: f))
+    monkeypatch.setattr(st, "tabs", lambda labels, **kw: [_FakeTab(tab_state(label)) for label in labels])
     monkeypatch.setattr(st, "json", lambda payload: displayed["json"].append(payload))
+    monkeypatch.setattr(st, "subheader", lambda title: displayed["sections"].append(title))
+    # show raw data, but keep live mode (a background SSE connection) off
+    monkeypatch.setattr(st, "toggle", lambda label, key=None, **kw: key != "live_mode")
+    monkeypatch.setattr(st, "plotly_chart", lambda *a, **kw: None)
     monkeypatch.setattr(st, "info", lambda _msg: None)
     monkeypatch.setattr(st, "warning", lambda _msg: None)
     monkeypatch.setattr(st, "set_page_config", lambda **kw: None)
-
-    # stub date inputs and session auth
     monkeypatch.setitem(st.session_state, "authenticated", True)
     monkeypatch.setattr(st, "date_input", lambda *a, **kw: date(2023, 3, 1))
 
-    monkeypatch.setattr(httpx, "get", fake_get)
+
+def test_render_dashboard_renders_only_the_open_tab(monkeypatch):
+    calls = []
+
+    def fake_get(url, params=None, headers=None):
+        calls.append(url)
+        return _response({"url": url, "params": params})
+
+    displayed = {"json": [], "sections": []}
+    _stub_dashboard_ui(monkeypatch, lambda label: label == "Team Productivity", displayed)
+
+    mod = importlib.import_module("crm_svc.frontend.pages.dashboard")
+    importlib.reload(mod)
+    monkeypatch.setattr(mod, "get_http_client", lambda: _FakeClient(fake_get))
+
+    mod.render_dashboard()
+
+    assert displayed["sections"] == ["Team Productivity"]
+    assert calls == [f"{mod.BASE_URL}/team-productivity"]
+    assert len(displayed["json"]) == 1
+    assert "url" in displayed["json"][0] and "params" in displayed["json"][0]
+
+
+def test_render_dashboard_without_tab_state_renders_every_section(monkeypatch):
+    def fake_get(url, params=None, headers=None):
+        return _response({"url": url, "params": params})
+
+    displayed = {"json": [], "sections": []}
+    _stub_dashboard_ui(monkeypatch, lambda label: None, displayed)
 
     mod = importlib.import_module("crm_svc.frontend.pages.dashboard")
     importlib.reload(mod)
+    monkeypatch.setattr(mod, "get_http_client", lambda: _FakeClient(fake_get))
 
-    # call render
     mod.render_dashboard()
 
     # Four sections should have been displayed
     assert len(displayed["json"]) == 4
     for payload in displayed["json"]:
         assert "url" in payload and "params" in payload
+
+
+def test_fetch_all_report_data_runs_sections_concurrently(monkeypatch):
+    import threading
+    import time
+
+    mod = importlib.import_module("crm_svc.frontend.pages.dashboard")
+    importlib.reload(mod)
+
+    barrier = threading.Barrier(4, timeout=5)
+
+    def slow_get(url, params=None, headers=None):
+        # every request waits for the other three, so a sequential fetch would time out
+        barrier.wait()
+        time.sleep(0.05)
+        return _response({"url": url})
+
+    monkeypatch.setattr(mod, "get_http_client", lambda: _FakeClient(slow_get))
+
+    started = time.perf_counter()
+    results = mod.fetch_all_report_data(date(2023, 1, 1), date(2023, 1, 2))
+    elapsed = time.perf_counter() - started
+
+    assert set(results) == {"sales", "team", "customer", "pipeline"}
+    assert results["sales"]["url"].endswith("/sales-performance")
+    assert results["pipeline"]["url"].endswith("/pipeline-analytics")
+    assert elapsed < 0.5
+
+
+def test_http_client_is_shared_between_calls():
+    mod = importlib.import_module("crm_svc.frontend.pages.dashboard")
+    importlib.reload(mod)
+    client = mod.get_http_client()
+    try:
+        assert client is mod.get_http_client()
+        assert isinstance(client, httpx.Client)
+    finally:
+        client.close()
+
+
+def test_live_feeds_do_not_share_the_report_client():
+    mod = importlib.import_module("crm_svc.frontend.pages.dashboard")
+    importlib.reload(mod)
+    client, live_client = mod.get_http_client(), mod.get_live_http_client()
+    try:
+        assert live_client is not client
+        assert live_client is mod.get_live_http_client()
+    finally:
+        client.close()
+        live_client.close()
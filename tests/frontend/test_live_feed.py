@@ -0,0 +1,48 @@
+from crm_svc.frontend.utils.live_feed import LiveFeed, parse_sse
+
+
+def _feed():
+    # never started: tests drive apply() directly
+    return LiveFeed("http://test/api/live/metrics", "2024-01-01", "2024-01-31", client_factory=lambda: None)
+
+
+def test_parse_sse_skips_comments_and_joins_fields():
+    lines = ["retry: 1000", ": connected", "", "id: 3", "event: metrics", 'data: [{"a": 1}]', "", ": keep-alive", ""]
+    assert list(parse_sse(lines)) == [("metrics", '[{"a": 1}]')]
+
+
+def test_exact_range_delta_updates_payload_without_refetch():
+    feed = _feed()
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return {"start_date": "2024-01-01", "end_date": "2024-01-31", "revenue": 1.0}
+
+    assert feed.payload_for("sales", fetch)["revenue"] == 1.0
+    feed.apply(
+        "metrics",
+        [{"report": "sales", "op": "upsert", "start_date": "2024-01-01", "end_date": "2024-01-31", "values": {"revenue": 9.0}}],
+    )
+    assert feed.payload_for("sales", fetch)["revenue"] == 9.0
+    assert len(fetches) == 1
+    assert feed.version == 1
+
+
+def test_overlapping_change_and_resync_mark_payload_stale():
+    feed = _feed()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {"revenue": float(len(calls))}
+
+    feed.payload_for("sales", fetch)
+    feed.apply(
+        "metrics",
+        [{"report": "sales", "op": "upsert", "start_date": "2024-01-05", "end_date": "2024-01-05", "values": {}}],
+    )
+    assert feed.payload_for("sales", fetch) == {"revenue": 2.0}
+    feed.apply("resync", {})
+    assert feed.payload_for("sales", fetch) == {"revenue": 3.0}
+    assert feed.payload_for("sales", fetch) == {"revenue": 3.0}
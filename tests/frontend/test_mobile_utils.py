@@ -3,6 +3,7 @@ from crm_svc.frontend.utils.mobile_utils import (
     get_screen_width,
     is_mobile_view,
     breakpoint_thresholds,
+    series_target_points,
 )
 import streamlit as st
 
@@ -35,3 +36,10 @@ def test_breakpoint_thresholds_returns_map():
     bp = breakpoint_thresholds()
     assert isinstance(bp, dict)
     assert bp["md"] == 768
+
+
+def test_series_target_points_scales_with_width():
+    assert series_target_points(375) == 187
+    assert series_target_points(1920) == 960
+    assert series_target_points(10) == 50
+    assert series_target_points(100_000) == 2000
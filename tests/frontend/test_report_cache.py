@@ -0,0 +1,32 @@
+from crm_svc.frontend.utils.report_cache import ReportCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ReportCache(ttl_seconds=60, max_entries=2, clock=lambda: 0.0)
+    cache.store("a", {"n": 1}, '"a"')
+    cache.store("b", {"n": 2}, '"b"')
+    assert cache.get_fresh("a") == {"n": 1}  # "a" becomes most recently used
+    cache.store("c", {"n": 3}, '"c"')
+
+    assert cache.get_fresh("b") is None
+    assert cache.etag("b") is None
+    assert cache.get_fresh("a") == {"n": 1}
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 2
+
+
+def test_expired_entry_keeps_validator_until_revalidated():
+    now = [0.0]
+    cache = ReportCache(ttl_seconds=10, max_entries=4, clock=lambda: now[0])
+    cache.store("k", [1, 2], '"v1"')
+
+    now[0] = 10.0
+    assert cache.get_fresh("k") is None
+    assert cache.etag("k") == '"v1"'
+    assert cache.mark_revalidated("k") == [1, 2]
+    assert cache.get_fresh("k") == [1, 2]
+    assert cache.mark_revalidated("missing") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["revalidated"], stats["misses"]) == (1, 1, 1)
+    assert stats["hit_ratio"] == round(2 / 3, 3)
@@ -0,0 +1,68 @@
+from datetime import date, datetime
+
+import pytest
+
+from crm_svc.models import ActivityEvent, ActivityKind, Customer, User
+from crm_svc.services.activity_aggregation import ActivityAggregator
+from crm_svc.services.report_service import ReportService
+
+START, END = date(2025, 3, 1), date(2025, 3, 2)
+
+
+@pytest.fixture
+def events(db_session):
+    db_session.add_all([Customer(id="c1"), User(id="u1"), User(id="u2")])
+
+    def add(day, kind, user="u1", **fields):
+        db_session.add(
+            ActivityEvent(occurred_at=datetime(2025, 3, day, 10), kind=kind, customer_id="c1", user_id=user, **fields)
+        )
+
+    add(1, ActivityKind.CALL, engagement=0.5)
+    add(1, ActivityKind.EMAIL, engagement=None)
+    add(2, ActivityKind.MEETING, user="u2", engagement=0.9)
+    add(1, ActivityKind.STAGE_CHANGE, deal_id="d1", from_stage=None, stage="lead", amount=1000.0)
+    add(1, ActivityKind.STAGE_CHANGE, deal_id="d2", from_stage=None, stage="lead", amount=500.0)
+    add(2, ActivityKind.STAGE_CHANGE, deal_id="d1", from_stage="lead", stage="closed_won", amount=1200.0)
+    # outside the range
+    add(3, ActivityKind.CALL, engagement=0.0)
+    db_session.commit()
+    return db_session
+
+
+@pytest.fixture(params=[100_000, 2], ids=["one-batch", "many-batches"])
+def aggregator(request):
+    return ActivityAggregator(batch_size=request.param)
+
+
+def test_sales_from_events(events, aggregator):
+    assert aggregator.sales(events, START, END) == {
+        "revenue": 1200.0,
+        "conversion_rate": 0.5,
+        "pipeline_velocity": 600.0,
+    }
+
+
+def test_team_from_events(events, aggregator):
+    result = aggregator.team(events, START, END)
+    # u1 active on day 1 only, u2 on day 2 only
+    assert result == {"tasks_completed": 3, "deals_closed": 1, "activity_level": 0.5}
+
+
+def test_customer_from_events(events, aggregator):
+    assert aggregator.customer(events, START, END) == {"total_interactions": 3, "avg_engagement_score": 0.7}
+
+
+def test_pipeline_from_events(events, aggregator):
+    assert aggregator.pipeline(events, START, END) == {"stage_conversion_rates": {"lead": 0.5, "closed_won": 0.0}}
+
+
+def test_no_events_returns_none(db_session):
+    aggregator = ActivityAggregator()
+    assert aggregator.sales(db_session, START, END) is None
+    assert aggregator.team(db_session, START, END) is None
+
+
+def test_report_service_prefers_events_over_mock_data(events):
+    res = ReportService().get_customer_interaction(events, START, END)
+    assert (res.total_interactions, res.avg_engagement_score) == (3, 0.7)
@@ -2,6 +2,7 @@ import io
 import uuid
 import os
 import pytest
+from fastapi import HTTPException
 from starlette.datastructures import UploadFile
 
 from crm_svc.services.document_service import DocumentService
@@ -98,3 +99,165 @@ def test_not_found_edge_cases(db_session):
         svc.download_document(db_session, random_id)
     with pytest.raises(Exception):
         svc.delete_document(db_session, random_id)
+
+
+PNG = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+PDF = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+
+
+@pytest.fixture
+def storage(monkeypatch, tmp_path):
+    # file_storage binds the path at import time, so patch it there as well
+    from crm_svc.utils import file_storage
+
+    monkeypatch.setattr(config, "DOCUMENT_STORAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(file_storage, "DOCUMENT_STORAGE_PATH", str(tmp_path))
+    return tmp_path
+
+
+def _customer_and_user(db_session):
+    customer = Customer(id=str(uuid.uuid4()))
+    user = User(id=str(uuid.uuid4()))
+    db_session.add_all([customer, user])
+    db_session.commit()
+    return uuid.UUID(customer.id), uuid.UUID(user.id)
+
+
+def test_usage_counters_follow_uploads_and_deletes(storage, db_session):
+    svc = DocumentService()
+    customer_id, user_id = _customer_and_user(db_session)
+
+    png = svc.upload_document(db_session, customer_id, user_id, make_uploadfile(PNG, "a.png"), access_level="PRIVATE")
+    svc.upload_document(db_session, customer_id, user_id, make_uploadfile(PNG, "b.png"), access_level="PRIVATE")
+    svc.upload_document(db_session, customer_id, user_id, make_uploadfile(PDF, "c.pdf"), access_level="PRIVATE")
+
+    usage = svc.get_customer_usage(db_session, customer_id)
+    assert (usage.document_count, usage.total_bytes) == (3, 2 * len(PNG) + len(PDF))
+    assert usage.documents_by_file_type == {"image/png": 2, "application/pdf": 1}
+    assert usage.bytes_by_file_type["image/png"] == 2 * len(PNG)
+
+    svc.delete_document(db_session, uuid.UUID(png.id))
+    usage = svc.get_customer_usage(db_session, customer_id)
+    assert (usage.document_count, usage.total_bytes) == (2, len(PNG) + len(PDF))
+    assert usage.documents_by_file_type["image/png"] == 1
+
+
+def test_upload_over_quota_is_rejected_without_side_effects(monkeypatch, storage, db_session):
+    monkeypatch.setattr(config, "CUSTOMER_MAX_DOCUMENTS", 1)
+    svc = DocumentService()
+    customer_id, user_id = _customer_and_user(db_session)
+
+    first = svc.upload_document(db_session, customer_id, user_id, make_uploadfile(PNG, "a.png"), access_level="PRIVATE")
+    with pytest.raises(HTTPException) as exc:
+        svc.upload_document(db_session, customer_id, user_id, make_uploadfile(PNG, "b.png"), access_level="PRIVATE")
+    assert exc.value.status_code == 403
+
+    assert len(svc.list_documents_for_customer(db_session, customer_id)) == 1
+    assert svc.get_customer_usage(db_session, customer_id).document_count == 1
+    assert os.listdir(os.path.dirname(first.file_path)) == [first.stored_filename]
+
+
+def test_quota_is_enforced_after_the_counter_update(monkeypatch, storage, db_session):
+    from crm_svc.services import document_service
+
+    monkeypatch.setattr(config, "CUSTOMER_MAX_STORAGE_MB", len(PNG) * 1.5 / (1024 * 1024))
+    svc = DocumentService()
+    customer_id, user_id = _customer_and_user(db_session)
+    svc.upload_document(db_session, customer_id, user_id, make_uploadfile(PNG, "a.png"), access_level="PRIVATE")
+
+    # simulate a concurrent upload whose early check ran before the first upload committed
+    real_totals = document_service._customer_totals
+    calls = []
+
+    def stale_first_read(db, cid):
+        calls.append(cid)
+        return (0, 0) if len(calls) == 1 else real_totals(db, cid)
+
+    monkeypatch.setattr(document_service, "_customer_totals", stale_first_read)
+    with pytest.raises(HTTPException) as exc:
+        svc.upload_document(db_session, customer_id, user_id, make_uploadfile(PNG, "b.png"), access_level="PRIVATE")
+    assert exc.value.status_code == 403
+    assert svc.get_customer_usage(db_session, customer_id).total_bytes == len(PNG)
+
+
+def test_lookups_scoped_to_customer(storage, db_session):
+    svc = DocumentService()
+    customer_id, user_id = _customer_and_user(db_session)
+    other_id, _ = _customer_and_user(db_session)
+    doc = svc.upload_document(db_session, customer_id, user_id, make_uploadfile(PNG, "a.png"), access_level="PRIVATE")
+    doc_id = uuid.UUID(doc.id)
+
+    assert svc.get_document_metadata(db_session, doc_id, customer_id).id == doc.id
+    assert svc.download_document(db_session, doc_id, customer_id)[0] == PNG
+    with pytest.raises(HTTPException) as exc:
+        svc.get_document_metadata(db_session, doc_id, other_id)
+    assert exc.value.status_code == 404
+    with pytest.raises(HTTPException):
+        svc.delete_document(db_session, doc_id, other_id)
+
+    svc.delete_document(db_session, doc_id, customer_id)
+    assert svc.list_documents_for_customer(db_session, customer_id) == []
+    assert svc.get_customer_usage(db_session, customer_id).document_count == 0
+    # the cached metadata went with the document
+    with pytest.raises(HTTPException) as exc:
+        svc.get_document_metadata(db_session, doc_id)
+    assert exc.value.status_code == 404
+
+
+def test_metadata_cache_ttl_depends_on_the_backend(storage, monkeypatch, db_session):
+    from crm_svc.utils.cache import get_cache_backend
+
+    svc = DocumentService()
+    customer, user = Customer(id=str(uuid.uuid4())), User(id=str(uuid.uuid4()))
+    db_session.add_all([customer, user])
+    db_session.commit()
+    doc = svc.upload_document(
+        db_session, uuid.UUID(customer.id), uuid.UUID(user.id),
+        make_uploadfile(b"%PDF-1.4 report", "report.pdf", "application/pdf"),
+        access_level="PRIVATE", metadata=None,
+    )
+    backend = get_cache_backend()
+    stored = []
+    real_set = backend.set
+    monkeypatch.setattr(backend, "set", lambda key, value, ttl: (stored.append(ttl), real_set(key, value, ttl)))
+
+    # other workers' memory backends never see a delete, so their copies are kept short
+    svc.get_document_metadata(db_session, uuid.UUID(doc.id))
+    assert stored == [config.DOCUMENT_CACHE_LOCAL_TTL_SECONDS]
+
+    backend.delete([f"document:{doc.id}"])
+    monkeypatch.setattr(type(backend), "shared", True)
+    svc.get_document_metadata(db_session, uuid.UUID(doc.id))
+    assert stored[-1] == config.DOCUMENT_CACHE_TTL_SECONDS
+
+    svc.delete_document(db_session, uuid.UUID(doc.id))
+    assert backend.get(f"document:{doc.id}") is None
+
+
+def test_ids_and_stored_names_stay_unique_across_customers(storage, monkeypatch, db_session):
+    from crm_svc.services import document_service
+
+    svc = DocumentService()
+    first, second, user = Customer(id=str(uuid.uuid4())), Customer(id=str(uuid.uuid4())), User(id=str(uuid.uuid4()))
+    db_session.add_all([first, second, user])
+    db_session.commit()
+    doc = svc.upload_document(
+        db_session, uuid.UUID(first.id), uuid.UUID(user.id),
+        make_uploadfile(b"%PDF-1.4 first", "first.pdf", "application/pdf"),
+        access_level="PRIVATE", metadata=None,
+    )
+    assert document_service._identity_taken(db_session, doc.id, "unused.pdf")
+    assert not document_service._identity_taken(db_session, str(uuid.uuid4()), "unused.pdf")
+
+    # partitioned PostgreSQL only enforces uniqueness per customer; the service rejects reuse by another one
+    reused = os.path.join(str(storage), "reused.pdf")
+    open(reused, "wb").close()
+    monkeypatch.setattr(document_service, "_save_file_to_disk", lambda *args: (doc.stored_filename, reused))
+    with pytest.raises(HTTPException) as excinfo:
+        svc.upload_document(
+            db_session, uuid.UUID(second.id), uuid.UUID(user.id),
+            make_uploadfile(b"%PDF-1.4 second", "second.pdf", "application/pdf"),
+            access_level="PRIVATE", metadata=None,
+        )
+    assert excinfo.value.status_code == 409
+    assert not os.path.exists(reused)
@@ -0,0 +1,96 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql
+
+from crm_svc.models import PipelineAnalyticsMetrics, SalesPerformanceMetrics
+from crm_svc.schemas import PipelineAnalyticsResponse, SalesPerformanceResponse
+from crm_svc.services.ingestion_service import MetricIngestionService, build_upsert
+from crm_svc.utils.events import bus
+
+
+def _sales_rows(n, revenue=100.0):
+    start = date(2024, 1, 1)
+    return [
+        SalesPerformanceResponse(
+            start_date=start + timedelta(days=i),
+            end_date=start + timedelta(days=i),
+            revenue=revenue + i,
+            conversion_rate=0.1,
+            pipeline_velocity=2.0,
+        )
+        for i in range(n)
+    ]
+
+
+def test_ingest_writes_rows_in_batches(db_session):
+    result = MetricIngestionService().ingest(db_session, "sales", _sales_rows(25), batch_size=10)
+
+    assert (result.received, result.written, result.batches) == (25, 25, 3)
+    assert db_session.scalar(select(func.count()).select_from(SalesPerformanceMetrics)) == 25
+
+
+def test_ingest_is_idempotent_and_updates_existing_ranges(db_session):
+    svc = MetricIngestionService()
+    svc.ingest(db_session, "sales", _sales_rows(5))
+    svc.ingest(db_session, "sales", _sales_rows(5))
+    svc.ingest(db_session, "sales", _sales_rows(5, revenue=500.0))
+
+    revenues = db_session.scalars(select(SalesPerformanceMetrics.revenue).order_by(SalesPerformanceMetrics.start_date))
+    assert list(revenues) == [500.0, 501.0, 502.0, 503.0, 504.0]
+
+
+def test_resending_unchanged_rows_rewrites_and_publishes_nothing(monkeypatch, db_session):
+    svc = MetricIngestionService()
+    published = []
+    monkeypatch.setattr(bus, "_listeners", [*bus._listeners, published.append])
+    svc.ingest(db_session, "sales", _sales_rows(3))
+    stamps = list(db_session.scalars(select(SalesPerformanceMetrics.created_at)))
+    assert svc.ingest(db_session, "sales", _sales_rows(3)).written == 0
+    assert list(db_session.scalars(select(SalesPerformanceMetrics.created_at))) == stamps
+
+    rows = _sales_rows(3)
+    rows[1] = rows[1].model_copy(update={"revenue": 999.0})
+    assert svc.ingest(db_session, "sales", rows).written == 1
+    assert [len(batch) for batch in published] == [3, 1]
+    assert published[1][0].values["revenue"] == 999.0
+
+
+def test_ingest_collapses_repeated_ranges_to_last_row(db_session):
+    rows = _sales_rows(1) + _sales_rows(1, revenue=7.0)
+    result = MetricIngestionService().ingest(db_session, "sales", rows)
+
+    assert (result.received, result.written) == (2, 1)
+    assert db_session.scalar(select(SalesPerformanceMetrics.revenue)) == 7.0
+
+
+def test_ingest_json_column(db_session):
+    row = PipelineAnalyticsResponse(
+        start_date=date(2024, 1, 1), end_date=date(2024, 1, 31), stage_conversion_rates={"lead": 0.5}
+    )
+    MetricIngestionService().ingest(db_session, "pipeline", [row])
+
+    assert db_session.scalar(select(PipelineAnalyticsMetrics.stage_conversion_rates)) == {"lead": 0.5}
+    assert MetricIngestionService().ingest(db_session, "pipeline", [row]).written == 0
+
+
+def test_postgres_upsert_compares_json_columns_as_jsonb():
+    # migrated databases hold stage_conversion_rates as json, which has no equality operator
+    stmt = build_upsert("postgresql", PipelineAnalyticsMetrics.__table__, ("stage_conversion_rates",))
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert (
+        "WHERE CAST(pipeline_analytics_metrics.stage_conversion_rates AS JSONB) "
+        "IS DISTINCT FROM CAST(excluded.stage_conversion_rates AS JSONB)"
+    ) in sql
+
+    stmt = build_upsert("postgresql", SalesPerformanceMetrics.__table__, ("revenue",))
+    assert "sales_performance_metrics.revenue IS DISTINCT FROM excluded.revenue" in str(
+        stmt.compile(dialect=postgresql.dialect())
+    )
+
+
+def test_ingest_rejects_inverted_range(db_session):
+    row = _sales_rows(1)[0].model_copy(update={"end_date": date(2023, 12, 31)})
+    with pytest.raises(ValueError):
+        MetricIngestionService().ingest(db_session, "sales", [row])
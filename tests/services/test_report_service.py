@@ -127,3 +127,81 @@ def test_large_range_caps_values(db_session):
     pipeline = svc.get_pipeline_analytics(db_session, start, end)
     for rate in pipeline.stage_conversion_rates.values():
         assert 0.0 < rate <= 0.95
+
+
+def test_sales_series_uses_daily_rows_and_refreshes_on_new_rows(db_session):
+    svc = ReportService()
+    start, end = date(2024, 1, 1), date(2024, 1, 10)
+    for day in range(1, 6):
+        db_session.add(
+            SalesPerformanceMetrics(
+                start_date=date(2024, 1, day),
+                end_date=date(2024, 1, day),
+                revenue=float(day),
+                conversion_rate=0.1,
+                pipeline_velocity=1.0,
+            )
+        )
+    db_session.commit()
+
+    first = svc.get_sales_series(db_session, start, end, target=100)
+    assert first.source_points == 5
+    assert first.revenue == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert svc.get_sales_series(db_session, start, end, target=100) is first
+
+    db_session.add(
+        SalesPerformanceMetrics(
+            start_date=date(2024, 1, 6),
+            end_date=date(2024, 1, 6),
+            revenue=6.0,
+            conversion_rate=0.1,
+            pipeline_velocity=1.0,
+        )
+    )
+    db_session.commit()
+    refreshed = svc.get_sales_series(db_session, start, end, target=100)
+    assert refreshed.source_points == 6
+
+
+def _add_stage_rows(db_session):
+    from crm_svc.models import PipelineStageMetrics
+
+    funnel = [("lead", 100, 60, 120.0), ("qualified", 60, 30, 90.0), ("proposal", 30, 0, 0.0)]
+    for day in (date(2025, 5, 1), date(2025, 5, 2)):
+        for order, (stage, entered, converted, days) in enumerate(funnel):
+            db_session.add(
+                PipelineStageMetrics(
+                    day=day, stage=stage, stage_order=order, entered=entered, converted=converted, days_in_stage=days
+                )
+            )
+    # outside the queried range
+    db_session.add(PipelineStageMetrics(day=date(2025, 6, 1), stage="lead", stage_order=0, entered=999, converted=0))
+    db_session.commit()
+
+
+def test_pipeline_funnel_aggregates_stage_rows(db_session):
+    _add_stage_rows(db_session)
+
+    res = ReportService().get_pipeline_funnel(db_session, date(2025, 5, 1), date(2025, 5, 31))
+
+    assert [s.stage for s in res.stages] == ["lead", "qualified", "proposal"]
+    lead, qualified, proposal = res.stages
+    assert (lead.entered, lead.converted) == (200, 120)
+    assert lead.conversion_rate == 0.6
+    assert qualified.funnel_rate == 0.6
+    assert proposal.funnel_rate == 0.3
+    assert lead.avg_days_in_stage == 2.0
+    assert proposal.avg_days_in_stage is None
+
+
+def test_pipeline_analytics_falls_back_to_stage_rows(db_session):
+    _add_stage_rows(db_session)
+
+    res = ReportService().get_pipeline_analytics(db_session, date(2025, 5, 1), date(2025, 5, 2))
+
+    assert res.stage_conversion_rates == {"lead": 0.6, "qualified": 0.5, "proposal": 0.0}
+
+
+def test_pipeline_funnel_is_empty_without_stage_rows(db_session):
+    res = ReportService().get_pipeline_funnel(db_session, date(2025, 5, 1), date(2025, 5, 31))
+    assert res.stages == []
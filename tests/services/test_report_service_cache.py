@@ -0,0 +1,188 @@
+import threading
+from datetime import date
+
+from crm_svc.services.report_cache import CachePolicy, ReportCache, cache_key, report_cache, served_age
+from crm_svc.services.report_service import ReportService
+from crm_svc.utils.cache import MemoryBackend
+from crm_svc.utils.events import MetricChange, install_change_tracking, publish_changes
+
+START, END = date(2025, 5, 1), date(2025, 5, 31)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _cache(clock, soft=10.0, hard=60.0):
+    return ReportCache({"sales_performance": CachePolicy(soft, hard)}, MemoryBackend(), clock=clock)
+
+
+def _get(cache, compute, refresh=None):
+    key = cache_key("sales_performance", START, END)
+    return cache.get_or_compute("sales_performance", key, compute, refresh or compute)
+
+
+def test_fresh_stale_and_expired_values():
+    clock = Clock()
+    cache = _cache(clock)
+    assert _get(cache, lambda: "v1") == "v1"
+    assert served_age() == 0.0
+
+    clock.now += 5
+    assert _get(cache, lambda: "unused") == "v1"
+    assert served_age() == 5.0
+
+    # past the soft TTL: the stale value is served and refreshed in the background
+    clock.now += 10
+    release = threading.Event()
+    refreshes = []
+
+    def refresh():
+        refreshes.append(1)
+        release.wait(5)
+        return "v2"
+
+    assert _get(cache, lambda: "unused", refresh) == "v1"
+    assert _get(cache, lambda: "unused", refresh) == "v1"
+    assert served_age() == 15.0
+    release.set()
+    cache.wait_for_refreshes()
+    assert len(refreshes) == 1
+    assert _get(cache, lambda: "unused") == "v2"
+
+    # past the hard TTL the request recomputes
+    clock.now += 61
+    assert _get(cache, lambda: "v3") == "v3"
+    assert served_age() == 0.0
+
+
+def test_failed_refresh_keeps_serving_stale_value():
+    clock = Clock()
+    cache = _cache(clock)
+    _get(cache, lambda: "v1")
+    clock.now += 20
+
+    def broken():
+        raise RuntimeError("database unavailable")
+
+    assert _get(cache, lambda: "unused", broken) == "v1"
+    cache.wait_for_refreshes()
+    assert _get(cache, lambda: "unused", lambda: "v2") == "v1"
+    cache.wait_for_refreshes()
+    assert _get(cache, lambda: "unused") == "v2"
+
+
+def test_zero_ttl_disables_caching():
+    cache = _cache(Clock(), soft=0, hard=0)
+    assert _get(cache, lambda: "v1") == "v1"
+    assert _get(cache, lambda: "v2") == "v2"
+
+
+def test_overlapping_metric_changes_invalidate(db_session):
+    svc = ReportService()
+    first = svc.get_sales_performance(db_session, START, END)
+    assert svc.get_sales_performance(db_session, START, END) is first
+
+    publish_changes([MetricChange("team", "upsert", START, END, {})])
+    publish_changes([MetricChange("sales", "upsert", date(2025, 7, 1), date(2025, 7, 1), {})])
+    assert svc.get_sales_performance(db_session, START, END) is first
+
+    publish_changes([MetricChange("sales", "upsert", date(2025, 5, 15), date(2025, 5, 15), {})])
+    assert svc.get_sales_performance(db_session, START, END) is not first
+
+
+def test_invalidation_reads_only_the_changed_reports_index(monkeypatch):
+    backend = MemoryBackend()
+    policies = {"sales_performance": CachePolicy(10.0, 60.0), "team_productivity": CachePolicy(10.0, 60.0)}
+    cache = ReportCache(policies, backend, clock=Clock())
+    sales, team = cache_key("sales_performance", START, END), cache_key("team_productivity", START, END)
+    cache.get_or_compute("sales_performance", sales, lambda: "sales", lambda: "sales")
+    cache.get_or_compute("team_productivity", team, lambda: "team", lambda: "team")
+    read = []
+    monkeypatch.setattr(backend, "index_members", lambda index: read.append(index) or [sales])
+
+    cache.invalidate([MetricChange("sales", "upsert", date(2025, 5, 3), date(2025, 5, 3), {})])
+    assert read == ["index:report:sales"]
+    assert backend.get(sales) is None
+    assert backend.get(team) is not None
+
+
+def test_sessions_that_wrote_bypass_the_cache(db_session):
+    from crm_svc.models.base import RoutingSession
+
+    svc = ReportService()
+    first = svc.get_sales_performance(db_session, START, END)
+    writer = RoutingSession(bind=db_session.get_bind())
+    writer.wrote = True
+    try:
+        # neither served the shared entry nor stored its own view
+        assert svc.get_sales_performance(writer, START, END) is not first
+        assert svc.get_sales_performance(db_session, START, END) is first
+    finally:
+        writer.close()
+
+
+def test_report_refresh_runs_on_its_own_session(monkeypatch, db_session):
+    clock = Clock()
+    monkeypatch.setattr(report_cache, "clock", clock)
+    svc = ReportService()
+    first = svc.get_team_productivity(db_session, START, END)
+
+    clock.now += report_cache.policy("team_productivity").soft_ttl + 1
+    assert svc.get_team_productivity(db_session, START, END) is first
+    report_cache.wait_for_refreshes()
+    refreshed = svc.get_team_productivity(db_session, START, END)
+    assert refreshed is not first
+    assert refreshed == first
+
+
+def test_report_responses_carry_age(monkeypatch, client):
+    clock = Clock()
+    monkeypatch.setattr(report_cache, "clock", clock)
+    params = {"start_date": "2025-05-01", "end_date": "2025-05-31"}
+
+    resp = client.get("/api/customer-interaction", params=params)
+    assert resp.status_code == 200
+    assert resp.headers["age"] == "0"
+
+    clock.now += 42
+    resp = client.get("/api/customer-interaction", params=params)
+    assert resp.headers["age"] == "42"
+
+
+def test_committed_stage_rows_invalidate_the_funnel(db_session):
+    from crm_svc.models import PipelineStageMetrics
+
+    install_change_tracking()
+    svc = ReportService()
+    assert svc.get_pipeline_funnel(db_session, START, END).stages == []
+    db_session.add(PipelineStageMetrics(day=date(2025, 5, 2), stage="lead", stage_order=0, entered=10, converted=4))
+    db_session.commit()
+
+    funnel = svc.get_pipeline_funnel(db_session, START, END)
+    assert [(s.stage, s.entered) for s in funnel.stages] == [("lead", 10)]
+
+
+def test_shutdown_drains_background_refreshes():
+    clock = Clock()
+    cache = _cache(clock)
+    _get(cache, lambda: "v1")
+    clock.now += 20
+    release = threading.Event()
+
+    def refresh():
+        release.wait(5)
+        return "v2"
+
+    _get(cache, lambda: "unused", refresh)
+    executor = cache._executor
+    threading.Timer(0.05, release.set).start()
+    cache.shutdown()
+    assert cache._executor is None
+    assert executor._shutdown
+    clock.now += 1
+    assert _get(cache, lambda: "unused") == "v2"
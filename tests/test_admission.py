@@ -0,0 +1,125 @@
+import asyncio
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from crm_svc import config
+from crm_svc.middleware.admission import AdmissionMiddleware, ConcurrencyLimiter, route_group
+from crm_svc.utils.metrics import ADMISSION_SHED
+
+
+def test_routes_map_to_groups():
+    assert route_group("GET", "/api/export") == "export"
+    assert route_group("GET", "/api/sales-performance") == "reports"
+    assert route_group("HEAD", "/api/customers/{customer_id}/usage") == "reports"
+    assert route_group("POST", "/api/ingest/{report}") == "upload"
+    assert route_group("GET", "/api/live/metrics") is None
+    assert route_group("GET", "/metrics") is None
+
+
+def test_limiter_queues_then_sheds():
+    async def scenario():
+        limiter = ConcurrencyLimiter("test.limiter", limit=1, queue_depth=1, timeout=5)
+        full = ADMISSION_SHED.labels("test.limiter", "queue_full").get()
+        assert await limiter.acquire()
+
+        queued = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+        # the queue is full: shed without waiting
+        assert not await limiter.acquire()
+        assert ADMISSION_SHED.labels("test.limiter", "queue_full").get() == full + 1
+
+        limiter.release()
+        assert await queued
+        assert (limiter.active, limiter.queued) == (1, 0)
+
+        limiter.timeout = 0.01
+        assert not await limiter.acquire()
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def scenario():
+        limiter = ConcurrencyLimiter("test.cancel", limit=1, queue_depth=2, timeout=5)
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        limiter.release()
+        assert (limiter.active, limiter.queued) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_slot_handed_over_as_the_wait_times_out_is_released(monkeypatch):
+    limiter = ConcurrencyLimiter("test.handover", limit=1, queue_depth=1, timeout=5)
+
+    async def handed_over_then_timed_out(waiter, timeout):
+        # the holder finishes and hands its slot over just as the timeout fires
+        limiter.release()
+        raise asyncio.TimeoutError
+
+    async def scenario():
+        assert await limiter.acquire()
+        monkeypatch.setattr(asyncio, "wait_for", handed_over_then_timed_out)
+        assert not await limiter.acquire()
+        assert (limiter.active, limiter.queued) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_default_limits_fit_the_threadpool():
+    import anyio.to_thread
+
+    async def tokens():
+        return anyio.to_thread.current_default_thread_limiter().total_tokens
+
+    total = sum(limit for limit, _ in config.ADMISSION_DEFAULT_LIMITS.values())
+    assert total < asyncio.run(tokens())
+
+
+def test_requests_over_the_limit_get_503_with_retry_after():
+    release = asyncio.Event()
+
+    async def export(request):
+        await release.wait()
+        return PlainTextResponse("exported")
+
+    async def report(request):
+        return PlainTextResponse("report")
+
+    inner = Starlette(routes=[Route("/api/export", export), Route("/api/sales-performance", report)])
+    limiters = {"export": ConcurrencyLimiter("export", limit=1, queue_depth=0, timeout=5)}
+    app = AdmissionMiddleware(inner, limiters)
+
+    async def scenario():
+        async def asgi(scope, receive, send):
+            # route templates are resolved against the app in the scope, as Starlette sets it
+            scope["app"] = inner
+            await app(scope, receive, send)
+
+        transport = httpx.ASGITransport(app=asgi)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.ensure_future(client.get("/api/export"))
+            while limiters["export"].active == 0:
+                await asyncio.sleep(0.001)
+            shed = await client.get("/api/export")
+            # other groups are unaffected
+            report_resp = await client.get("/api/sales-performance")
+            release.set()
+            return await first, shed, report_resp
+
+    first, shed, report_resp = asyncio.run(scenario())
+    assert first.status_code == 200
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"] == str(config.ADMISSION_RETRY_AFTER_SECONDS)
+    assert shed.json() == {"detail": "Server is busy, retry later"}
+    assert report_resp.status_code == 200
+    assert limiters["export"].active == 0
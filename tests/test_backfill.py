@@ -0,0 +1,167 @@
+import csv
+import json
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from crm_svc import backfill
+from crm_svc.models import PipelineAnalyticsMetrics, SalesPerformanceMetrics
+from crm_svc.models.base import Base
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'backfill.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _sales_records(n, revenue=1.0):
+    start = date(2015, 1, 1)
+    return [
+        {
+            "start_date": (start + timedelta(days=i)).isoformat(),
+            "end_date": (start + timedelta(days=i)).isoformat(),
+            "revenue": revenue + i,
+            "conversion_rate": 0.25,
+            "pipeline_velocity": 3.0,
+        }
+        for i in range(n)
+    ]
+
+
+def _write_csv(path, records):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(records[0]))
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def _count(engine, model):
+    with engine.connect() as conn:
+        return conn.scalar(select(func.count()).select_from(model))
+
+
+def test_csv_backfill_commits_in_chunks(engine, tmp_path):
+    path = tmp_path / "sales.csv"
+    _write_csv(path, _sales_records(25))
+
+    result = backfill.run_backfill(engine, "sales", str(path), chunk_size=10)
+
+    assert (result.records, result.written, result.chunks) == (25, 25, 3)
+    assert _count(engine, SalesPerformanceMetrics) == 25
+    assert json.loads((tmp_path / "sales.csv.sales.checkpoint").read_text())["records"] == 25
+
+
+def test_backfill_resumes_from_checkpoint_after_invalid_record(engine, tmp_path):
+    path = tmp_path / "sales.ndjson"
+    records = _sales_records(30)
+    records[24]["revenue"] = "n/a"
+    path.write_text("\n".join(json.dumps(r) for r in records))
+
+    with pytest.raises(ValueError, match="Record 25 .*revenue"):
+        backfill.run_backfill(engine, "sales", str(path), chunk_size=10)
+    assert _count(engine, SalesPerformanceMetrics) == 20
+
+    records[24]["revenue"] = 99.0
+    path.write_text("\n".join(json.dumps(r) for r in records))
+    result = backfill.run_backfill(engine, "sales", str(path), chunk_size=10)
+
+    assert (result.skipped, result.records) == (20, 10)
+    assert _count(engine, SalesPerformanceMetrics) == 30
+
+
+def test_rerun_with_restart_is_idempotent(engine, tmp_path):
+    path = tmp_path / "sales.csv"
+    _write_csv(path, _sales_records(5))
+    backfill.run_backfill(engine, "sales", str(path))
+    _write_csv(path, _sales_records(5, revenue=100.0))
+
+    assert backfill.run_backfill(engine, "sales", str(path)).records == 0
+    backfill.run_backfill(engine, "sales", str(path), restart=True)
+
+    assert _count(engine, SalesPerformanceMetrics) == 5
+    with engine.connect() as conn:
+        assert conn.scalar(select(func.min(SalesPerformanceMetrics.revenue))) == 100.0
+
+
+def test_csv_json_columns_are_decoded(engine, tmp_path):
+    path = tmp_path / "pipeline.csv"
+    _write_csv(
+        path,
+        [{"start_date": "2016-01-01", "end_date": "2016-01-31", "stage_conversion_rates": json.dumps({"lead": 0.4})}],
+    )
+
+    backfill.run_backfill(engine, "pipeline", str(path))
+
+    with engine.connect() as conn:
+        assert conn.scalar(select(PipelineAnalyticsMetrics.stage_conversion_rates)) == {"lead": 0.4}
+
+
+def test_parquet_backfill(engine, tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    path = tmp_path / "sales.parquet"
+    pq.write_table(pa.Table.from_pylist(_sales_records(12)), path)
+
+    result = backfill.run_backfill(engine, "sales", str(path), chunk_size=5)
+
+    assert (result.records, result.chunks) == (12, 3)
+    assert _count(engine, SalesPerformanceMetrics) == 12
+
+
+def test_checkpoint_for_another_source_is_rejected(engine, tmp_path):
+    path = tmp_path / "sales.csv"
+    _write_csv(path, _sales_records(2))
+    checkpoint = tmp_path / "shared.checkpoint"
+    backfill.run_backfill(engine, "sales", str(path), checkpoint_path=str(checkpoint))
+
+    with pytest.raises(ValueError, match="--restart"):
+        backfill.run_backfill(engine, "team", str(path), checkpoint_path=str(checkpoint))
+
+
+def test_main_reports_errors_with_exit_code(engine, tmp_path):
+    url = str(engine.url)
+    assert backfill.main(["sales", str(tmp_path / "sales.txt"), "--database-url", url]) == 1
+
+    path = tmp_path / "sales.csv"
+    _write_csv(path, _sales_records(3))
+    assert backfill.main(["sales", str(path), "--database-url", url]) == 0
+    assert _count(engine, SalesPerformanceMetrics) == 3
+
+
+def test_postgres_writer_copies_chunk_then_merges():
+    class FakeCursor:
+        def copy_expert(self, sql, buf):
+            executed.append((sql, buf.read()))
+
+        def close(self):
+            pass
+
+    class FakeConnection:
+        class connection:
+            class dbapi_connection:
+                cursor = FakeCursor
+
+        def exec_driver_sql(self, sql):
+            executed.append(sql)
+
+    executed = []
+    writer = backfill.PostgresCopyWriter(PipelineAnalyticsMetrics.__table__, ("stage_conversion_rates",))
+    record = {
+        "id": "r1",
+        "start_date": date(2016, 1, 1),
+        "end_date": date(2016, 1, 31),
+        "created_at": None,
+        "stage_conversion_rates": {"lead": 0.4},
+    }
+    writer.write(FakeConnection(), [record])
+
+    create, (copy_sql, data), merge = executed
+    assert create.startswith("CREATE TEMP TABLE IF NOT EXISTS _backfill_pipeline_analytics_metrics")
+    assert copy_sql.startswith("COPY _backfill_pipeline_analytics_metrics (id, start_date")
+    assert data == 'r1,2016-01-01,2016-01-31,,"{""lead"":0.4}"\r\n'
+    assert "ON CONFLICT (start_date, end_date) DO UPDATE SET stage_conversion_rates = EXCLUDED.stage_conversion_rates" in merge
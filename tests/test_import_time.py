@@ -0,0 +1,54 @@
+"""Cold-start budget for the API service, measured with ``python -X importtime``."""
+import os
+import re
+import subprocess
+import sys
+
+# Generous defaults so slow CI machines pass; tighten locally via env when profiling start-up.
+TOTAL_BUDGET_MS = float(os.getenv("CRM_IMPORT_BUDGET_MS", 2500))
+OWN_MODULES_BUDGET_MS = float(os.getenv("CRM_OWN_IMPORT_BUDGET_MS", 150))
+
+# modules that only engine creation / optional features should pull in
+FORBIDDEN_AT_IMPORT = (
+    "sqlalchemy.dialects.sqlite",
+    "sqlalchemy.dialects.postgresql",
+    "sqlite3",
+    "psycopg2",
+    "streamlit",
+    "uvicorn",
+)
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def _importtime(statement: str):
+    src_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+    env = dict(os.environ, PYTHONPATH=src_dir + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    rows = {}
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            rows[name] = (int(self_us), int(cumulative_us))
+    return rows
+
+
+def test_app_cold_import_within_budget():
+    rows = _importtime("import crm_svc.app")
+    total_ms = rows["crm_svc.app"][1] / 1000.0
+    own_ms = sum(self_us for name, (self_us, _) in rows.items() if name.startswith("crm_svc")) / 1000.0
+    assert total_ms < TOTAL_BUDGET_MS, f"crm_svc.app import took {total_ms:.0f}ms (budget {TOTAL_BUDGET_MS:.0f}ms)"
+    assert own_ms < OWN_MODULES_BUDGET_MS, f"crm_svc modules took {own_ms:.0f}ms (budget {OWN_MODULES_BUDGET_MS:.0f}ms)"
+
+
+def test_app_import_does_not_create_engine():
+    rows = _importtime("import crm_svc.app")
+    loaded = [name for name in FORBIDDEN_AT_IMPORT if name in rows]
+    assert loaded == [], f"imported at start-up: {loaded}"
@@ -0,0 +1,52 @@
+import os
+
+import uvicorn
+
+from crm_svc import config, main
+
+
+def test_pool_settings_split_connection_budget_across_workers():
+    assert main.pool_settings_for_workers(None, 4) is None
+    assert main.pool_settings_for_workers(100, 4) == (19, 6)
+    pool_size, overflow = main.pool_settings_for_workers(10, 32)
+    assert (pool_size, overflow) == (1, 0)
+
+
+def test_resolve_workers_prefers_explicit_value():
+    assert main.resolve_workers(3) == 3
+    assert main.resolve_workers(0) >= 1
+
+
+def test_development_mode_runs_single_process(monkeypatch):
+    calls = []
+    monkeypatch.setattr(config, "SERVER_MODE", "development")
+    monkeypatch.setattr(uvicorn, "run", lambda *args, **kwargs: calls.append((args, kwargs)))
+    main.main()
+    assert calls == [((main.APP_IMPORT_STRING,), {"host": "0.0.0.0", "port": int(config.SERVICE_PORT)})]
+
+
+def test_production_mode_configures_workers_and_pool(monkeypatch):
+    calls = []
+    monkeypatch.setattr(config, "SERVER_MODE", "production")
+    monkeypatch.setattr(config, "WEB_CONCURRENCY", 4)
+    monkeypatch.setattr(config, "SERVER_MAX_REQUESTS", 1000)
+    monkeypatch.setattr(config, "SERVER_MAX_REQUESTS_JITTER", 50)
+    monkeypatch.setattr(config, "DB_MAX_CONNECTIONS", 40)
+    monkeypatch.setattr(config, "DB_POOL_SIZE", None)
+    monkeypatch.setattr(config, "DB_MAX_OVERFLOW", None)
+    monkeypatch.delenv("DB_POOL_SIZE", raising=False)
+    monkeypatch.delenv("DB_MAX_OVERFLOW", raising=False)
+    monkeypatch.setattr(uvicorn, "run", lambda *args, **kwargs: calls.append(kwargs))
+
+    main.main()
+
+    options = calls[0]
+    assert options["workers"] == 4
+    assert options["limit_max_requests"] == 1000
+    assert options["backlog"] == config.SERVER_BACKLOG
+    assert options["timeout_keep_alive"] == config.SERVER_KEEPALIVE_SECONDS
+    assert options["loop"] in ("uvloop", "asyncio")
+    assert options["http"] in ("httptools", "h11")
+    # spawned workers pick the per-worker pool size up from the environment
+    assert os.environ["DB_POOL_SIZE"] == "8"
+    assert os.environ["DB_MAX_OVERFLOW"] == "2"
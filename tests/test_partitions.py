@@ -0,0 +1,145 @@
+import json
+import os
+import uuid
+from datetime import date
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from crm_svc import partitions
+from crm_svc.partitions import add_months, missing_months, partition_name, roll_forward
+
+
+def test_month_arithmetic_crosses_years():
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    assert partition_name("sales_performance_metrics", date(2026, 2, 1)) == "sales_performance_metrics_p2026_02"
+
+
+def test_missing_months_skips_existing_partitions():
+    table = "team_productivity_metrics"
+    existing = [f"{table}_p2025_12", f"{table}_p2026_02", f"{table}_default"]
+    assert missing_months(table, existing, date(2025, 12, 17), 2) == [date(2026, 1, 1)]
+    assert missing_months(table, existing, date(2025, 12, 17), 0) == []
+    # past months back to ``since`` as well
+    assert missing_months(table, existing, date(2025, 12, 17), 0, since=date(2025, 10, 20)) == [
+        date(2025, 10, 1),
+        date(2025, 11, 1),
+    ]
+
+
+def test_roll_forward_is_a_no_op_on_sqlite(tmp_path, capsys):
+    engine = create_engine(f"sqlite:///{tmp_path / 'crm.db'}")
+    assert roll_forward(engine, date(2026, 1, 1)) == {}
+
+    assert partitions.main(["--database-url", f"sqlite:///{tmp_path / 'crm.db'}", "--from", "2024-01-01"]) == 0
+    assert json.loads(capsys.readouterr().out) == {}
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def pg_schema():
+    """``(url, schema)``: a scratch schema in the TEST_POSTGRES_URL database."""
+    url = os.getenv("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    schema = f"crm_partitions_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(url)
+    with admin.begin() as conn:
+        conn.exec_driver_sql(f"CREATE SCHEMA {schema}")
+    try:
+        yield url, schema
+    finally:
+        with admin.begin() as conn:
+            conn.exec_driver_sql(f"DROP SCHEMA {schema} CASCADE")
+        admin.dispose()
+
+
+@pytest.fixture
+def pg_engine(pg_schema):
+    """An engine whose search_path is the scratch schema."""
+    url, schema = pg_schema
+    engine = create_engine(url, connect_args={"options": f"-csearch_path={schema}"})
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+
+def test_backfilled_months_move_out_of_the_default_partition(pg_engine):
+    table = "sales_performance_metrics"
+    with pg_engine.begin() as conn:
+        for name in partitions.MONTHLY_TABLES:
+            conn.exec_driver_sql(
+                f"CREATE TABLE {name} (id serial, start_date date NOT NULL, end_date date NOT NULL) "
+                "PARTITION BY RANGE (start_date)"
+            )
+            conn.exec_driver_sql(f"CREATE TABLE {name}_default PARTITION OF {name} DEFAULT")
+        # backfilled history, before any partition for its months existed
+        conn.execute(
+            text(f"INSERT INTO {table} (start_date, end_date) VALUES (:day, :day)"),
+            [{"day": date(2025, 9, 3)}, {"day": date(2025, 10, 9)}, {"day": date(2025, 10, 30)}],
+        )
+
+    created = roll_forward(pg_engine, date(2025, 12, 17), months_ahead=0, since=date(2025, 9, 1))
+    assert created[table] == [partition_name(table, date(2025, m, 1)) for m in (9, 10, 11, 12)]
+
+    with pg_engine.connect() as conn:
+        def count(relation):
+            return conn.exec_driver_sql(f"SELECT count(*) FROM {relation}").scalar()
+
+        assert count(f"{table}_default") == 0
+        assert count(partition_name(table, date(2025, 9, 1))) == 1
+        assert count(partition_name(table, date(2025, 10, 1))) == 2
+        assert count(table) == 3
+
+    # idempotent
+    assert roll_forward(pg_engine, date(2025, 12, 17), months_ahead=0, since=date(2025, 9, 1)) == {}
+
+
+
+def test_migration_0007_partitions_existing_rows_and_reverts(pg_schema, pg_engine, monkeypatch):
+    from alembic import command
+    from alembic.config import Config
+
+    url, schema = pg_schema
+    # migrations/env.py reads DATABASE_URL; libpq drivers pick the schema up from PGOPTIONS
+    monkeypatch.setenv("DATABASE_URL", url)
+    monkeypatch.setenv("PGOPTIONS", f"-csearch_path={schema}")
+    cfg = Config(str(ROOT / "alembic.ini"))
+    cfg.set_main_option("script_location", str(ROOT / "migrations"))
+    table = "sales_performance_metrics"
+
+    command.upgrade(cfg, "0006_customer_document_usage")
+    with pg_engine.begin() as conn:
+        conn.execute(
+            text(
+                f"INSERT INTO {table} (id, start_date, end_date, revenue, conversion_rate, pipeline_velocity) "
+                "VALUES (:id, :day, :day, 1.0, 0.1, 1.0)"
+            ),
+            [{"id": str(uuid.uuid4()), "day": day} for day in (date(2024, 11, 5), date(2025, 2, 1))],
+        )
+    command.upgrade(cfg, "0007_partition_large_tables")
+
+    this_month = date.today().replace(day=1)
+    months, month = [], date(2024, 11, 1)
+    while month <= add_months(this_month, 3):
+        months.append(month)
+        month = add_months(month, 1)
+    with pg_engine.connect() as conn:
+        assert partitions.is_partitioned(conn, table)
+        assert partitions.is_partitioned(conn, "documents")
+        # every month from the oldest row's on, none of the rows left in the default partition
+        assert sorted(partitions.list_partitions(conn, table)) == sorted(
+            [partition_name(table, m) for m in months] + [f"{table}_default"]
+        )
+        assert conn.exec_driver_sql(f"SELECT count(*) FROM {table}_default").scalar() == 0
+        assert conn.exec_driver_sql(f"SELECT count(*) FROM {table}").scalar() == 2
+
+    command.downgrade(cfg, "0006_customer_document_usage")
+    with pg_engine.connect() as conn:
+        assert not partitions.is_partitioned(conn, table)
+        assert conn.exec_driver_sql(f"SELECT count(*) FROM {table}").scalar() == 2
@@ -0,0 +1,120 @@
+import uuid
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.pool import StaticPool
+
+from crm_svc.models import SalesPerformanceMetrics
+from crm_svc.models.base import Base, ReplicaMonitor, RoutingSession, replica_reads
+from crm_svc.services.report_cache import report_cache
+from crm_svc.services.report_service import ReportService
+
+START, END = date(2025, 3, 1), date(2025, 3, 31)
+
+
+def _engine(revenue):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            SalesPerformanceMetrics.__table__.insert(),
+            {
+                "id": str(uuid.uuid4()),
+                "start_date": START,
+                "end_date": END,
+                "revenue": revenue,
+                "conversion_rate": 0.5,
+                "pipeline_velocity": 1.0,
+                "created_at": datetime.utcnow(),
+            },
+        )
+    return engine
+
+
+class FakeProbe:
+    def __init__(self, lag=0.0):
+        self.lag = lag
+        self.calls = 0
+
+    def __call__(self, engine):
+        self.calls += 1
+        if isinstance(self.lag, Exception):
+            raise self.lag
+        return self.lag
+
+
+@pytest.fixture
+def routing():
+    # the primary and the replica hold different revenue so each read shows where it went
+    primary, replica_engine = _engine(100.0), _engine(200.0)
+    probe = FakeProbe()
+    replica = ReplicaMonitor(replica_engine, max_lag_seconds=5.0, check_interval_seconds=0.0, probe=probe)
+    session = RoutingSession(bind=primary, replica=replica)
+    yield session, replica, probe
+    session.close()
+    primary.dispose()
+    replica_engine.dispose()
+
+
+def _revenue(session):
+    return session.execute(select(SalesPerformanceMetrics.revenue)).scalar_one()
+
+
+def _ids(session):
+    return session.execute(select(SalesPerformanceMetrics.id)).scalars().all()
+
+
+def test_reads_use_primary_outside_replica_scope(routing):
+    session, _, probe = routing
+    assert _revenue(session) == 100.0
+    assert probe.calls == 0
+
+
+def test_report_reads_are_served_by_healthy_replica(routing):
+    session, _, _ = routing
+    with replica_reads():
+        assert _revenue(session) == 200.0
+    assert ReportService().get_sales_performance(session, START, END).revenue == 200.0
+
+
+def test_lagging_or_failing_replica_falls_back_to_primary(routing):
+    session, replica, probe = routing
+    probe.lag = 30.0
+    assert ReportService().get_sales_performance(session, START, END).revenue == 100.0
+    assert replica.lag_seconds == 30.0
+
+    probe.lag = ConnectionError("replica down")
+    report_cache.clear()
+    assert ReportService().get_sales_performance(session, START, END).revenue == 100.0
+
+    probe.lag = 0.0
+    report_cache.clear()
+    assert ReportService().get_sales_performance(session, START, END).revenue == 200.0
+
+
+def test_session_reads_its_own_writes_after_a_write(routing):
+    session, _, _ = routing
+    session.get(SalesPerformanceMetrics, _ids(session)[0]).revenue = 150.0
+    session.flush()
+    with replica_reads():
+        assert _revenue(session) == 150.0
+    assert session.wrote
+
+
+def test_locking_reads_use_primary(routing):
+    session, _, _ = routing
+    with replica_reads():
+        stmt = select(SalesPerformanceMetrics.revenue).with_for_update()
+        assert session.execute(stmt).scalar_one() == 100.0
+
+
+def test_monitor_rechecks_only_after_interval():
+    probe = FakeProbe()
+    replica = ReplicaMonitor(None, max_lag_seconds=1.0, check_interval_seconds=3600.0, probe=probe)
+    assert replica.healthy() and replica.healthy()
+    assert probe.calls == 1
+
+    replica.mark_unhealthy()
+    assert not replica.healthy()
+    assert probe.calls == 1
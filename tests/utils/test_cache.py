@@ -0,0 +1,146 @@
+import time
+from datetime import date, datetime
+
+import fakeredis
+import pytest
+
+from crm_svc.schemas import SalesPerformanceResponse
+from crm_svc.services.report_cache import CachePolicy, ReportCache, cache_key
+from crm_svc.utils import cache as cache_module
+from crm_svc.utils.cache import MemoryBackend, RedisBackend, decode, encode
+from crm_svc.utils.events import MetricChange
+from crm_svc.utils.metrics import CACHE_BACKEND_ERRORS
+
+START, END = date(2025, 5, 1), date(2025, 5, 31)
+REPORT = SalesPerformanceResponse(
+    start_date=START, end_date=END, revenue=1200.5, conversion_rate=0.25, pipeline_velocity=3.0
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _redis_pair():
+    """Two workers' backends on one shared server."""
+    server = fakeredis.FakeServer()
+    return (
+        RedisBackend(fakeredis.FakeRedis(server=server), prefix="test:"),
+        RedisBackend(fakeredis.FakeRedis(server=server), prefix="test:"),
+    )
+
+
+def _wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met"
+        time.sleep(0.01)
+
+
+@pytest.mark.parametrize("msgpack", [cache_module.msgpack, None], ids=["msgpack", "orjson"])
+def test_codec_round_trips_models_and_dates(monkeypatch, msgpack):
+    monkeypatch.setattr(cache_module, "msgpack", msgpack)
+    value = [1000.0, REPORT, {"on": date(2025, 5, 2), "at": datetime(2025, 5, 2, 9, 30)}]
+    decoded = decode(encode(value))
+    assert decoded == value
+    assert isinstance(decoded[1], SalesPerformanceResponse)
+
+
+def test_memory_backend_expires_evicts_and_leases():
+    clock = Clock()
+    backend = MemoryBackend(max_entries=2, clock=clock)
+    backend.set("a", 1, ttl=10)
+    backend.set("b", 2, ttl=10)
+    assert backend.get("a") == 1
+    backend.set("c", 3, ttl=10)
+    # "b" was the least recently used
+    assert backend.get("b") is None
+
+    backend.index_add("index", "a", ttl=5)
+    backend.index_add("index", "c", ttl=20)
+    backend.index_remove("index", ["c"])
+    backend.index_add("index", "d", ttl=20)
+    assert backend.index_members("index") == ["a", "d"]
+
+    clock.now += 10
+    assert backend.get("a") is None
+    assert backend.index_members("index") == ["d"]
+
+    assert backend.acquire("lease", ttl=5)
+    assert not backend.acquire("lease", ttl=5)
+    clock.now += 5
+    assert backend.acquire("lease", ttl=5)
+
+
+def test_redis_backend_is_shared_between_workers():
+    first, second = _redis_pair()
+    assert first.shared and not MemoryBackend().shared
+    first.set("report:x", [1000.0, REPORT], ttl=60)
+    assert second.get("report:x") == [1000.0, REPORT]
+    first.index_add("index:x", "report:x", ttl=60)
+    first.index_add("index:x", "report:gone", ttl=-1)
+    assert second.index_members("index:x") == ["report:x"]
+    second.index_remove("index:x", ["report:x"])
+    assert first.index_members("index:x") == []
+
+    assert first.acquire("lease:x", ttl=60)
+    assert not second.acquire("lease:x", ttl=60)
+
+    second.delete(["report:x", "lease:x"])
+    assert first.get("report:x") is None
+    assert first.acquire("lease:x", ttl=60)
+
+
+def test_redis_invalidations_reach_every_worker():
+    first, second = _redis_pair()
+    received = []
+    second.subscribe(received.append)
+    try:
+        _wait_for(lambda: first.client.pubsub_numsub(first.channel)[0][1] == 1)
+        first.publish({"reports": [["sales", START, END]]})
+        _wait_for(lambda: received)
+        assert received == [{"reports": [["sales", START, END]]}]
+    finally:
+        second.close()
+
+
+def test_unreachable_redis_behaves_as_a_miss():
+    class Down:
+        def __getattr__(self, name):
+            def fail(*args, **kwargs):
+                raise ConnectionError("connection refused")
+
+            return fail
+
+    backend = RedisBackend(Down())
+    before = CACHE_BACKEND_ERRORS.labels("get").get()
+    backend.set("k", 1, ttl=60)
+    assert backend.get("k") is None
+    assert not backend.acquire("lease", ttl=60)
+    assert CACHE_BACKEND_ERRORS.labels("get").get() == before + 1
+
+
+def test_report_cache_across_workers_on_redis():
+    first, second = _redis_pair()
+    policy = {"sales_performance": CachePolicy(10.0, 60.0)}
+    clock = Clock()
+    worker_a = ReportCache(policy, first, clock=clock)
+    worker_b = ReportCache(policy, second, clock=clock)
+    key = cache_key("sales_performance", START, END)
+    try:
+        assert worker_a.get_or_compute("sales_performance", key, lambda: REPORT, lambda: REPORT) == REPORT
+        # computed once for the whole fleet
+        assert worker_b.get_or_compute("sales_performance", key, lambda: "unused", lambda: "unused") == REPORT
+
+        # a change on one worker drops the entry for all and fences the others' in-flight work
+        generation = worker_b._generation
+        worker_a.invalidate([MetricChange("sales", "upsert", date(2025, 5, 3), date(2025, 5, 3), {})])
+        assert first.get(key) is None
+        _wait_for(lambda: worker_b._generation > generation)
+    finally:
+        first.close()
+        second.close()
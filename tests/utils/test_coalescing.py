@@ -0,0 +1,192 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pytest
+
+from crm_svc.services.report_service import ReportService
+from crm_svc.utils.coalescing import SingleFlight, report_flights, single_flight
+from crm_svc.utils.metrics import SINGLE_FLIGHT_CALLS
+
+
+def _count(operation, role):
+    return SINGLE_FLIGHT_CALLS.labels(operation, role).get()
+
+
+def _wait_for_coalesced(operation, before, n):
+    """Block until ``n`` callers have joined the in-flight execution of ``operation``."""
+    deadline = time.monotonic() + 5
+    while _count(operation, "coalesced") - before < n:
+        assert time.monotonic() < deadline, "callers were not coalesced"
+        time.sleep(0.001)
+
+
+def test_concurrent_sync_calls_share_one_execution():
+    flights = SingleFlight()
+    release = threading.Event()
+    executions = []
+
+    def compute():
+        executions.append(1)
+        release.wait(5)
+        return {"revenue": 42}
+
+    before = _count("test.sync", "coalesced")
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(flights.do, "k", compute, "test.sync") for _ in range(8)]
+        _wait_for_coalesced("test.sync", before, 7)
+        release.set()
+        results = [f.result(5) for f in futures]
+
+    assert len(executions) == 1
+    assert all(r is results[0] for r in results)
+    assert flights.in_flight() == 0
+    # the next call after completion executes again
+    assert flights.do("k", lambda: "fresh") == "fresh"
+
+
+def test_sync_error_is_raised_to_every_caller():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError("bad range")
+
+    before = _count("test.error", "coalesced")
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flights.do, "k", fail, "test.error")
+        started.wait(5)
+        follower = pool.submit(flights.do, "k", lambda: "unused", "test.error")
+        _wait_for_coalesced("test.error", before, 1)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError, match="bad range"):
+                future.result(5)
+
+
+def test_async_calls_share_one_execution_and_survive_caller_cancellation():
+    flights = SingleFlight()
+    executions = []
+
+    async def compute():
+        executions.append(1)
+        await asyncio.sleep(0.05)
+        return "report"
+
+    async def scenario():
+        leader = asyncio.ensure_future(flights.do_async("k", compute, "test.async"))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(flights.do_async("k", compute, "test.async")) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await asyncio.gather(*followers)
+
+    assert asyncio.run(scenario()) == ["report"] * 3
+    assert len(executions) == 1
+    assert flights.in_flight() == 0
+
+
+def test_waiting_callers_time_out_and_execute_themselves():
+    flights = SingleFlight(wait_timeout=0.01)
+    release = threading.Event()
+
+    def stuck():
+        release.wait(5)
+        return "leader"
+
+    before = _count("test.timeout", "timeout")
+    with ThreadPoolExecutor(1) as pool:
+        leader = pool.submit(flights.do, "k", stuck, "test.timeout")
+        while not flights.in_flight():
+            time.sleep(0.001)
+        assert flights.do("k", lambda: "own", "test.timeout") == "own"
+        release.set()
+        assert leader.result(5) == "leader"
+    assert _count("test.timeout", "timeout") == before + 1
+
+    async def scenario():
+        blocked = asyncio.Event()
+
+        async def slow():
+            await blocked.wait()
+            return "leader"
+
+        async def own():
+            return "own"
+
+        leader = asyncio.ensure_future(flights.do_async("k", slow, "test.timeout"))
+        await asyncio.sleep(0)
+        follower = await flights.do_async("k", own, "test.timeout")
+        blocked.set()
+        return await leader, follower
+
+    assert asyncio.run(scenario()) == ("leader", "own")
+
+
+def test_sessions_pinned_to_the_primary_are_not_coalesced():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    class Pinned:
+        wrote = True
+
+    class Service:
+        @single_flight("test.pinned", flights)
+        def get(self, db_session, day):
+            if db_session is None:
+                release.wait(5)
+                return "shared"
+            return "own writes"
+
+    with ThreadPoolExecutor(1) as pool:
+        leader = pool.submit(Service().get, None, 1)
+        while not flights.in_flight():
+            time.sleep(0.001)
+        # a session that wrote must see its own rows, not the in-flight result
+        assert Service().get(Pinned(), 1) == "own writes"
+        release.set()
+        assert leader.result(5) == "shared"
+
+
+def test_decorator_keys_on_arguments_after_the_session():
+    calls = []
+
+    class Service:
+        @single_flight("test.decorated", SingleFlight())
+        def get(self, db_session, start, end):
+            calls.append((db_session, start, end))
+            return (start, end)
+
+        @single_flight("test.decorated_async", SingleFlight())
+        async def get_async(self, db_session, start, end):
+            return (start, end)
+
+    assert Service().get("session", 1, 2) == (1, 2)
+    assert calls == [("session", 1, 2)]
+    assert asyncio.run(Service().get_async(None, 3, 4)) == (3, 4)
+
+
+def test_identical_report_requests_are_coalesced(monkeypatch, db_session):
+    from crm_svc.services import report_service
+
+    release = threading.Event()
+    real = report_service.activity_aggregator.sales
+
+    def slow_sales(*args):
+        release.wait(5)
+        return real(*args)
+
+    monkeypatch.setattr(report_service.activity_aggregator, "sales", slow_sales)
+    day = date(2025, 6, 2)
+    before = _count("report.sales_performance", "coalesced")
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(ReportService().get_sales_performance, db_session, day, day) for _ in range(4)]
+        _wait_for_coalesced("report.sales_performance", before, 3)
+        release.set()
+        results = [f.result(5) for f in futures]
+    assert all(r is results[0] for r in results)
+    assert report_flights.in_flight() == 0
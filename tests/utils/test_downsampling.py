@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from crm_svc.utils.downsampling import downsample, lttb, min_max
+
+
+def _series(n=10_000):
+    x = np.arange(n, dtype=np.float64)
+    y = np.sin(x / 200.0)
+    if n > 5678:
+        y[1234] = 50.0  # spikes that must survive downsampling
+        y[5678] = -50.0
+    return x, y
+
+
+def test_lttb_returns_target_sorted_indices_with_endpoints():
+    x, y = _series()
+    keep = lttb(x, y, 500)
+    assert len(keep) == 500
+    assert keep[0] == 0 and keep[-1] == len(x) - 1
+    assert np.all(np.diff(keep) > 0)
+    assert 1234 in keep and 5678 in keep
+
+
+def test_min_max_keeps_extremes_within_target():
+    x, y = _series()
+    keep = min_max(x, y, 500)
+    assert len(keep) <= 500
+    assert keep[0] == 0 and keep[-1] == len(x) - 1
+    assert 1234 in keep and 5678 in keep
+
+
+def test_short_series_returned_unchanged():
+    x, y = _series(20)
+    assert list(lttb(x, y, 50)) == list(range(20))
+    assert list(min_max(x, y, 20)) == list(range(20))
+
+
+def test_unknown_method_rejected():
+    x, y = _series(100)
+    with pytest.raises(ValueError):
+        downsample(x, y, 10, method="average")
@@ -0,0 +1,100 @@
+import asyncio
+from datetime import date
+
+from crm_svc.models import SalesPerformanceMetrics, TeamProductivityMetrics
+from crm_svc.utils.events import MetricChange, bus, install_change_tracking
+
+
+def _sales_row(day, revenue=1.0):
+    return SalesPerformanceMetrics(
+        start_date=date(2024, 5, day),
+        end_date=date(2024, 5, day),
+        revenue=revenue,
+        conversion_rate=0.1,
+        pipeline_velocity=1.0,
+    )
+
+
+def test_committed_orm_changes_reach_overlapping_subscribers(db_session):
+    install_change_tracking()
+
+    async def scenario():
+        sub = bus.subscribe(date(2024, 5, 1), date(2024, 5, 31), {"sales"})
+        other = bus.subscribe(date(2023, 1, 1), date(2023, 1, 31))
+        try:
+            db_session.add(_sales_row(3, revenue=42.0))
+            db_session.add(
+                TeamProductivityMetrics(
+                    start_date=date(2024, 5, 3),
+                    end_date=date(2024, 5, 3),
+                    tasks_completed=1,
+                    deals_closed=1,
+                    activity_level=0.5,
+                )
+            )
+            db_session.commit()
+            batch = await asyncio.wait_for(sub.queue.get(), timeout=1)
+            assert [(c.report, c.op) for c in batch] == [("sales", "upsert")]
+            assert batch[0].values["revenue"] == 42.0
+            assert "id" not in batch[0].values
+            assert other.queue.empty()
+        finally:
+            bus.unsubscribe(sub)
+            bus.unsubscribe(other)
+
+    asyncio.run(scenario())
+
+
+def test_rolled_back_changes_are_not_published(db_session):
+    install_change_tracking()
+
+    async def scenario():
+        sub = bus.subscribe(date(2024, 5, 1), date(2024, 5, 31))
+        try:
+            db_session.add(_sales_row(4))
+            db_session.flush()
+            db_session.rollback()
+            await asyncio.sleep(0.05)
+            assert sub.queue.empty()
+        finally:
+            bus.unsubscribe(sub)
+
+    asyncio.run(scenario())
+
+
+def test_stage_rows_mark_their_day_stale(db_session):
+    from crm_svc.models import PipelineStageMetrics
+
+    install_change_tracking()
+
+    async def scenario():
+        sub = bus.subscribe(date(2024, 5, 1), date(2024, 5, 31), {"pipeline"})
+        try:
+            db_session.add(PipelineStageMetrics(day=date(2024, 5, 7), stage="lead", stage_order=0, entered=3))
+            db_session.commit()
+            batch = await asyncio.wait_for(sub.queue.get(), timeout=1)
+            # a stage row is not a pipeline report, so no values to apply in place
+            assert [(c.report, c.start_date, c.end_date, c.values) for c in batch] == [
+                ("pipeline", date(2024, 5, 7), date(2024, 5, 7), None)
+            ]
+        finally:
+            bus.unsubscribe(sub)
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_is_flagged_for_resync():
+    async def scenario():
+        sub = bus.subscribe(date(2024, 1, 1), date(2024, 12, 31))
+        sub.queue = asyncio.Queue(maxsize=1)
+        try:
+            change = MetricChange("sales", "upsert", date(2024, 2, 1), date(2024, 2, 1), {"revenue": 1.0})
+            bus.publish([change])
+            bus.publish([change])
+            await asyncio.sleep(0.05)
+            assert sub.queue.qsize() == 1
+            assert sub.needs_resync
+        finally:
+            bus.unsubscribe(sub)
+
+    asyncio.run(scenario())
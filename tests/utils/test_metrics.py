@@ -0,0 +1,67 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from crm_svc.utils.metrics import MetricsRegistry, REGISTRY, instrument_engine
+from crm_svc.utils.operations import get_current_operation, track_operation
+
+
+def test_registry_renders_counter_gauge_and_histogram():
+    registry = MetricsRegistry()
+    requests = registry.counter("demo_requests", "Requests.", ("route",))
+    in_flight = registry.gauge("demo_in_flight", "In flight.")
+    latency = registry.histogram("demo_latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+
+    requests.labels(route='/a"b').inc()
+    requests.labels(route='/a"b').inc(2)
+    in_flight.labels().inc()
+    latency.labels("/a").observe(0.05)
+    latency.labels("/a").observe(0.5)
+    latency.labels("/a").observe(5)
+
+    out = registry.render()
+    assert "# TYPE demo_requests counter" in out
+    assert 'demo_requests_total{route="/a\\"b"} 3' in out
+    assert "demo_in_flight 1" in out
+    assert 'demo_latency_seconds_bucket{route="/a",le="0.1"} 1' in out
+    assert 'demo_latency_seconds_bucket{route="/a",le="1"} 2' in out
+    assert 'demo_latency_seconds_bucket{route="/a",le="+Inf"} 3' in out
+    assert 'demo_latency_seconds_count{route="/a"} 3' in out
+
+
+def test_track_operation_sets_context_for_nested_calls():
+    seen = []
+
+    @track_operation("report.test_op")
+    def op():
+        seen.append(get_current_operation())
+
+    op()
+    assert seen == ["report.test_op"]
+    assert get_current_operation() is None
+
+
+def test_instrument_engine_records_queries_by_operation(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'm.db'}", poolclass=QueuePool)
+    instrument_engine(engine, name="test_engine")
+    # idempotent
+    instrument_engine(engine, name="test_engine")
+
+    @track_operation("report.metrics_test")
+    def run_query():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    run_query()
+    out = REGISTRY.render()
+    assert 'crm_db_queries_total{engine="test_engine",operation="report.metrics_test",statement="SELECT"} 1' in out
+    assert 'crm_db_pool_checkouts_total{engine="test_engine"}' in out
+    assert 'crm_db_pool_checkout_duration_seconds_count{engine="test_engine"} 1' in out
+    assert 'crm_db_pool_connects_total{engine="test_engine"} 1' in out
+    assert 'crm_db_pool_size{engine="test_engine"} 5' in out
+
+    # the listeners survive the pool being recreated
+    engine.dispose()
+    run_query()
+    out = REGISTRY.render()
+    assert 'crm_db_pool_checkouts_total{engine="test_engine"} 2' in out
+    assert 'crm_db_pool_checkout_duration_seconds_count{engine="test_engine"} 2' in out
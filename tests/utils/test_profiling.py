@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+
+from crm_svc import config
+from crm_svc.utils.profiling import StackSampler, _rotate
+
+
+def _busy_crm_work(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def test_stack_sampler_produces_folded_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_crm_work, args=(stop,))
+    worker.start()
+    # treat the tests directory as "our" code so the worker's stacks are kept
+    sampler = StackSampler(interval=0.001, package_dir=os.path.dirname(__file__)).start()
+    time.sleep(0.05)
+    sampler.stop()
+    stop.set()
+    worker.join()
+
+    folded = sampler.folded()
+    assert sampler.samples > 0
+    line = folded.splitlines()[0]
+    stack, count = line.rsplit(" ", 1)
+    assert int(count) >= 1
+    assert "_busy_crm_work (test_profiling.py:" in stack
+    assert ";" in stack
+
+
+def test_rotate_keeps_newest_profiles(tmp_path):
+    for i in range(5):
+        for suffix in (".folded", ".alloc.txt"):
+            path = tmp_path / f"p{i}{suffix}"
+            path.write_text("x")
+            os.utime(path, (1000 + i, 1000 + i))
+    _rotate(str(tmp_path), max_files=2)
+    assert sorted(os.listdir(tmp_path)) == ["p3.alloc.txt", "p3.folded", "p4.alloc.txt", "p4.folded"]
+
+
+def test_profile_header_triggers_profile(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "PROFILE_TOKEN", "s3cret")
+    monkeypatch.setattr(config, "PROFILE_OUTPUT_DIR", str(tmp_path))
+
+    resp = client.get("/api/export", params={"start_date": "2023-05-01", "end_date": "2023-05-03", "report_type": "sales"})
+    assert "x-profile-id" not in resp.headers
+
+    resp = client.get(
+        "/api/export",
+        params={"start_date": "2023-05-01", "end_date": "2023-05-03", "report_type": "sales"},
+        headers={"X-Profile-Token": "wrong"},
+    )
+    assert "x-profile-id" not in resp.headers
+
+    resp = client.get(
+        "/api/export",
+        params={"start_date": "2023-05-01", "end_date": "2023-05-03", "report_type": "sales"},
+        headers={"X-Profile-Token": "s3cret"},
+    )
+    assert resp.status_code == 200
+    profile_id = resp.headers["x-profile-id"]
+    assert profile_id.endswith("_GET_api_export")
+    assert (tmp_path / f"{profile_id}.folded").exists()
+    alloc = (tmp_path / f"{profile_id}.alloc.txt").read_text()
+    assert alloc.startswith("# wall_ms=")
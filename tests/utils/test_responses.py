@@ -0,0 +1,62 @@
+import json
+from datetime import date
+
+from crm_svc.schemas.report import PipelineAnalyticsResponse, SalesPerformanceResponse
+from crm_svc.utils.responses import ORJSONModelResponse, compute_etag, etag_matches, model_response
+
+
+def test_model_rendered_directly_by_pydantic_serializer():
+    model = SalesPerformanceResponse(
+        start_date=date(2025, 1, 1),
+        end_date=date(2025, 1, 2),
+        revenue=2000.0,
+        conversion_rate=0.11,
+        pipeline_velocity=5.0,
+    )
+    resp = model_response(model)
+    assert isinstance(resp, ORJSONModelResponse)
+    assert resp.media_type == "application/json"
+    assert json.loads(resp.body) == model.model_dump(mode="json")
+
+
+def test_plain_content_rendered_with_orjson():
+    resp = ORJSONModelResponse({"day": date(2025, 1, 1), 1: "non-str key"})
+    assert json.loads(resp.body) == {"day": "2025-01-01", "1": "non-str key"}
+
+
+def test_api_uses_fast_path_and_keeps_shape(client):
+    resp = client.get(
+        "/api/pipeline-analytics",
+        params={"start_date": "2023-04-01", "end_date": "2023-04-05"},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/json"
+    body = PipelineAnalyticsResponse.model_validate(resp.json())
+    assert body.start_date == date(2023, 4, 1)
+
+
+def test_etag_matching_follows_weak_comparison():
+    etag = compute_etag(b'{"a":1}')
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_report_endpoint_answers_304_when_unchanged(client):
+    params = {"start_date": "2023-04-01", "end_date": "2023-04-05"}
+    first = client.get("/api/sales-performance", params=params)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    second = client.get("/api/sales-performance", params=params, headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+
+    stale = client.get("/api/sales-performance", params=params, headers={"If-None-Match": '"stale"'})
+    assert stale.status_code == 200
+    assert stale.json() == first.json()
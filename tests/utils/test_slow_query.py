@@ -0,0 +1,55 @@
+import json
+import logging
+
+from sqlalchemy import create_engine, text
+
+from crm_svc.utils.operations import track_operation
+from crm_svc.utils.slow_query import install_slow_query_log, redact_parameters
+
+
+def _slow_entries(caplog):
+    return [
+        json.loads(r.getMessage().split(" ", 1)[1])
+        for r in caplog.records
+        if r.getMessage().startswith("slow_query ")
+    ]
+
+
+def test_redact_parameters_hides_values():
+    assert redact_parameters({"name": "secret", "n": 5, "x": None}) == {"name": "<str:6>", "n": "<int>", "x": None}
+    assert redact_parameters([("a", 1), ("b", 2)]) == {"rows": 2, "first": ["<str:1>", "<int>"]}
+
+
+def test_slow_statement_logged_with_operation_and_plan(tmp_path, caplog):
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    install_slow_query_log(engine, threshold_ms=0, explain=True, explain_per_minute=1)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)"))
+
+    @track_operation("report.slow_test")
+    def run():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT * FROM t WHERE name = :name"), {"name": "customer@example.com"}).all()
+            # the same statement is not explained twice within the cooldown window
+            conn.execute(text("SELECT * FROM t WHERE name = :name"), {"name": "other"}).all()
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger="crm_svc.utils.slow_query"):
+        run()
+
+    entries = [e for e in _slow_entries(caplog) if e["statement"].startswith("SELECT")]
+    assert len(entries) == 2
+    first, second = entries
+    assert first["operation"] == "report.slow_test"
+    assert "customer@example.com" not in json.dumps(first)
+    assert first["plan"] and any("t" in line for line in first["plan"])
+    assert "plan" not in second
+
+
+def test_negative_threshold_disables_log(tmp_path, caplog):
+    engine = create_engine(f"sqlite:///{tmp_path / 'off.db'}")
+    assert install_slow_query_log(engine, threshold_ms=-1) is None
+    with caplog.at_level(logging.WARNING, logger="crm_svc.utils.slow_query"):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    assert _slow_entries(caplog) == []
@@ -0,0 +1,98 @@
+import json
+import uuid
+
+import pytest
+
+from crm_svc.utils import tracing
+from crm_svc.utils.file_storage import _delete_file_from_disk, _get_file_content, _save_file_to_disk
+from crm_svc.utils.tracing import (
+    InMemorySpanExporter,
+    JsonFileSpanExporter,
+    configure_tracing,
+    instrument_engine_tracing,
+    parse_traceparent,
+    start_span,
+)
+
+PARENT = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemorySpanExporter()
+    tracer = configure_tracing(exporter, sample_rate=0.0)
+    yield exporter
+    tracer.processor.force_flush()
+    configure_tracing(None, sample_rate=0.0)
+
+
+def test_parse_traceparent():
+    ctx = parse_traceparent(PARENT)
+    assert ctx.trace_id == "0af7651916cd43dd8448eb211c80319c"
+    assert ctx.span_id == "b7ad6b7169203331"
+    assert ctx.sampled is True
+    assert parse_traceparent("00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-00").sampled is False
+    assert parse_traceparent("garbage") is None
+    assert parse_traceparent("00-" + "0" * 32 + "-b7ad6b7169203331-01") is None
+
+
+def test_start_span_is_noop_without_active_request(exporter):
+    with start_span("report.outside") as span:
+        assert span is None
+    tracing.get_tracer().processor.force_flush()
+    assert exporter.spans == []
+
+
+def test_request_spans_propagate_from_header(client, session_local, exporter):
+    instrument_engine_tracing(session_local.kw["bind"])
+    resp = client.get(
+        "/api/sales-performance",
+        params={"start_date": "2023-01-01", "end_date": "2023-01-05"},
+        headers={"traceparent": PARENT},
+    )
+    assert resp.status_code == 200
+    echoed = parse_traceparent(resp.headers["traceparent"])
+    assert echoed.trace_id == "0af7651916cd43dd8448eb211c80319c"
+
+    tracing.get_tracer().processor.force_flush()
+    by_name = {s.name: s for s in exporter.spans}
+    root = by_name["GET /api/sales-performance"]
+    service = by_name["report.sales_performance"]
+    query = by_name["db.query"]
+    assert {s.context.trace_id for s in exporter.spans} == {"0af7651916cd43dd8448eb211c80319c"}
+    assert root.parent_span_id == "b7ad6b7169203331"
+    assert service.parent_span_id == root.context.span_id
+    assert query.parent_span_id == service.context.span_id
+    assert query.attributes["db.statement"].startswith("SELECT")
+    assert root.attributes["http.status_code"] == 200
+
+
+def test_unsampled_request_records_nothing(client, exporter):
+    resp = client.get(
+        "/api/team-productivity",
+        params={"start_date": "2023-01-01", "end_date": "2023-01-05"},
+        headers={"traceparent": "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-00"},
+    )
+    assert resp.status_code == 200
+    assert "traceparent" not in resp.headers
+    tracing.get_tracer().processor.force_flush()
+    assert exporter.spans == []
+
+
+def test_storage_spans_and_file_exporter(tmp_path, monkeypatch):
+    out = tmp_path / "spans.jsonl"
+    tracer = configure_tracing(JsonFileSpanExporter(str(out)), sample_rate=1.0)
+    monkeypatch.setattr("crm_svc.utils.file_storage.DOCUMENT_STORAGE_PATH", str(tmp_path))
+    try:
+        root = tracer.start_root_span("job")
+        _, path = _save_file_to_disk(b"%PDF-1.4 test", "a.pdf", uuid.uuid4())
+        assert _get_file_content(path) == b"%PDF-1.4 test"
+        _delete_file_from_disk(path)
+        tracer.end_span(root)
+        tracer.processor.force_flush()
+    finally:
+        configure_tracing(None, sample_rate=0.0)
+
+    lines = out.read_text().splitlines()
+    names = [json.loads(line)["name"] for line in lines]
+    assert names == ["storage.write", "storage.read", "storage.delete", "job"]